@@ -44,16 +44,22 @@ async def create_admins():
     # Create new admins
     print("\n🔧 Creating new admin accounts...")
     
+    # bcrypt is CPU-bound; hash both passwords in parallel off the event loop
+    hash1, hash2 = await asyncio.gather(
+        asyncio.to_thread(hash_password, "Kitch3n3r22"),
+        asyncio.to_thread(hash_password, "IloveHaro7dUser")
+    )
+    
     admins = [
         {
             "username": "elizabeth",
-            "password_hash": hash_password("Kitch3n3r22"),
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "password_hash": hash1,
+            "created_at": datetime.now(timezone.utc)
         },
         {
             "username": "druonyx",
-            "password_hash": hash_password("IloveHaro7dUser"),
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "password_hash": hash2,
+            "created_at": datetime.now(timezone.utc)
         }
     ]
     
@@ -0,0 +1,500 @@
+#!/usr/bin/env python3
+"""
+In-process load test for the TC Pro Dojo API
+Boots server:app over an ASGI transport against a throwaway database, seeds realistic volumes
+and reports throughput and p50/p95/p99 latency per endpoint as JSON that can be diffed between commits.
+
+    python benchmark.py                                  # local mongod, tcprodojo_bench database
+    python benchmark.py --mongomock                      # in-memory stand-in (pip install mongomock-motor)
+    python benchmark.py --scale 0.1 --output before.json
+    python benchmark.py --output after.json --compare before.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+BACKEND_DIR = Path(__file__).parent
+
+ADMIN_USERNAME = "bench_admin"
+ADMIN_PASSWORD = "bench-password"
+
+# Dataset sizes at --scale 1
+DATASET = {
+    "coaches": 1000,
+    "faqs": 1000,
+    "classes": 40,
+    "products": 24,
+    "students": 50000,
+    "newsletter_subscriptions": 20000,
+    "orders": 100000,
+}
+SEED_BATCH = 5000
+
+FIRST_NAMES = ["Alex", "Sam", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie", "Quinn", "Avery"]
+LAST_NAMES = ["Tremblay", "Gagnon", "Roy", "Côté", "Bouchard", "Gauthier", "Morin", "Lavoie", "Fortin", "Smith"]
+WEEKDAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="In-process API benchmark")
+    parser.add_argument("--mongomock", action="store_true", help="use mongomock-motor instead of MONGO_URL")
+    parser.add_argument("--db-name", default=os.environ.get('BENCH_DB_NAME', 'tcprodojo_bench'))
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplier for the seeded dataset sizes")
+    parser.add_argument("--skip-seed", action="store_true", help="reuse the data already in the bench database")
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests per scenario")
+    parser.add_argument("--only", default="", help="comma-separated scenario names")
+    parser.add_argument("--output", default="benchmark-report.json")
+    parser.add_argument("--compare", help="previous report to diff against")
+    return parser.parse_args()
+
+
+def load_server(args):
+    """Import server against the bench database; env must be set before the module creates its client."""
+    if "bench" not in args.db_name:
+        sys.exit(f"Refusing to seed '{args.db_name}': the bench database name must contain 'bench'")
+    from dotenv import load_dotenv
+    os.environ['DB_NAME'] = args.db_name
+    # Never send real mail from a benchmark run
+    os.environ['RESEND_API_KEY'] = ''
+    load_dotenv(BACKEND_DIR / '.env')
+    os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+
+    if args.mongomock:
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            sys.exit("--mongomock needs the mongomock-motor package (pip install mongomock-motor)")
+        import motor.motor_asyncio
+        motor.motor_asyncio.AsyncIOMotorClient = AsyncMongoMockClient
+
+    sys.path.insert(0, str(BACKEND_DIR))
+    import server
+    return server
+
+
+class OfflinePaymentGateway:
+    """Answers checkout session calls locally so checkout latency measures this service, not Stripe."""
+
+    async def create_checkout_session(self, webhook_url, checkout_req):
+        session_id = f"cs_bench_{uuid.uuid4().hex}"
+        return SimpleNamespace(session_id=session_id, url=f"https://checkout.stripe.com/c/pay/{session_id}")
+
+    async def get_checkout_status(self, session_id):
+        return SimpleNamespace(status="open", payment_status="unpaid", amount_total=0, currency="cad", metadata={})
+
+    def close(self):
+        pass
+
+
+# ==================== SEEDING ====================
+
+def person(rng, i):
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    return f"{first} {last}", f"{first.lower()}.{last.lower()}.{i}@bench.example.com"
+
+
+def make_coaches(rng, count, now):
+    return [{
+        "id": str(uuid.uuid4()),
+        "name": person(rng, i)[0],
+        "aka": "",
+        "title": "Coach",
+        "specialty": rng.choice(["Wrestling", "Promos", "Conditioning", "Psychology"]),
+        "experience": f"{rng.randint(2, 30)} years",
+        "bio": "Trained in Montreal and on the indie circuit. " * 4,
+        "achievements": ["Tag team champion", "Hall of fame"],
+        "photo_url": "",
+        "displayOrder": i,
+        "created_at": now,
+    } for i in range(count)]
+
+
+def make_faqs(rng, count, now):
+    return [{
+        "id": str(uuid.uuid4()),
+        "question": f"Question {i}: do I need experience to start training?",
+        "answer": "No. Beginner classes cover bumps, rolls and ring basics before anything else. " * 3,
+        "displayOrder": i,
+        "created_at": now,
+    } for i in range(count)]
+
+
+def make_classes(rng, count, now):
+    classes = []
+    for i in range(count):
+        days = rng.sample(WEEKDAY_NAMES, rng.randint(1, 3))
+        hour = rng.randint(5, 8)
+        classes.append({
+            "id": str(uuid.uuid4()),
+            "day": "",
+            "days": [],
+            "schedule": [{"day": day, "time": f"{hour}:00 PM - {hour + 2}:00 PM"} for day in days],
+            "time": "",
+            "title": f"Bench class {i}",
+            "instructor": "Bench Coach",
+            "level": rng.choice(["Beginner", "Intermediate", "Advanced", "All"]),
+            "type": "Wrestling",
+            "description": "",
+            "is_one_time": False,
+            "one_time_date": "",
+            "created_at": now,
+        })
+    return classes
+
+
+def make_products(rng, count, now):
+    return [{
+        "id": str(uuid.uuid4()),
+        "name": f"Bench product {i}",
+        "description": "Dojo merch",
+        "price": float(rng.choice([15, 25, 35, 45, 60])),
+        "imageUrl": "",
+        "sizes": ["S", "M", "L", "XL"],
+        "category": "merch",
+        "active": True,
+        "displayOrder": i,
+        "created_at": now,
+    } for i in range(count)]
+
+
+def make_students(rng, count, class_ids, now):
+    students = []
+    for i in range(count):
+        name, email = person(rng, i)
+        students.append({
+            "id": str(uuid.uuid4()),
+            "name": name,
+            "email": email,
+            "phone": "",
+            "classes": rng.sample(class_ids, rng.randint(0, min(3, len(class_ids)))),
+            "notes": "",
+            "active": rng.random() > 0.1,
+            "notify_class_changes": rng.random() > 0.2,
+            "created_at": now - timedelta(days=rng.randint(0, 730)),
+        })
+    return students
+
+
+def make_subscriptions(rng, count, now):
+    return [{
+        "id": str(uuid.uuid4()),
+        "email": f"subscriber.{i}@bench.example.com",
+        "subscribed_at": now - timedelta(minutes=rng.randint(0, 525600)),
+    } for i in range(count)]
+
+
+def make_orders(rng, count, products, now):
+    orders = []
+    for i in range(count):
+        name, email = person(rng, i)
+        items = []
+        for product in rng.sample(products, rng.randint(1, min(3, len(products)))):
+            quantity = rng.randint(1, 2)
+            items.append({
+                "product_id": product['id'], "name": product['name'], "price": product['price'],
+                "size": "M", "quantity": quantity, "line_total": product['price'] * quantity,
+            })
+        subtotal = sum(item['line_total'] for item in items)
+        orders.append({
+            "id": str(uuid.uuid4()),
+            "customer_name": name,
+            "customer_email": email,
+            "customer_phone": "",
+            "items": items,
+            "shipping_address": {"street": "1 Rue Bench", "city": "Montreal", "province": "QC",
+                                 "country": "Canada", "postal_code": "H2X 1Y4"},
+            "shipping_zone": "quebec",
+            "shipping_cost": 10.0,
+            "subtotal": subtotal,
+            "total": subtotal + 10.0,
+            "stripe_session_id": f"cs_bench_seed_{i}",
+            "payment_status": rng.choices(["paid", "pending", "expired"], weights=[80, 10, 10])[0],
+            "order_notes": "",
+            "created_at": now - timedelta(minutes=rng.randint(0, 525600)),
+        })
+    return orders
+
+
+async def insert_batched(collection, docs):
+    for start in range(0, len(docs), SEED_BATCH):
+        await collection.insert_many(docs[start:start + SEED_BATCH], ordered=False)
+
+
+async def seed(server, scale):
+    db = server.db
+    rng = random.Random(42)
+    now = datetime.now(timezone.utc)
+    sizes = {name: max(1, int(count * scale)) for name, count in DATASET.items()}
+
+    for name in await db.list_collection_names():
+        await db.drop_collection(name)
+
+    classes = make_classes(rng, sizes['classes'], now)
+    products = make_products(rng, sizes['products'], now)
+    await insert_batched(db.coaches, make_coaches(rng, sizes['coaches'], now))
+    await insert_batched(db.faqs, make_faqs(rng, sizes['faqs'], now))
+    await insert_batched(db.classes, classes)
+    await insert_batched(db.products, products)
+    await insert_batched(db.students, make_students(rng, sizes['students'], [c['id'] for c in classes], now))
+    await insert_batched(db.newsletter_subscriptions, make_subscriptions(rng, sizes['newsletter_subscriptions'], now))
+    await insert_batched(db.orders, make_orders(rng, sizes['orders'], products, now))
+    # Seeding bypasses the admin handlers, so bump the public content versions itself
+    await server.invalidate_public_cache(*server.PUBLIC_COLLECTIONS)
+    await db.admins.insert_one({
+        "id": str(uuid.uuid4()),
+        "username": ADMIN_USERNAME,
+        "password_hash": server.hash_password(ADMIN_PASSWORD),
+        "created_at": now,
+    })
+    return sizes
+
+
+async def dataset_counts(server):
+    return {name: await server.db[name].count_documents({}) for name in DATASET}
+
+
+# ==================== SCENARIOS ====================
+
+def checkout_body(products):
+    def body(rng):
+        return {
+            "customer_name": "Bench Buyer",
+            "customer_email": f"buyer.{rng.randint(0, 10 ** 9)}@bench.example.com",
+            "items": [{"product_id": p['id'], "name": p['name'], "price": p['price'], "size": "M", "quantity": 1}
+                      for p in rng.sample(products, min(2, len(products)))],
+            "shipping_address": {"street": "1 Rue Bench", "city": "Montreal", "province": "QC",
+                                 "country": "Canada", "postal_code": "H2X 1Y4"},
+            "origin_url": "https://bench.example.com",
+        }
+    return body
+
+
+async def build_scenarios(server, client, admin_headers):
+    """(name, group, method, path, params, headers, json body factory, request count override)"""
+    products = await server.db.products.find({"active": True}, {"_id": 0, "id": 1, "name": 1, "price": 1}).to_list(100)
+    class_doc = await server.db.classes.find_one({}, {"_id": 0, "id": 1})
+    today = datetime.now(timezone.utc).date()
+    calendar_range = {"from": today.isoformat(), "to": (today + timedelta(days=27)).isoformat()}
+
+    coaches = await client.get("/api/coaches")
+    coaches_etag = {"If-None-Match": coaches.headers.get("ETag", "")}
+    first_page = await client.get("/api/admin/students", params={"limit": 100}, headers=admin_headers)
+    students_cursor = first_page.headers.get(server.NEXT_CURSOR_HEADER, "")
+
+    scenarios = [
+        ("public_coaches", "public", "GET", "/api/coaches", None, None, None, None),
+        ("public_coaches_304", "public", "GET", "/api/coaches", None, coaches_etag, None, None),
+        ("public_faqs", "public", "GET", "/api/faqs", None, None, None, None),
+        ("public_classes", "public", "GET", "/api/classes", None, None, None, None),
+        ("public_products", "public", "GET", "/api/products", None, None, None, None),
+        ("public_bundle", "public", "GET", "/api/bundle", None, None, None, None),
+        ("public_calendar_4_weeks", "public", "GET", "/api/calendar", calendar_range, None, None, None),
+        ("public_classes_ics", "public", "GET", "/api/classes.ics", None, None, None, None),
+        ("checkout", "checkout", "POST", "/api/shop/checkout", None, None, checkout_body(products), None),
+        ("admin_students_page", "admin", "GET", "/api/admin/students", {"limit": 100}, admin_headers, None, None),
+        ("admin_students_next_page", "admin", "GET", "/api/admin/students",
+         {"limit": 100, "after": students_cursor}, admin_headers, None, None),
+        ("admin_orders_page", "admin", "GET", "/api/admin/orders", {"limit": 100}, admin_headers, None, None),
+        ("admin_orders_default", "admin", "GET", "/api/admin/orders", None, admin_headers, None, 50),
+        ("admin_newsletter_page", "admin", "GET", "/api/admin/newsletter-subscriptions",
+         {"limit": 100}, admin_headers, None, None),
+        ("admin_orders_export", "admin", "GET", "/api/admin/orders/export", None, admin_headers, None, 3),
+    ]
+    if class_doc:
+        scenarios.append(("public_class_ics", "public", "GET", f"/api/classes/{class_doc['id']}.ics",
+                          None, None, None, None))
+    return scenarios
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    # Nearest-rank, so p99 of 500 samples is an observed latency rather than an interpolation
+    rank = math.ceil(pct / 100 * len(sorted_values))
+    return sorted_values[max(0, min(len(sorted_values), rank) - 1)]
+
+
+async def run_scenario(client, scenario, total, concurrency, warmup):
+    name, group, method, path, params, headers, body_factory, override = scenario
+    total = min(total, override) if override else total
+    rng = random.Random(name)
+    latencies = []
+    status_codes = {}
+    errors = 0
+
+    async def send():
+        body = body_factory(rng) if body_factory else None
+        started = time.perf_counter()
+        response = await client.request(method, path, params=params, headers=headers, json=body)
+        return response.status_code, (time.perf_counter() - started) * 1000
+
+    for _ in range(min(warmup, total)):
+        await send()
+
+    remaining = total
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            try:
+                status, elapsed_ms = await send()
+            except Exception as e:
+                errors += 1
+                status_codes['exception'] = status_codes.get('exception', 0) + 1
+                print(f"   {name}: {type(e).__name__}: {e}")
+                continue
+            latencies.append(elapsed_ms)
+            status_codes[str(status)] = status_codes.get(str(status), 0) + 1
+            if status >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, total))))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "group": group,
+        "method": method,
+        "path": path,
+        "requests": total,
+        "concurrency": min(concurrency, total),
+        "errors": errors,
+        "status_codes": status_codes,
+        "throughput_rps": round(total / wall, 2) if wall else 0.0,
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies), 3) if latencies else 0.0,
+            "p50": round(percentile(latencies, 50), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "p99": round(percentile(latencies, 99), 3),
+            "max": round(latencies[-1], 3) if latencies else 0.0,
+        },
+    }
+
+
+# ==================== REPORT ====================
+
+def git_revision():
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                                  capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=BACKEND_DIR,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return f"{revision}-dirty" if dirty else revision
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_summary(report):
+    print("\n" + "=" * 96)
+    print(f"{'scenario':<28}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}  status")
+    for name, result in report['scenarios'].items():
+        latency = result['latency_ms']
+        print(f"{name:<28}{result['throughput_rps']:>10.1f}{latency['p50']:>10.2f}{latency['p95']:>10.2f}"
+              f"{latency['p99']:>10.2f}{result['errors']:>8}  {result['status_codes']}")
+    print("=" * 96)
+
+
+def print_comparison(report, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nCompared with {baseline_path} ({baseline.get('git_revision')})")
+    print(f"{'scenario':<28}{'req/s Δ':>12}{'p50 Δ':>12}{'p95 Δ':>12}{'p99 Δ':>12}")
+
+    def delta(new, old):
+        return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+    for name, result in report['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if not previous:
+            print(f"{name:<28}{'(new)':>12}")
+            continue
+        latency, old_latency = result['latency_ms'], previous['latency_ms']
+        print(f"{name:<28}{delta(result['throughput_rps'], previous['throughput_rps']):>12}"
+              f"{delta(latency['p50'], old_latency['p50']):>12}{delta(latency['p95'], old_latency['p95']):>12}"
+              f"{delta(latency['p99'], old_latency['p99']):>12}")
+
+
+async def run(args):
+    server = load_server(args)
+    import httpx
+
+    if args.skip_seed:
+        print("Reusing existing bench data")
+    else:
+        print(f"Seeding {args.db_name} at scale {args.scale}...")
+        started = time.perf_counter()
+        await seed(server, args.scale)
+        print(f"✓ Seeded in {time.perf_counter() - started:.1f}s")
+
+    # ASGITransport does not run lifespan events: build indexes as startup would, but
+    # leave the background workers (outbox, Stripe events, live event relay) off
+    try:
+        await server.ensure_indexes()
+    except Exception as e:
+        print(f"   Index build failed ({type(e).__name__}: {e}); continuing without indexes")
+    server.payment_gateway = OfflinePaymentGateway()
+
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        login = await client.post("/api/admin/login", json={"username": ADMIN_USERNAME, "password": ADMIN_PASSWORD})
+        if login.status_code != 200:
+            sys.exit(f"Bench admin login failed ({login.status_code}); rerun without --skip-seed")
+        admin_headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+        scenarios = await build_scenarios(server, client, admin_headers)
+        only = {name.strip() for name in args.only.split(",") if name.strip()}
+        results = {}
+        for scenario in scenarios:
+            if only and scenario[0] not in only:
+                continue
+            print(f"→ {scenario[0]}")
+            results[scenario[0]] = await run_scenario(client, scenario, args.requests, args.concurrency, args.warmup)
+
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "backend": "mongomock" if args.mongomock else "mongod",
+        "config": {"scale": args.scale, "requests": args.requests, "concurrency": args.concurrency,
+                   "warmup": args.warmup},
+        "dataset": await dataset_counts(server),
+        "scenarios": results,
+    }
+    server.client.close()
+    return report
+
+
+def main():
+    args = parse_args()
+    report = asyncio.run(run(args))
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+    print_summary(report)
+    if args.compare:
+        print_comparison(report, args.compare)
+    print(f"\nReport written to {args.output}")
+    failed = sum(result['errors'] for result in report['scenarios'].values())
+    sys.exit(0 if failed == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
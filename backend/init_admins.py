@@ -44,7 +44,7 @@ async def init_admins():
     
     admin1 = {
         "username": username1,
-        "password_hash": hash_password(password1),
+        "password_hash": await asyncio.to_thread(hash_password, password1),
     }
     
     # Admin 2
@@ -54,7 +54,7 @@ async def init_admins():
     
     admin2 = {
         "username": username2,
-        "password_hash": hash_password(password2),
+        "password_hash": await asyncio.to_thread(hash_password, password2),
     }
     
     # Insert admins
@@ -1,16 +1,33 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, UploadFile, File
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Query, status, UploadFile, File
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.encoders import jsonable_encoder
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+from pymongo import ReturnDocument, IndexModel, UpdateOne, CursorType, ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure, DuplicateKeyError, BulkWriteError, CollectionInvalid
 import os
+import json
+import hashlib
+import bisect
+import threading
+from contextlib import contextmanager
+import csv
+import io
+import html
+import base64
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
 import logging
 import asyncio
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional
+from pydantic import BaseModel, Field, ConfigDict, TypeAdapter
+from typing import Awaitable, Callable, List, Optional
+from contextvars import ContextVar
 import uuid
 from datetime import datetime, timezone, timedelta
 import jwt
@@ -20,6 +37,8 @@ import cloudinary
 import cloudinary.uploader
 import cloudinary.api
 import resend
+import stripe
+from resend.exceptions import ResendError
 from starlette.requests import Request as StarletteRequest
 from emergentintegrations.payments.stripe.checkout import StripeCheckout, CheckoutSessionResponse, CheckoutStatusResponse, CheckoutSessionRequest
 
@@ -27,9 +46,280 @@ from emergentintegrations.payments.stripe.checkout import StripeCheckout, Checko
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# ==================== METRICS ====================
+
+# Per-worker request, MongoDB and third-party call metrics in the Prometheus text
+# format, served at /metrics. Mongo commands are observed from pymongo's executor
+# threads, so every update takes _metrics_lock.
+METRICS_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_metrics_lock = threading.Lock()
+_metrics_registry = []
+
+
+def metric_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class CounterMetric:
+    def __init__(self, name: str, help_text: str, labels: tuple):
+        self.name, self.help_text, self.labels = name, help_text, labels
+        self.values = {}
+        _metrics_registry.append(self)
+
+    def inc(self, *label_values, amount: float = 1):
+        with _metrics_lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(self.values.items()):
+            labels = ",".join(f'{k}="{metric_label(v)}"' for k, v in zip(self.labels, label_values))
+            lines.append(f"{self.name}{{{labels}}} {value}")
+        return lines
+
+
+class HistogramMetric:
+    def __init__(self, name: str, help_text: str, labels: tuple, buckets: tuple = METRICS_LATENCY_BUCKETS):
+        self.name, self.help_text, self.labels, self.buckets = name, help_text, labels, buckets
+        self.values = {}  # label values -> [per-bucket counts (+Inf last), sum, count]
+        _metrics_registry.append(self)
+
+    def observe(self, seconds: float, *label_values):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with _metrics_lock:
+            state = self.values.get(label_values)
+            if state is None:
+                state = self.values[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += seconds
+            state[2] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_values, (counts, total, count) in sorted(self.values.items()):
+            labels = ",".join(f'{k}="{metric_label(v)}"' for k, v in zip(self.labels, label_values))
+            prefix = labels + "," if labels else ""
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total}")
+            lines.append(f"{self.name}_count{{{labels}}} {count}")
+        return lines
+
+
+def render_metrics() -> str:
+    with _metrics_lock:
+        lines = [line for metric in _metrics_registry for line in metric.render()]
+    return "\n".join(lines) + "\n"
+
+
+HTTP_REQUESTS = CounterMetric("http_requests_total", "HTTP requests by route template and status.", ("method", "route", "status"))
+HTTP_REQUEST_SECONDS = HistogramMetric("http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route"))
+MONGO_COMMAND_SECONDS = HistogramMetric("mongodb_command_duration_seconds", "MongoDB command latency.", ("collection", "command"))
+MONGO_COMMAND_FAILURES = CounterMetric("mongodb_command_failures_total", "Failed MongoDB commands.", ("collection", "command"))
+EXTERNAL_CALLS = CounterMetric("external_calls_total", "Calls to Resend, Stripe and Cloudinary.", ("service", "operation", "outcome"))
+EXTERNAL_CALL_SECONDS = HistogramMetric("external_call_duration_seconds", "Latency of calls to third-party services.", ("service", "operation"))
+
+
+@contextmanager
+def track_external_call(service: str, operation: str):
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        EXTERNAL_CALLS.inc(service, operation, outcome)
+        EXTERNAL_CALL_SECONDS.observe(time.perf_counter() - start, service, operation)
+
+
+# ==================== SLOW QUERY LOG ====================
+
+# Commands slower than SLOW_QUERY_THRESHOLD_MS are recorded with their shape (values
+# replaced by "?") in the capped perf_slow_queries collection, and a sampled share
+# also get an explain() of their query plan. Recording happens on the event loop,
+# off the command path; see GET /admin/perf/slow-queries.
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', '100'))
+SLOW_QUERY_EXPLAIN_RATE = float(os.environ.get('SLOW_QUERY_EXPLAIN_RATE', '0.1'))
+SLOW_QUERY_LOG_BYTES = 5 * 1024 * 1024
+# Our own writes, and tailing/await cursors that are slow by design
+SLOW_QUERY_IGNORED_COLLECTIONS = {"perf_slow_queries", "live_events", "content_versions"}
+SLOW_QUERY_IGNORED_COMMANDS = {"explain", "hello", "isMaster", "ping", "endSessions", "killCursors", "createIndexes"}
+EXPLAINABLE_COMMANDS = {"find", "aggregate", "count", "distinct", "findAndModify", "update", "delete"}
+COMMAND_SHAPE_FIELDS = ("filter", "query", "sort", "pipeline", "hint", "key", "updates", "deletes")
+
+
+def redact_shape(value):
+    if isinstance(value, dict):
+        return {key: redact_shape(item) for key, item in value.items()}
+    if isinstance(value, list):
+        if value and all(isinstance(item, dict) for item in value):
+            return [redact_shape(item) for item in value[:20]]
+        return ["?"]
+    return "?"
+
+
+def command_shape(command_name: str, command) -> dict:
+    shape = {}
+    for field in COMMAND_SHAPE_FIELDS:
+        if field not in command:
+            continue
+        value = command[field]
+        if field in ("updates", "deletes"):
+            value = [{"q": op.get("q", {})} for op in value[:1]]
+        shape[field] = value if field in ("sort", "hint") else redact_shape(value)
+    return shape
+
+
+def plan_summary(plan: dict) -> str:
+    """'FETCH > IXSCAN classes_1_active_1_notify_class_changes_1', 'COLLSCAN', ..."""
+    stages = []
+    while plan:
+        stage = plan.get("stage", "?")
+        if plan.get("indexName"):
+            stage += f" {plan['indexName']}"
+        stages.append(stage)
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0]
+    return " > ".join(stages)
+
+
+class SlowQueryLog:
+    def __init__(self):
+        self._loop = None
+        self._queue = None
+
+    def attach(self, loop):
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=1000)
+
+    def offer(self, record: dict):
+        """Called from pymongo's threads; hands the record to the event loop."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._enqueue, record)
+
+    def _enqueue(self, record: dict):
+        if not self._queue.full():
+            self._queue.put_nowait(record)
+
+    async def run(self):
+        try:
+            await db.create_collection("perf_slow_queries", capped=True, size=SLOW_QUERY_LOG_BYTES)
+        except CollectionInvalid:
+            pass
+        except Exception as e:
+            logging.error(f"Failed to create perf_slow_queries collection: {str(e)}")
+        while True:
+            record = await self._queue.get()
+            try:
+                await self.record(record)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Failed to record slow query: {str(e)}")
+
+    async def record(self, record: dict):
+        command = record.pop("command_doc")
+        doc = {
+            **record,
+            "shape": command_shape(record["command"], command),
+            "at": datetime.now(timezone.utc)
+        }
+        fingerprint_source = json.dumps([doc["database"], doc["collection"], doc["command"], doc["shape"]], sort_keys=True, default=str)
+        doc["fingerprint"] = hashlib.sha1(fingerprint_source.encode('utf-8')).hexdigest()[:16]
+        if record["command"] in EXPLAINABLE_COMMANDS and random.random() < SLOW_QUERY_EXPLAIN_RATE:
+            explained = {k: v for k, v in command.items() if not k.startswith("$") and k not in ("lsid", "txnNumber", "readConcern", "writeConcern")}
+            try:
+                result = await client[doc["database"]].command({"explain": explained, "verbosity": "queryPlanner"})
+                winning = result.get("queryPlanner", {}).get("winningPlan", {})
+                # Pipelines report the plan of their initial $cursor stage
+                if not winning and result.get("stages"):
+                    winning = result["stages"][0].get("$cursor", {}).get("queryPlanner", {}).get("winningPlan", {})
+                winning = winning.get("queryPlan", winning)
+                doc["plan"] = plan_summary(winning)
+                doc["winning_plan"] = winning
+            except Exception as e:
+                doc["plan_error"] = str(e)
+        await db.perf_slow_queries.insert_one(doc)
+
+
+slow_query_log = SlowQueryLog()
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Times every command the shared client sends, labeled by collection, and
+    passes commands over SLOW_QUERY_THRESHOLD_MS to the slow query log."""
+
+    def __init__(self):
+        self._started = {}
+
+    def started(self, event):
+        value = event.command.get(event.command_name)
+        # getMore/killCursors name the collection separately from the command value
+        collection = value if isinstance(value, str) else event.command.get("collection", "-")
+        self._started[(event.connection_id, event.request_id)] = (collection, event.command)
+
+    def _finish(self, event):
+        collection, command = self._started.pop((event.connection_id, event.request_id), ("-", None))
+        MONGO_COMMAND_SECONDS.observe(event.duration_micros / 1e6, collection, event.command_name)
+        duration_ms = event.duration_micros / 1000
+        if (duration_ms >= SLOW_QUERY_THRESHOLD_MS and command is not None
+                and collection not in SLOW_QUERY_IGNORED_COLLECTIONS
+                and event.command_name not in SLOW_QUERY_IGNORED_COMMANDS
+                # getMore with maxTimeMS is an awaitData/change-stream wait, not a slow query
+                and not (event.command_name == "getMore" and "maxTimeMS" in command)):
+            slow_query_log.offer({
+                "database": event.database_name,
+                "collection": collection,
+                "command": event.command_name,
+                "duration_ms": round(duration_ms, 1),
+                "failed": isinstance(event, monitoring.CommandFailedEvent),
+                "command_doc": command
+            })
+        return collection
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        collection = self._finish(event)
+        MONGO_COMMAND_FAILURES.inc(collection, event.command_name)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording count, status and latency per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the scope; unmatched paths share
+            # one label so random URLs can't blow up the series count
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            HTTP_REQUESTS.inc(scope["method"], route, str(status_code))
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, scope["method"], route)
+
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+mongo_command_listener = MongoCommandListener()
+client = AsyncIOMotorClient(mongo_url, tz_aware=True, event_listeners=[mongo_command_listener])
 db = client[os.environ['DB_NAME']]
 
 # Resend configuration
@@ -419,9 +709,74 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
 
+# bcrypt costs ~100-300 ms of CPU per call. Run it on a small dedicated pool so it
+# never blocks the event loop and a login burst can occupy at most this many cores.
+password_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('PASSWORD_HASH_WORKERS', '2')),
+    thread_name_prefix="bcrypt"
+)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await asyncio.get_running_loop().run_in_executor(
+        password_executor, verify_password, plain_password, hashed_password
+    )
+
+# Failed admin logins per (username, client IP) and per client IP, kept in Mongo so
+# every worker sees the same counts. The account key is scoped to the client so a
+# stranger guessing at "admin" can't lock the real admin out; the looser per-IP key
+# caps guessing across usernames. Once a key reaches its limit inside the window,
+# further attempts are refused with 429 before any bcrypt work is done. A TTL index
+# drops each key when its window lapses, so a burst of distinct keys stays bounded.
+LOGIN_FAILURE_LIMIT = int(os.environ.get('LOGIN_FAILURE_LIMIT', '5'))
+LOGIN_IP_FAILURE_LIMIT = int(os.environ.get('LOGIN_IP_FAILURE_LIMIT', '20'))
+LOGIN_FAILURE_WINDOW = int(os.environ.get('LOGIN_FAILURE_WINDOW', '900'))
+# Number of X-Forwarded-For entries appended by our own proxies (the ingress). The
+# client address is the one the outermost trusted proxy saw; anything further left
+# was supplied by the client and can't be used for throttling.
+TRUSTED_PROXY_HOPS = int(os.environ.get('TRUSTED_PROXY_HOPS', '1'))
+
+def client_ip(request: StarletteRequest) -> str:
+    hops = [hop.strip() for hop in request.headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+    if TRUSTED_PROXY_HOPS > 0 and len(hops) >= TRUSTED_PROXY_HOPS:
+        return hops[-TRUSTED_PROXY_HOPS]
+    return request.client.host if request.client else "unknown"
+
+def login_throttle_keys(username: str, request: StarletteRequest) -> dict:
+    """Throttle key -> failure limit for this login attempt."""
+    ip = client_ip(request)
+    return {f"user:{username.lower()}@{ip}": LOGIN_FAILURE_LIMIT, f"ip:{ip}": LOGIN_IP_FAILURE_LIMIT}
+
+async def login_retry_after(keys: dict) -> int:
+    """Seconds until the most throttled key may try again (0 if none is throttled)."""
+    since = datetime.now(timezone.utc) - timedelta(seconds=LOGIN_FAILURE_WINDOW)
+    retry_after = 0
+    async for entry in db.login_failures.find({"_id": {"$in": list(keys)}}):
+        limit = keys[entry['_id']]
+        recent = [at for at in entry.get('failures', []) if at > since][-limit:]
+        if len(recent) >= limit:
+            retry_after = max(retry_after, int((recent[0] - since).total_seconds()) + 1)
+    return retry_after
+
+async def record_login_failure(keys: dict):
+    now = datetime.now(timezone.utc)
+    await db.login_failures.bulk_write([
+        UpdateOne(
+            {"_id": key},
+            {
+                "$push": {"failures": {"$each": [now], "$slice": -limit}},
+                "$set": {"expires_at": now + timedelta(seconds=LOGIN_FAILURE_WINDOW)},
+            },
+            upsert=True
+        )
+        for key, limit in keys.items()
+    ], ordered=False)
+
+async def clear_login_failures(keys: dict):
+    await db.login_failures.delete_many({"_id": {"$in": list(keys)}})
+
 # Email notification helper
-async def send_notification_email(subject: str, html_content: str):
-    """Send email notification to the configured notification email"""
+async def send_notification_email(subject: str, html_content: str, idempotency_key: str = None):
+    """Queue an email notification to the configured notification email"""
     if not resend.api_key or resend.api_key == 're_your_api_key_here':
         logging.warning("Resend API key not configured, skipping email notification")
         return None
@@ -433,13 +788,626 @@ async def send_notification_email(subject: str, html_content: str):
             "subject": subject,
             "html": html_content
         }
-        email = await asyncio.to_thread(resend.Emails.send, params)
-        logging.info(f"Email notification sent: {email.get('id')}")
-        return email
+        return await enqueue_email(params, idempotency_key)
     except Exception as e:
-        logging.error(f"Failed to send email notification: {str(e)}")
+        logging.error(f"Failed to queue email notification: {str(e)}")
         return None
 
+class RateLimiter:
+    """Spaces calls out to at most `rate` per second across all coroutines sharing it."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = asyncio.get_running_loop().time()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+# Resend allows 2 API requests per second per team by default
+resend_rate_limiter = RateLimiter(float(os.environ.get('RESEND_RATE_LIMIT', '2')))
+
+
+# ==================== EMAIL OUTBOX ====================
+
+# Transactional emails are written to email_outbox and delivered by
+# run_email_outbox(), so they survive restarts and are retried on Resend 429/5xx.
+# idempotency_key is unique: queueing the same logical email twice is a no-op,
+# and the key is also passed to Resend so a retried send is never duplicated.
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.environ.get('EMAIL_OUTBOX_MAX_ATTEMPTS', '8'))
+EMAIL_OUTBOX_CONCURRENCY = int(os.environ.get('EMAIL_OUTBOX_CONCURRENCY', '2'))
+EMAIL_OUTBOX_POLL_INTERVAL = float(os.environ.get('EMAIL_OUTBOX_POLL_INTERVAL', '5'))
+EMAIL_OUTBOX_LEASE = timedelta(seconds=60)
+EMAIL_OUTBOX_MAX_BACKOFF = 3600
+EMAIL_OUTBOX_RETENTION_DAYS = int(os.environ.get('EMAIL_OUTBOX_RETENTION_DAYS', '90'))
+
+_outbox_wakeup = asyncio.Event()
+
+
+def outbox_message(params: dict, idempotency_key: str = None, group: str = None) -> dict:
+    now = datetime.now(timezone.utc)
+    message_id = str(uuid.uuid4())
+    message = {
+        "id": message_id,
+        "idempotency_key": idempotency_key or message_id,
+        "params": params,
+        "status": "pending",
+        "attempts": 0,
+        "next_attempt_at": now,
+        "created_at": now
+    }
+    if group:
+        # Lets a fan-out (e.g. one class-change notice) report its delivery progress
+        message["group"] = group
+    return message
+
+
+async def enqueue_email(params: dict, idempotency_key: str = None) -> bool:
+    """Queue one email. Returns False if idempotency_key was already queued."""
+    try:
+        await db.email_outbox.insert_one(outbox_message(params, idempotency_key))
+    except DuplicateKeyError:
+        return False
+    _outbox_wakeup.set()
+    return True
+
+
+async def enqueue_emails(messages: list, group: str = None) -> int:
+    """Queue many (params, idempotency_key) pairs in one round-trip. Returns how many were new."""
+    if not messages:
+        return 0
+    docs = [outbox_message(params, key, group) for params, key in messages]
+    try:
+        result = await db.email_outbox.insert_many(docs, ordered=False)
+        inserted = len(result.inserted_ids)
+    except BulkWriteError as e:
+        if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+            raise
+        inserted = e.details.get("nInserted", 0)
+    _outbox_wakeup.set()
+    return inserted
+
+
+def is_retryable_email_error(error: Exception) -> bool:
+    if isinstance(error, ResendError):
+        code = int(error.code) if str(error.code).isdigit() else 0
+        return code == 429 or code >= 500
+    # Network failures and timeouts
+    return True
+
+
+async def claim_outbox_message():
+    """Atomically take the next due message, or one whose sender's lease expired."""
+    now = datetime.now(timezone.utc)
+    return await db.email_outbox.find_one_and_update(
+        {"$or": [
+            {"status": "pending", "next_attempt_at": {"$lte": now}},
+            {"status": "sending", "locked_until": {"$lt": now}}
+        ]},
+        {"$set": {"status": "sending", "locked_until": now + EMAIL_OUTBOX_LEASE}, "$inc": {"attempts": 1}},
+        sort=[("next_attempt_at", ASCENDING)],
+        return_document=ReturnDocument.AFTER
+    )
+
+
+async def deliver_outbox_message(message: dict):
+    try:
+        await resend_rate_limiter.wait()
+        with track_external_call("resend", "emails.send"):
+            email = await asyncio.to_thread(
+                resend.Emails.send, message['params'], {"idempotency_key": message['idempotency_key']}
+            )
+        await db.email_outbox.update_one(
+            {"_id": message['_id']},
+            # The rendered body is only needed until delivery
+            {"$set": {"status": "sent", "sent_at": datetime.now(timezone.utc), "resend_id": email.get('id')},
+             "$unset": {"locked_until": "", "params.html": ""}}
+        )
+    except Exception as e:
+        attempts = message['attempts']
+        if is_retryable_email_error(e) and attempts < EMAIL_OUTBOX_MAX_ATTEMPTS:
+            # Exponential backoff with jitter: ~2s, 4s, 8s ... capped at an hour
+            delay = min(2 ** attempts, EMAIL_OUTBOX_MAX_BACKOFF) * random.uniform(0.8, 1.2)
+            update = {"status": "pending", "next_attempt_at": datetime.now(timezone.utc) + timedelta(seconds=delay)}
+            logging.warning(f"Email {message['id']} attempt {attempts} failed, retrying in {delay:.0f}s: {str(e)}")
+        else:
+            update = {"status": "failed"}
+            logging.error(f"Email {message['id']} failed permanently after {attempts} attempt(s): {str(e)}")
+        update["last_error"] = str(e)
+        await db.email_outbox.update_one({"_id": message['_id']}, {"$set": update, "$unset": {"locked_until": ""}})
+
+
+async def run_email_outbox():
+    while True:
+        try:
+            message = await claim_outbox_message()
+            if message is None:
+                _outbox_wakeup.clear()
+                try:
+                    await asyncio.wait_for(_outbox_wakeup.wait(), timeout=EMAIL_OUTBOX_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await deliver_outbox_message(message)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Email outbox worker error: {str(e)}")
+            await asyncio.sleep(EMAIL_OUTBOX_POLL_INTERVAL)
+
+
+# ==================== LIVE EVENTS ====================
+
+# In-process pub/sub behind the server-sent event streams. publish() hands the
+# encoded event to this worker's subscribers at once and appends it to the capped
+# live_events collection; every worker tails that collection (skipping its own
+# events) so clients connected to other workers are woken as well.
+WORKER_ID = str(uuid.uuid4())
+LIVE_EVENTS_CAP_BYTES = 1024 * 1024
+LIVE_EVENT_QUEUE_SIZE = 32
+SSE_HEARTBEAT_INTERVAL = float(os.environ.get('SSE_HEARTBEAT_INTERVAL', '15'))
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def sse_message(event: str, data, event_id: Optional[int] = None) -> bytes:
+    # The id lets a reconnecting EventSource send Last-Event-ID to resume from
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, default=str)}\n\n".encode('utf-8')
+
+
+class LiveEventHub:
+    """Topic -> subscriber queues. Each event is encoded once and the same bytes
+    are queued for every subscriber, so idle connections cost only a queue."""
+
+    def __init__(self):
+        self._subscribers = {}
+
+    def subscribe(self, topic: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=LIVE_EVENT_QUEUE_SIZE)
+        self._subscribers.setdefault(topic, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, topic: str, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(topic)
+        if subscribers is not None:
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[topic]
+
+    def dispatch(self, topic: str, message: bytes):
+        for queue in list(self._subscribers.get(topic, ())):
+            if queue.full():
+                # A stalled client drops its oldest event rather than holding up the rest
+                queue.get_nowait()
+            queue.put_nowait(message)
+
+    async def publish(self, topic: str, event: str, data):
+        try:
+            seq = await next_live_event_seq()
+        except Exception as e:
+            logging.error(f"Failed to number live event on {topic}: {str(e)}")
+            seq = None
+        message = sse_message(event, data, seq)
+        self.dispatch(topic, message)
+        if seq is None:
+            return
+        try:
+            await db.live_events.insert_one({
+                "seq": seq,
+                "topic": topic,
+                "message": message,
+                "worker": WORKER_ID,
+                "created_at": datetime.now(timezone.utc)
+            })
+        except Exception as e:
+            logging.error(f"Failed to relay live event on {topic}: {str(e)}")
+
+
+live_event_hub = LiveEventHub()
+
+
+async def next_live_event_seq() -> int:
+    """Cluster-wide increasing sequence number for live_events. ObjectIds only order
+    by second across processes, so they can't be used to resume the tail."""
+    counter = await db.counters.find_one_and_update(
+        {"_id": "live_events"}, {"$inc": {"seq": 1}}, upsert=True, return_document=ReturnDocument.AFTER
+    )
+    return counter['seq']
+
+
+async def ensure_live_events_collection():
+    """Create live_events as a capped collection before anything publishes to it
+    (an insert would auto-create it uncapped, and tailable cursors then fail)."""
+    try:
+        await db.create_collection("live_events", capped=True, size=LIVE_EVENTS_CAP_BYTES)
+    except CollectionInvalid:
+        pass
+    stats = await db.command("collStats", "live_events")
+    if not stats.get("capped"):
+        logging.warning("live_events is not capped; converting it")
+        await db.command("convertToCapped", "live_events", size=LIVE_EVENTS_CAP_BYTES)
+
+
+# A sequence number is taken before its insert, so after a reconnect the tail
+# re-reads this many events back and skips the ones already dispatched; an event
+# whose insert landed late behind a higher number is still picked up.
+LIVE_EVENT_REPLAY = 256
+
+
+async def relay_live_events():
+    """Tail live_events and dispatch other workers' events to local subscribers."""
+    try:
+        stats = await db.command("collStats", "live_events")
+    except Exception as e:
+        logging.critical(f"Live event relay disabled, live_events is unavailable: {str(e)}")
+        return
+    if not stats.get("capped"):
+        logging.critical("Live event relay disabled: live_events is not a capped collection")
+        return
+    last_seq = None
+    seen = {}
+    while True:
+        try:
+            if last_seq is None:
+                latest = await db.live_events.find_one({}, sort=[("$natural", -1)])
+                last_seq = latest.get('seq', 0) if latest else 0
+                query = {"seq": {"$gt": last_seq}}
+            else:
+                query = {"seq": {"$gt": last_seq - LIVE_EVENT_REPLAY}}
+            query["worker"] = {"$ne": WORKER_ID}
+            cursor = db.live_events.find(query, cursor_type=CursorType.TAILABLE_AWAIT)
+            # A tailable cursor on an empty capped collection dies at once; retry below
+            while cursor.alive:
+                async for doc in cursor:
+                    seq = doc.get('seq', 0)
+                    if seq in seen:
+                        continue
+                    seen[seq] = None
+                    if len(seen) > LIVE_EVENT_REPLAY * 2:
+                        del seen[next(iter(seen))]
+                    last_seq = max(last_seq, seq)
+                    live_event_hub.dispatch(doc['topic'], doc['message'])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Live event relay failed: {str(e)}")
+        await asyncio.sleep(1)
+
+
+async def next_live_message(request: StarletteRequest, queue: asyncio.Queue) -> Optional[bytes]:
+    """The next queued event, a keep-alive comment after SSE_HEARTBEAT_INTERVAL of
+    silence, or None once the client has gone away."""
+    try:
+        return await asyncio.wait_for(queue.get(), SSE_HEARTBEAT_INTERVAL)
+    except asyncio.TimeoutError:
+        if await request.is_disconnected():
+            return None
+        return b": keepalive\n\n"
+
+
+# ==================== PUBLIC RESPONSE CACHE ====================
+
+# Serialized JSON bodies for the public read endpoints. Each entry remembers the
+# collection versions it was built from; admin writes bump those versions, so a
+# stale entry is simply never served again and gets rebuilt on the next read.
+#
+# Versions live in the content_versions collection ({_id: collection, version})
+# so every worker agrees on them. _content_versions is this worker's mirror,
+# kept current by watch_content_versions().
+_public_cache = {}
+_content_versions = {}
+_list_adapters = {}
+
+CONTENT_SYNC_INTERVAL = float(os.environ.get('CONTENT_SYNC_INTERVAL', '2'))
+
+
+def content_version(*collections) -> tuple:
+    return tuple(_content_versions.get(c, 0) for c in collections)
+
+
+CONTENT_VERSION_RETRIES = 3
+CONTENT_VERSION_RETRY_MAX_DELAY = 30
+
+# Set on responses whose write is saved but whose cache bump is still being retried
+CACHE_REFRESH_HEADER = "X-Cache-Refresh"
+_cache_refresh_pending: ContextVar[Optional[list]] = ContextVar("cache_refresh_pending", default=None)
+
+
+async def bump_content_version(collection: str):
+    doc = await db.content_versions.find_one_and_update(
+        {"_id": collection},
+        {"$inc": {"version": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    _content_versions[collection] = doc['version']
+
+
+async def run_after_bump(then: Optional[Callable[[], Awaitable]]):
+    if then is None:
+        return
+    try:
+        await then()
+    except Exception as e:
+        logging.error(f"Post-publish step failed: {str(e)}")
+
+
+async def retry_content_version_bump(collections: list, then: Optional[Callable[[], Awaitable]]):
+    """Keep bumping until every collection lands, then run the deferred side effects."""
+    delay = 0.5
+    while collections:
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, CONTENT_VERSION_RETRY_MAX_DELAY)
+        for collection in list(collections):
+            try:
+                await bump_content_version(collection)
+                collections.remove(collection)
+            except Exception as e:
+                logging.warning(f"Retrying content version bump for {collection}: {str(e)}")
+    logging.info("Deferred content version bump landed")
+    await run_after_bump(then)
+
+
+async def invalidate_public_cache(*collections, then: Optional[Callable[[], Awaitable]] = None) -> bool:
+    """Drop cached public responses built from any of the given collections, on every worker.
+
+    `then` holds the write's side effects (live events, notifications) and runs only
+    once every version is bumped. The write is already committed, so a bump that
+    still fails after retrying doesn't fail the request: the response gets
+    X-Cache-Refresh: pending and a background task keeps retrying before running
+    `then`. Returns whether the bump landed now.
+    """
+    failed = []
+    for collection in collections:
+        for attempt in range(CONTENT_VERSION_RETRIES):
+            try:
+                await bump_content_version(collection)
+                break
+            except Exception as e:
+                if attempt + 1 < CONTENT_VERSION_RETRIES:
+                    await asyncio.sleep(0.1 * 2 ** attempt)
+                    continue
+                logging.error(f"Failed to bump content version for {collection}: {str(e)}")
+                # At least this worker stops serving the old content
+                _content_versions[collection] = _content_versions.get(collection, 0) + 1
+                failed.append(collection)
+    if not failed:
+        await run_after_bump(then)
+        return True
+    pending = _cache_refresh_pending.get()
+    if pending is not None:
+        pending.extend(failed)
+    task = asyncio.create_task(retry_content_version_bump(failed, then))
+    background_tasks.append(task)
+    task.add_done_callback(background_tasks.remove)
+    return False
+
+
+class CacheRefreshMiddleware:
+    """Pure ASGI middleware flagging responses whose cache bump is still pending."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        # A list rather than a flag: the handler may run in a copied context
+        # (BaseHTTPMiddleware), where only mutations of shared objects show up here
+        pending = []
+        _cache_refresh_pending.set(pending)
+
+        async def send_with_warning(message):
+            if message["type"] == "http.response.start" and pending:
+                message["headers"] = list(message.get("headers", [])) + [
+                    (CACHE_REFRESH_HEADER.lower().encode(), b"pending")
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_warning)
+
+
+async def sync_content_versions():
+    async for doc in db.content_versions.find({}):
+        _content_versions[doc['_id']] = doc['version']
+
+
+async def poll_content_versions():
+    while True:
+        try:
+            await sync_content_versions()
+        except Exception as e:
+            logging.error(f"Content version poll failed: {str(e)}")
+        await asyncio.sleep(CONTENT_SYNC_INTERVAL)
+
+
+async def watch_content_versions():
+    """Keep _content_versions in step with other workers' admin writes.
+
+    Uses a change stream on content_versions when the server is a replica set,
+    otherwise polls the collection every CONTENT_SYNC_INTERVAL seconds.
+    """
+    while True:
+        try:
+            async with db.content_versions.watch(full_document="updateLookup") as stream:
+                # Sync after the stream is open so nothing written in between is missed
+                await sync_content_versions()
+                async for change in stream:
+                    doc = change.get("fullDocument")
+                    if doc:
+                        _content_versions[doc['_id']] = doc['version']
+        except OperationFailure as e:
+            # 40573: change streams need a replica set (e.g. a standalone dev mongod)
+            if e.code == 40573:
+                logging.info("Change streams unavailable, polling content_versions instead")
+                await poll_content_versions()
+                return
+            logging.error(f"Content version change stream failed: {str(e)}")
+        except Exception as e:
+            logging.error(f"Content version change stream failed: {str(e)}")
+        await asyncio.sleep(CONTENT_SYNC_INTERVAL)
+
+
+def list_adapter(model):
+    if model not in _list_adapters:
+        _list_adapters[model] = TypeAdapter(List[model])
+    return _list_adapters[model]
+
+
+async def load_public_list(collection: str, model, query: dict = None, sort: str = "displayOrder") -> bytes:
+    """Read a collection and serialize it exactly as response_model=List[model] would."""
+    cursor = db[collection].find(query or {}, {"_id": 0})
+    if sort:
+        cursor = cursor.sort(sort, 1)
+    docs = await cursor.to_list(1000)
+    adapter = list_adapter(model)
+    return adapter.dump_json(adapter.validate_python(docs))
+
+
+# Public responses may be stored by browsers and the CDN but must be revalidated;
+# the ETag makes that revalidation a 304 with no body and no Mongo round-trip.
+PUBLIC_CACHE_CONTROL = "public, no-cache"
+
+
+# Part of every ETag, so a deploy that changes a response shape never revalidates
+# to a 304 on the previous build's body even though the content versions match.
+# BUILD_ID is set by the deploy; otherwise the server source itself identifies the build.
+PUBLIC_SCHEMA_VERSION = 1
+BUILD_ID = os.environ.get('BUILD_ID') or hashlib.sha1(Path(__file__).read_bytes()).hexdigest()[:12]
+
+
+def content_etag(key: str, version: tuple) -> str:
+    return '"%s-%s-%s.%s"' % (BUILD_ID, PUBLIC_SCHEMA_VERSION, key, ".".join(str(v) for v in version))
+
+
+def etag_matches(request: StarletteRequest, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+async def cached_public_response(request: StarletteRequest, key: str, collections: tuple, loader):
+    """Serve key from the cache, calling loader() for fresh bytes when it is stale.
+
+    Responses carry an ETag derived from the collection versions, and a matching
+    If-None-Match is answered with 304 before the cache or Mongo is consulted.
+    """
+    version = content_version(*collections)
+    headers = {"ETag": content_etag(key, version), "Cache-Control": PUBLIC_CACHE_CONTROL}
+    if etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    body = await cached_public_body(key, collections, loader)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def cached_public_body(key: str, collections: tuple, loader) -> bytes:
+    # Capture the version before loading so a write that lands mid-load leaves
+    # the entry marked stale instead of caching pre-write data as current.
+    version = content_version(*collections)
+    entry = _public_cache.get(key)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+    body = await loader()
+    _public_cache[key] = (version, body)
+    return body
+
+
+async def load_public_site_settings() -> bytes:
+    settings = await db.site_settings.find({}, {"_id": 0, "settingKey": 1, "settingValue": 1}).to_list(1000)
+    settings_dict = {}
+    for setting in settings:
+        settings_dict[setting['settingKey']] = setting['settingValue']
+    return json.dumps(settings_dict).encode('utf-8')
+
+
+# Public sections by name: (collections the body depends on, loader). Used by the
+# individual public endpoints and composed by /api/bundle.
+PUBLIC_SECTIONS = {
+    "site-settings": (("site_settings",), load_public_site_settings),
+    "events": (("events",), lambda: load_public_list("events", EventModel)),
+    "past-events": (("past_events",), lambda: load_public_list("past_events", PastEventModel)),
+    "coaches": (("coaches",), lambda: load_public_list("coaches", CoachModel)),
+    "testimonials": (("testimonials",), lambda: load_public_list("testimonials", TestimonialModel)),
+    "success-stories": (("success_stories",), lambda: load_public_list("success_stories", SuccessStoryModel)),
+    "endorsements": (("endorsements",), lambda: load_public_list("endorsements", EndorsementModel)),
+    "faqs": (("faqs",), lambda: load_public_list("faqs", FAQModel)),
+    "tips": (("tips",), lambda: load_public_list("tips", TipModel)),
+    "media": (("media",), lambda: load_public_list("media", MediaModel)),
+    "classes": (("classes",), lambda: load_public_list("classes", ClassScheduleModel, sort=None)),
+    "cancelled-classes": (("cancelled_classes",), lambda: load_public_list("cancelled_classes", CancelledClassModel, sort=None)),
+    "products": (("products",), lambda: load_public_products()),
+}
+
+
+# Every collection behind a public response. Anything that writes to one outside
+# the admin handlers (migrations, seeding scripts) must call invalidate_public_cache.
+PUBLIC_COLLECTIONS = {collection for collections, _ in PUBLIC_SECTIONS.values() for collection in collections}
+
+
+async def public_section_response(request: StarletteRequest, section: str):
+    collections, loader = PUBLIC_SECTIONS[section]
+    return await cached_public_response(request, section, collections, loader)
+
+
+# ==================== KEYSET PAGINATION ====================
+
+# Admin list endpoints page with ?after=<cursor>&limit=N, sorted on (sort key, id)
+# so the compound indexes serve every page. The cursor for the next page is
+# returned in the X-Next-Cursor header, leaving the response body a plain list.
+# The admin pages load ADMIN_PAGE_SIZE rows at a time and follow the cursor on
+# "Load more"; exports and /admin/counts cover the whole collection.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+ADMIN_PAGE_SIZE = int(os.environ.get('ADMIN_PAGE_SIZE', '100'))
+
+
+def encode_cursor(value, doc_id: str) -> str:
+    if isinstance(value, datetime):
+        payload = {"d": value.isoformat(), "id": doc_id}
+    else:
+        payload = {"v": value, "id": doc_id}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii').rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        value = datetime.fromisoformat(payload["d"]) if "d" in payload else payload["v"]
+        return value, payload["id"]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def keyset_page(collection: str, sort_key: str, direction: int, after: Optional[str], limit: int, query: dict = None):
+    """One page of collection ordered by (sort_key, id), plus the cursor for the next page (or None)."""
+    query = dict(query or {})
+    if after:
+        value, doc_id = decode_cursor(after)
+        op = "$gt" if direction == ASCENDING else "$lt"
+        query["$or"] = [{sort_key: {op: value}}, {sort_key: value, "id": {op: doc_id}}]
+    docs = await db[collection].find(query, {"_id": 0}).sort(
+        [(sort_key, direction), ("id", direction)]
+    ).to_list(limit + 1)
+    if len(docs) <= limit:
+        return docs, None
+    docs = docs[:limit]
+    return docs, encode_cursor(docs[-1].get(sort_key), docs[-1]["id"])
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]):
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+
 # Add your routes to the router instead of directly to app
 @api_router.get("/")
 async def root():
@@ -450,10 +1418,7 @@ async def create_status_check(input: StatusCheckCreate):
     status_dict = input.model_dump()
     status_obj = StatusCheck(**status_dict)
     
-    # Convert to dict and serialize datetime to ISO string for MongoDB
     doc = status_obj.model_dump()
-    doc['timestamp'] = doc['timestamp'].isoformat()
-    
     _ = await db.status_checks.insert_one(doc)
     return status_obj
 
@@ -461,31 +1426,18 @@ async def create_status_check(input: StatusCheckCreate):
 async def get_status_checks():
     # Exclude MongoDB's _id field from the query results
     status_checks = await db.status_checks.find({}, {"_id": 0}).to_list(1000)
-    
-    # Convert ISO string timestamps back to datetime objects
-    for check in status_checks:
-        if isinstance(check['timestamp'], str):
-            check['timestamp'] = datetime.fromisoformat(check['timestamp'])
-    
     return status_checks
 
 # Classes Endpoints (Public - fetches from database)
 @api_router.get("/classes", response_model=List[ClassScheduleModel])
-async def get_classes():
-    classes = await db.classes.find({}, {"_id": 0}).to_list(1000)
-    for class_item in classes:
-        if isinstance(class_item.get('created_at'), str):
-            class_item['created_at'] = datetime.fromisoformat(class_item['created_at'])
-    return classes
+async def get_classes(request: StarletteRequest):
+    return await public_section_response(request, "classes")
 
 # Bookings Endpoints
 @api_router.post("/bookings", response_model=Booking)
 async def create_booking(booking_data: BookingCreate):
     booking = Booking(**booking_data.model_dump())
-    
-    # Convert to dict and serialize datetime to ISO string for MongoDB
     doc = booking.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
     
     try:
         await db.bookings.insert_one(doc)
@@ -496,24 +1448,16 @@ async def create_booking(booking_data: BookingCreate):
     return booking
 
 @api_router.get("/bookings", response_model=List[Booking])
-async def get_bookings():
-    bookings = await db.bookings.find({}, {"_id": 0}).to_list(1000)
-    
-    # Convert ISO string timestamps back to datetime objects
-    for booking in bookings:
-        if isinstance(booking.get('created_at'), str):
-            booking['created_at'] = datetime.fromisoformat(booking['created_at'])
-    
+async def get_bookings(response: Response, after: Optional[str] = None, limit: int = Query(1000, ge=1, le=10000)):
+    bookings, next_cursor = await keyset_page("bookings", "created_at", DESCENDING, after, limit)
+    set_next_cursor(response, next_cursor)
     return bookings
 
 # Contact Form Endpoints
 @api_router.post("/contact", response_model=ContactMessage)
 async def submit_contact(contact_data: ContactCreate):
     contact = ContactMessage(**contact_data.model_dump())
-    
-    # Convert to dict and serialize datetime to ISO string for MongoDB
     doc = contact.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
     
     try:
         await db.contacts.insert_one(doc)
@@ -556,7 +1500,8 @@ async def submit_contact(contact_data: ContactCreate):
         """
         await send_notification_email(
             f"TC Pro Dojo Contact: {contact.subject}",
-            email_html
+            email_html,
+            idempotency_key=f"contact:{contact.id}"
         )
     except Exception as e:
         logger.error(f"Error submitting contact form: {e}")
@@ -564,14 +1509,9 @@ async def submit_contact(contact_data: ContactCreate):
     return contact
 
 @api_router.get("/contacts", response_model=List[ContactMessage])
-async def get_contacts():
-    contacts = await db.contacts.find({}, {"_id": 0}).to_list(1000)
-    
-    # Convert ISO string timestamps back to datetime objects
-    for contact in contacts:
-        if isinstance(contact.get('created_at'), str):
-            contact['created_at'] = datetime.fromisoformat(contact['created_at'])
-    
+async def get_contacts(response: Response, after: Optional[str] = None, limit: int = Query(1000, ge=1, le=10000)):
+    contacts, next_cursor = await keyset_page("contacts", "created_at", DESCENDING, after, limit)
+    set_next_cursor(response, next_cursor)
     return contacts
 
 
@@ -579,16 +1519,47 @@ async def get_contacts():
 
 # Admin Authentication
 @api_router.post("/admin/login", response_model=Token)
-async def admin_login(login_data: AdminLogin):
+async def admin_login(login_data: AdminLogin, request: StarletteRequest):
+    throttle_keys = login_throttle_keys(login_data.username, request)
+    retry_after = await login_retry_after(throttle_keys)
+    if retry_after:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many failed login attempts. Please try again later.",
+            headers={"Retry-After": str(retry_after)}
+        )
+    
     # Check if user exists
     admin = await db.admins.find_one({"username": login_data.username}, {"_id": 0})
     
-    if not admin or not verify_password(login_data.password, admin['password_hash']):
+    if not admin or not await verify_password_async(login_data.password, admin['password_hash']):
+        await record_login_failure(throttle_keys)
         raise HTTPException(status_code=401, detail="Incorrect username or password")
     
+    await clear_login_failures(throttle_keys)
     access_token = create_access_token(data={"sub": login_data.username})
     return {"access_token": access_token, "token_type": "bearer"}
 
+@api_router.get("/admin/counts")
+async def get_admin_counts(username: str = Depends(verify_token)):
+    """Totals for the dashboard and the paged admin lists, which only hold one page."""
+    now = datetime.now(timezone.utc)
+    (students, active_students, notify_students, subscribers,
+     subscribers_week, subscribers_month, contacts) = await asyncio.gather(
+        db.students.count_documents({}),
+        db.students.count_documents({"active": True}),
+        db.students.count_documents({"active": True, "notify_class_changes": True}),
+        db.newsletter_subscriptions.count_documents({}),
+        db.newsletter_subscriptions.count_documents({"subscribed_at": {"$gt": now - timedelta(days=7)}}),
+        db.newsletter_subscriptions.count_documents({"subscribed_at": {"$gt": now - timedelta(days=30)}}),
+        db.contacts.count_documents({})
+    )
+    return {
+        "students": {"total": students, "active": active_students, "notify": notify_students},
+        "newsletter": {"total": subscribers, "last_7_days": subscribers_week, "last_30_days": subscribers_month},
+        "contacts": contacts
+    }
+
 @api_router.get("/admin/verify")
 async def verify_admin(username: str = Depends(verify_token)):
     return {"username": username, "authenticated": True}
@@ -597,23 +1568,20 @@ async def verify_admin(username: str = Depends(verify_token)):
 @api_router.get("/admin/events", response_model=List[EventModel])
 async def get_admin_events(username: str = Depends(verify_token)):
     events = await db.events.find({}, {"_id": 0}).sort("displayOrder", 1).to_list(1000)
-    for event in events:
-        if isinstance(event.get('created_at'), str):
-            event['created_at'] = datetime.fromisoformat(event['created_at'])
     return events
 
 @api_router.post("/admin/events", response_model=EventModel)
 async def create_event(event: EventModel, username: str = Depends(verify_token)):
     doc = event.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
     await db.events.insert_one(doc)
+    await invalidate_public_cache("events")
     return event
 
 @api_router.put("/admin/events/{event_id}", response_model=EventModel)
 async def update_event(event_id: str, event: EventModel, username: str = Depends(verify_token)):
     doc = event.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
     await db.events.update_one({"id": event_id}, {"$set": doc})
+    await invalidate_public_cache("events")
     return event
 
 @api_router.delete("/admin/events/{event_id}")
@@ -621,30 +1589,28 @@ async def delete_event(event_id: str, username: str = Depends(verify_token)):
     result = await db.events.delete_one({"id": event_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Event not found")
+    await invalidate_public_cache("events")
     return {"message": "Event deleted successfully"}
 
 # Admin Past Events Management
 @api_router.get("/admin/past-events", response_model=List[PastEventModel])
 async def get_admin_past_events(username: str = Depends(verify_token)):
     past_events = await db.past_events.find({}, {"_id": 0}).sort("displayOrder", 1).to_list(1000)
-    for event in past_events:
-        if isinstance(event.get('created_at'), str):
-            event['created_at'] = datetime.fromisoformat(event['created_at'])
     return past_events
 
 @api_router.post("/admin/past-events", response_model=PastEventModel)
 async def create_past_event(past_event: PastEventModel, username: str = Depends(verify_token)):
     doc = past_event.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
     await db.past_events.insert_one(doc)
+    await invalidate_public_cache("past_events")
     return past_event
 
 @api_router.put("/admin/past-events/{event_id}", response_model=PastEventModel)
 async def update_past_event(event_id: str, past_event: PastEventModel, username: str = Depends(verify_token)):
     doc = past_event.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    doc['updated_at'] = datetime.now(timezone.utc).isoformat()
+    doc['updated_at'] = datetime.now(timezone.utc)
     await db.past_events.update_one({"id": event_id}, {"$set": doc})
+    await invalidate_public_cache("past_events")
     return past_event
 
 @api_router.delete("/admin/past-events/{event_id}")
@@ -652,29 +1618,27 @@ async def delete_past_event(event_id: str, username: str = Depends(verify_token)
     result = await db.past_events.delete_one({"id": event_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Past event not found")
+    await invalidate_public_cache("past_events")
     return {"message": "Past event deleted successfully"}
 
 # Admin Testimonial Management
 @api_router.get("/admin/testimonials", response_model=List[TestimonialModel])
 async def get_admin_testimonials(username: str = Depends(verify_token)):
     testimonials = await db.testimonials.find({}, {"_id": 0}).sort("displayOrder", 1).to_list(1000)
-    for testimonial in testimonials:
-        if isinstance(testimonial.get('created_at'), str):
-            testimonial['created_at'] = datetime.fromisoformat(testimonial['created_at'])
     return testimonials
 
 @api_router.post("/admin/testimonials", response_model=TestimonialModel)
 async def create_testimonial(testimonial: TestimonialModel, username: str = Depends(verify_token)):
     doc = testimonial.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
     await db.testimonials.insert_one(doc)
+    await invalidate_public_cache("testimonials")
     return testimonial
 
 @api_router.put("/admin/testimonials/{testimonial_id}", response_model=TestimonialModel)
 async def update_testimonial(testimonial_id: str, testimonial: TestimonialModel, username: str = Depends(verify_token)):
     doc = testimonial.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
     await db.testimonials.update_one({"id": testimonial_id}, {"$set": doc})
+    await invalidate_public_cache("testimonials")
     return testimonial
 
 @api_router.delete("/admin/testimonials/{testimonial_id}")
@@ -682,30 +1646,28 @@ async def delete_testimonial(testimonial_id: str, username: str = Depends(verify
     result = await db.testimonials.delete_one({"id": testimonial_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Testimonial not found")
+    await invalidate_public_cache("testimonials")
     return {"message": "Testimonial deleted successfully"}
 
 # Admin Coaches Management
 @api_router.get("/admin/coaches", response_model=List[CoachModel])
 async def get_admin_coaches(username: str = Depends(verify_token)):
     coaches = await db.coaches.find({}, {"_id": 0}).sort("displayOrder", 1).to_list(1000)
-    for coach in coaches:
-        if isinstance(coach.get('created_at'), str):
-            coach['created_at'] = datetime.fromisoformat(coach['created_at'])
     return coaches
 
 @api_router.post("/admin/coaches", response_model=CoachModel)
 async def create_coach(coach: CoachModel, username: str = Depends(verify_token)):
     doc = coach.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
     await db.coaches.insert_one(doc)
+    await invalidate_public_cache("coaches")
     return coach
 
 @api_router.put("/admin/coaches/{coach_id}", response_model=CoachModel)
 async def update_coach(coach_id: str, coach: CoachModel, username: str = Depends(verify_token)):
     doc = coach.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    doc['updated_at'] = datetime.now(timezone.utc).isoformat()
+    doc['updated_at'] = datetime.now(timezone.utc)
     await db.coaches.update_one({"id": coach_id}, {"$set": doc})
+    await invalidate_public_cache("coaches")
     return coach
 
 @api_router.delete("/admin/coaches/{coach_id}")
@@ -713,30 +1675,28 @@ async def delete_coach(coach_id: str, username: str = Depends(verify_token)):
     result = await db.coaches.delete_one({"id": coach_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Coach not found")
+    await invalidate_public_cache("coaches")
     return {"message": "Coach deleted successfully"}
 
 # Admin Success Stories Management
 @api_router.get("/admin/success-stories", response_model=List[SuccessStoryModel])
 async def get_admin_success_stories(username: str = Depends(verify_token)):
     stories = await db.success_stories.find({}, {"_id": 0}).sort("displayOrder", 1).to_list(1000)
-    for story in stories:
-        if isinstance(story.get('created_at'), str):
-            story['created_at'] = datetime.fromisoformat(story['created_at'])
     return stories
 
 @api_router.post("/admin/success-stories", response_model=SuccessStoryModel)
 async def create_success_story(story: SuccessStoryModel, username: str = Depends(verify_token)):
     doc = story.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
     await db.success_stories.insert_one(doc)
+    await invalidate_public_cache("success_stories")
     return story
 
 @api_router.put("/admin/success-stories/{story_id}", response_model=SuccessStoryModel)
 async def update_success_story(story_id: str, story: SuccessStoryModel, username: str = Depends(verify_token)):
     doc = story.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    doc['updated_at'] = datetime.now(timezone.utc).isoformat()
+    doc['updated_at'] = datetime.now(timezone.utc)
     await db.success_stories.update_one({"id": story_id}, {"$set": doc})
+    await invalidate_public_cache("success_stories")
     return story
 
 @api_router.delete("/admin/success-stories/{story_id}")
@@ -744,30 +1704,28 @@ async def delete_success_story(story_id: str, username: str = Depends(verify_tok
     result = await db.success_stories.delete_one({"id": story_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Success story not found")
+    await invalidate_public_cache("success_stories")
     return {"message": "Success story deleted successfully"}
 
 # Admin Endorsements Management
 @api_router.get("/admin/endorsements", response_model=List[EndorsementModel])
 async def get_admin_endorsements(username: str = Depends(verify_token)):
     endorsements = await db.endorsements.find({}, {"_id": 0}).sort("displayOrder", 1).to_list(1000)
-    for endorsement in endorsements:
-        if isinstance(endorsement.get('created_at'), str):
-            endorsement['created_at'] = datetime.fromisoformat(endorsement['created_at'])
     return endorsements
 
 @api_router.post("/admin/endorsements", response_model=EndorsementModel)
 async def create_endorsement(endorsement: EndorsementModel, username: str = Depends(verify_token)):
     doc = endorsement.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
     await db.endorsements.insert_one(doc)
+    await invalidate_public_cache("endorsements")
     return endorsement
 
 @api_router.put("/admin/endorsements/{endorsement_id}", response_model=EndorsementModel)
 async def update_endorsement(endorsement_id: str, endorsement: EndorsementModel, username: str = Depends(verify_token)):
     doc = endorsement.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    doc['updated_at'] = datetime.now(timezone.utc).isoformat()
+    doc['updated_at'] = datetime.now(timezone.utc)
     await db.endorsements.update_one({"id": endorsement_id}, {"$set": doc})
+    await invalidate_public_cache("endorsements")
     return endorsement
 
 @api_router.delete("/admin/endorsements/{endorsement_id}")
@@ -775,22 +1733,18 @@ async def delete_endorsement(endorsement_id: str, username: str = Depends(verify
     result = await db.endorsements.delete_one({"id": endorsement_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Endorsement not found")
+    await invalidate_public_cache("endorsements")
     return {"message": "Endorsement deleted successfully"}
 
 # Admin Tips Management
 @api_router.get("/admin/tips", response_model=List[TipModel])
 async def get_admin_tips(username: str = Depends(verify_token)):
     tips = await db.tips.find({}, {"_id": 0}).sort("displayOrder", 1).to_list(1000)
-    for tip in tips:
-        if isinstance(tip.get('created_at'), str):
-            tip['created_at'] = datetime.fromisoformat(tip['created_at'])
     return tips
 
 @api_router.post("/admin/tips", response_model=TipModel)
 async def create_tip(tip: TipModel, username: str = Depends(verify_token)):
     tip_dict = tip.model_dump()
-    if isinstance(tip_dict.get('created_at'), datetime):
-        tip_dict['created_at'] = tip_dict['created_at'].isoformat()
     
     # Convert YouTube URL to embed format
     if tip_dict.get('videoUrl'):
@@ -803,13 +1757,12 @@ async def create_tip(tip: TipModel, username: str = Depends(verify_token)):
             tip_dict['videoUrl'] = f'https://www.youtube.com/embed/{video_id}'
     
     await db.tips.insert_one(tip_dict)
+    await invalidate_public_cache("tips")
     return tip
 
 @api_router.put("/admin/tips/{tip_id}", response_model=TipModel)
 async def update_tip(tip_id: str, tip: TipModel, username: str = Depends(verify_token)):
     tip_dict = tip.model_dump()
-    if isinstance(tip_dict.get('created_at'), datetime):
-        tip_dict['created_at'] = tip_dict['created_at'].isoformat()
     
     # Convert YouTube URL to embed format
     if tip_dict.get('videoUrl'):
@@ -824,6 +1777,7 @@ async def update_tip(tip_id: str, tip: TipModel, username: str = Depends(verify_
     result = await db.tips.update_one({"id": tip_id}, {"$set": tip_dict})
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Tip not found")
+    await invalidate_public_cache("tips")
     return tip
 
 @api_router.delete("/admin/tips/{tip_id}")
@@ -831,29 +1785,27 @@ async def delete_tip(tip_id: str, username: str = Depends(verify_token)):
     result = await db.tips.delete_one({"id": tip_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Tip not found")
+    await invalidate_public_cache("tips")
     return {"message": "Tip deleted successfully"}
 
 # Admin FAQ Management
 @api_router.get("/admin/faqs", response_model=List[FAQModel])
 async def get_admin_faqs(username: str = Depends(verify_token)):
     faqs = await db.faqs.find({}, {"_id": 0}).sort("displayOrder", 1).to_list(1000)
-    for faq in faqs:
-        if isinstance(faq.get('created_at'), str):
-            faq['created_at'] = datetime.fromisoformat(faq['created_at'])
     return faqs
 
 @api_router.post("/admin/faqs", response_model=FAQModel)
 async def create_faq(faq: FAQModel, username: str = Depends(verify_token)):
     doc = faq.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
     await db.faqs.insert_one(doc)
+    await invalidate_public_cache("faqs")
     return faq
 
 @api_router.put("/admin/faqs/{faq_id}", response_model=FAQModel)
 async def update_faq(faq_id: str, faq: FAQModel, username: str = Depends(verify_token)):
     doc = faq.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
     await db.faqs.update_one({"id": faq_id}, {"$set": doc})
+    await invalidate_public_cache("faqs")
     return faq
 
 @api_router.delete("/admin/faqs/{faq_id}")
@@ -861,33 +1813,33 @@ async def delete_faq(faq_id: str, username: str = Depends(verify_token)):
     result = await db.faqs.delete_one({"id": faq_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="FAQ not found")
+    await invalidate_public_cache("faqs")
     return {"message": "FAQ deleted successfully"}
 
 # Admin Class Schedule Management
 @api_router.get("/admin/classes", response_model=List[ClassScheduleModel])
 async def get_admin_classes(username: str = Depends(verify_token)):
     classes = await db.classes.find({}, {"_id": 0}).to_list(1000)
-    for class_item in classes:
-        if isinstance(class_item.get('created_at'), str):
-            class_item['created_at'] = datetime.fromisoformat(class_item['created_at'])
     return classes
 
 @api_router.post("/admin/classes", response_model=ClassScheduleModel)
 async def create_class(class_item: ClassScheduleModel, username: str = Depends(verify_token)):
     class_dict = class_item.model_dump()
-    if isinstance(class_dict.get('created_at'), datetime):
-        class_dict['created_at'] = class_dict['created_at'].isoformat()
     await db.classes.insert_one(class_dict)
+    await invalidate_public_cache("classes", then=lambda: publish_schedule_change(
+        {"type": "class", "action": "created", "class_id": class_item.id}
+    ))
     return class_item
 
 @api_router.put("/admin/classes/{class_id}", response_model=ClassScheduleModel)
 async def update_class(class_id: str, class_item: ClassScheduleModel, username: str = Depends(verify_token)):
     class_dict = class_item.model_dump()
-    if isinstance(class_dict.get('created_at'), datetime):
-        class_dict['created_at'] = class_dict['created_at'].isoformat()
     result = await db.classes.update_one({"id": class_id}, {"$set": class_dict})
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Class not found")
+    await invalidate_public_cache("classes", then=lambda: publish_schedule_change(
+        {"type": "class", "action": "updated", "class_id": class_id}
+    ))
     return class_item
 
 @api_router.delete("/admin/classes/{class_id}")
@@ -895,44 +1847,129 @@ async def delete_class(class_id: str, username: str = Depends(verify_token)):
     result = await db.classes.delete_one({"id": class_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Class not found")
+    await invalidate_public_cache("classes", then=lambda: publish_schedule_change(
+        {"type": "class", "action": "deleted", "class_id": class_id}
+    ))
     return {"message": "Class deleted successfully"}
 
 # Cancelled Classes Management
 @api_router.post("/admin/classes/cancel", response_model=CancelledClassModel)
 async def cancel_class_instance(cancelled: CancelledClassModel, username: str = Depends(verify_token)):
-    doc = cancelled.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    await db.cancelled_classes.insert_one(doc)
-
-    # Send email notifications to enrolled students
-    asyncio.ensure_future(notify_students_of_class_change(cancelled))
+    # Submitting the same change again (a retry, a double click) reuses the saved
+    # cancellation, so its side effects below are replayed rather than duplicated
+    existing = await db.cancelled_classes.find_one({
+        "class_id": cancelled.class_id,
+        "cancelled_date": cancelled.cancelled_date,
+        "status": cancelled.status,
+        "rescheduled_time": cancelled.rescheduled_time
+    }, {"_id": 0})
+    if existing:
+        cancelled = CancelledClassModel(**existing)
+    else:
+        await db.cancelled_classes.insert_one(cancelled.model_dump())
+
+    # Email enrolled students; the job is held until the public schedule shows the change
+    await queue_class_notification(cancelled)
+
+    async def announce():
+        await release_class_notification(cancelled.id)
+        await publish_schedule_change({
+            "type": "cancellation",
+            "cancellation": cancelled.model_dump(mode="json", exclude={"created_at"})
+        })
 
+    await invalidate_public_cache("cancelled_classes", then=announce)
     return cancelled
 
 
-async def notify_students_of_class_change(cancelled: CancelledClassModel):
-    """Send email notifications to students enrolled in the affected class."""
-    try:
-        # Find the class details
-        class_doc = await db.classes.find_one({"id": cancelled.class_id}, {"_id": 0})
-        if not class_doc:
-            logging.warning(f"Class {cancelled.class_id} not found for notification")
-            return
+# Class-change notices stream enrolled students and queue them into the outbox in
+# batches; actual sends are paced by the outbox workers and resend_rate_limiter.
+# Each cancellation is a job in class_notifications that a worker claims under a
+# lease and works through in student id order, recording the last id queued, so a
+# restart resumes where it stopped and replayed batches dedupe on idempotency_key.
+# Jobs start out held and are released once the cancellation is published; one
+# whose release never came (the publishing worker died mid-retry) is picked up
+# after CLASS_NOTIFY_HOLD seconds anyway.
+# The query relies on the (classes, active, notify_class_changes, id) index without
+# hinting it, so a missing index shows up as a scan in the slow query log instead
+# of failing the fan-out.
+CLASS_NOTIFY_BATCH_SIZE = int(os.environ.get('CLASS_NOTIFY_BATCH_SIZE', '200'))
+CLASS_NOTIFY_LEASE = int(os.environ.get('CLASS_NOTIFY_LEASE', '120'))
+CLASS_NOTIFY_POLL_INTERVAL = float(os.environ.get('CLASS_NOTIFY_POLL_INTERVAL', '5'))
+CLASS_NOTIFY_HOLD = int(os.environ.get('CLASS_NOTIFY_HOLD', '600'))
+STUDENT_NOTIFY_INDEX = [("classes", ASCENDING), ("active", ASCENDING), ("notify_class_changes", ASCENDING), ("id", ASCENDING)]
+_class_notify_wakeup = asyncio.Event()
+
+
+async def queue_class_notification(cancelled: CancelledClassModel):
+    """Record the notification job for a cancellation. Keyed on the cancellation id,
+    so recording the same cancellation twice is a no-op."""
+    await db.class_notifications.update_one(
+        {"id": cancelled.id},
+        {"$setOnInsert": {
+            "id": cancelled.id,
+            "class_id": cancelled.class_id,
+            "cancelled_date": cancelled.cancelled_date,
+            "status": cancelled.status,
+            "state": "held",
+            "recipients": 0,
+            "queued": 0,
+            "created_at": datetime.now(timezone.utc)
+        }},
+        upsert=True
+    )
 
-        # Find enrolled students with notifications enabled
-        students = await db.students.find(
-            {"classes": cancelled.class_id, "active": True, "notify_class_changes": True},
-            {"_id": 0}
-        ).to_list(10000)
 
-        if not students:
-            logging.info(f"No students to notify for class {cancelled.class_id}")
+async def release_class_notification(notification_id: str):
+    await db.class_notifications.update_one({"id": notification_id, "state": "held"}, {"$set": {"state": "pending"}})
+    _class_notify_wakeup.set()
+
+
+async def claim_class_notification():
+    """Take the oldest pending job, or one whose owner stopped renewing its lease."""
+    now = datetime.now(timezone.utc)
+    return await db.class_notifications.find_one_and_update(
+        {"$or": [
+            {"state": "pending"},
+            {"state": "held", "created_at": {"$lt": now - timedelta(seconds=CLASS_NOTIFY_HOLD)}},
+            {"state": "queueing", "locked_until": {"$lt": now}},
+            {"state": "queueing", "locked_until": {"$exists": False}}
+        ]},
+        {"$set": {
+            "state": "queueing",
+            "owner": WORKER_ID,
+            "locked_until": now + timedelta(seconds=CLASS_NOTIFY_LEASE)
+        }},
+        sort=[("created_at", ASCENDING)],
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+
+
+async def notify_students_of_class_change(job: dict):
+    """Send email notifications to students enrolled in the affected class,
+    continuing after job['cursor'] when the job was interrupted."""
+    notification_id = job['id']
+    owned = {"id": notification_id, "owner": WORKER_ID}
+    try:
+        cancelled = await db.cancelled_classes.find_one({"id": notification_id}, {"_id": 0})
+        if not cancelled:
+            # Uncancelled before the fan-out got to it
+            await db.class_notifications.update_one(owned, {
+                "$set": {"state": "withdrawn", "finished_at": datetime.now(timezone.utc)},
+                "$unset": {"locked_until": ""}
+            })
             return
 
+        # Find the class details
+        class_doc = await db.classes.find_one({"id": cancelled['class_id']}, {"_id": 0})
+        if not class_doc:
+            raise ValueError(f"Class {cancelled['class_id']} not found for notification")
+
         class_title = class_doc.get('title', 'Unknown Class')
-        cancelled_date = cancelled.cancelled_date
-        is_rescheduled = cancelled.status == 'rescheduled'
-        reason = cancelled.reason or ''
+        cancelled_date = cancelled['cancelled_date']
+        is_rescheduled = cancelled.get('status') == 'rescheduled'
+        reason = cancelled.get('reason') or ''
 
         # Format date for display
         try:
@@ -948,26 +1985,114 @@ async def notify_students_of_class_change(cancelled: CancelledClassModel):
             formatted_date=formatted_date,
             is_rescheduled=is_rescheduled,
             original_time=class_doc.get('time', ''),
-            rescheduled_time=cancelled.rescheduled_time if is_rescheduled else '',
+            rescheduled_time=(cancelled.get('rescheduled_time') or '') if is_rescheduled else '',
             reason=reason,
             instructor=class_doc.get('instructor', '')
         )
-
-        for student in students:
-            try:
-                params = {
+        # Rendered once; each recipient is just head + name + tail
+        html_head, html_tail = email_html.split('{{STUDENT_NAME}}', 1)
+
+        await db.class_notifications.update_one(owned, {"$set": {
+            "class_title": class_title,
+            "started_at": job.get('started_at') or datetime.now(timezone.utc)
+        }})
+
+        group = f"class-change:{notification_id}"
+
+        async def queue_batch(batch, last_id):
+            queued = await enqueue_emails(batch, group=group)
+            # Progress and lease renewal in one write; losing the lease stops this run
+            result = await db.class_notifications.update_one(owned, {
+                "$set": {"cursor": last_id, "locked_until": datetime.now(timezone.utc) + timedelta(seconds=CLASS_NOTIFY_LEASE)},
+                "$inc": {"recipients": len(batch), "queued": queued}
+            })
+            if not result.matched_count:
+                raise RuntimeError("Lease lost to another worker")
+
+        query = {"classes": cancelled['class_id'], "active": True, "notify_class_changes": True}
+        if job.get('cursor'):
+            query["id"] = {"$gt": job['cursor']}
+        batch = []
+        last_id = None
+        cursor = db.students.find(
+            query, {"_id": 0, "id": 1, "email": 1, "name": 1}
+        ).sort("id", ASCENDING).batch_size(CLASS_NOTIFY_BATCH_SIZE)
+        async for student in cursor:
+            batch.append((
+                {
                     "from": SENDER_EMAIL,
                     "to": [student['email']],
                     "subject": subject,
-                    "html": email_html.replace('{{STUDENT_NAME}}', student.get('name', 'Student'))
-                }
-                await asyncio.to_thread(resend.Emails.send, params)
-                logging.info(f"Notification sent to {student['email']} for class {class_title}")
-            except Exception as e:
-                logging.error(f"Failed to notify {student['email']}: {str(e)}")
+                    "html": html_head + html.escape(student.get('name') or 'Student') + html_tail
+                },
+                f"class-change:{notification_id}:{student['id']}"
+            ))
+            last_id = student['id']
+            if len(batch) >= CLASS_NOTIFY_BATCH_SIZE:
+                await queue_batch(batch, last_id)
+                batch = []
+        if batch:
+            await queue_batch(batch, last_id)
+
+        # A batch replayed after a restart was counted twice; the outbox has the real total
+        total = await db.email_outbox.count_documents({"group": group})
+        result = await db.class_notifications.find_one_and_update(
+            owned,
+            {"$set": {
+                "state": "queued",
+                "recipients": total,
+                "queued": total,
+                "finished_at": datetime.now(timezone.utc)
+            }, "$unset": {"locked_until": ""}},
+            return_document=ReturnDocument.AFTER
+        )
+        if result:
+            logging.info(f"Queued {result['queued']} notification(s) for class {class_title}")
 
+    except asyncio.CancelledError:
+        # Shutting down; the lease expires and another worker resumes from the cursor
+        raise
     except Exception as e:
         logging.error(f"Error in notify_students_of_class_change: {str(e)}")
+        await db.class_notifications.update_one(
+            owned, {"$set": {"state": "failed", "error": str(e)}, "$unset": {"locked_until": ""}}
+        )
+
+
+async def run_class_notification_jobs():
+    """Background worker: claim class-change notification jobs and fan them out."""
+    while True:
+        try:
+            job = await claim_class_notification()
+            if job is None:
+                _class_notify_wakeup.clear()
+                try:
+                    await asyncio.wait_for(_class_notify_wakeup.wait(), timeout=CLASS_NOTIFY_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await notify_students_of_class_change(job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Class notification worker error: {str(e)}")
+            await asyncio.sleep(CLASS_NOTIFY_POLL_INTERVAL)
+
+
+@api_router.get("/admin/classes/notifications/{cancel_id}")
+async def get_class_notification_stats(cancel_id: str, username: str = Depends(verify_token)):
+    """Fan-out progress for one cancellation/reschedule, with outbox delivery counts."""
+    notification = await db.class_notifications.find_one({"id": cancel_id}, {"_id": 0})
+    if not notification:
+        raise HTTPException(status_code=404, detail="Notification not found")
+    delivery = {"pending": 0, "sending": 0, "sent": 0, "failed": 0}
+    async for row in db.email_outbox.aggregate([
+        {"$match": {"group": f"class-change:{cancel_id}"}},
+        {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+    ]):
+        delivery[row['_id']] = row['count']
+    notification["delivery"] = delivery
+    return notification
 
 
 def build_class_notification_email(class_title, formatted_date, is_rescheduled, original_time, rescheduled_time, reason, instructor):
@@ -1075,7 +2200,7 @@ async def preview_class_notification_email(req: EmailPreviewRequest, username: s
     formatted_date = req.date or "Monday, March 10, 2026"
     is_rescheduled = req.status == 'rescheduled'
 
-    html = build_class_notification_email(
+    body_html = build_class_notification_email(
         class_title=class_title,
         formatted_date=formatted_date,
         is_rescheduled=is_rescheduled,
@@ -1093,7 +2218,7 @@ async def preview_class_notification_email(req: EmailPreviewRequest, username: s
         )
 
     return {
-        "html": html,
+        "html": body_html,
         "student_count": student_count,
         "subject": f"Class Update: {class_title} - {formatted_date}"
     }
@@ -1101,98 +2226,466 @@ async def preview_class_notification_email(req: EmailPreviewRequest, username: s
 @api_router.get("/admin/classes/cancelled", response_model=List[CancelledClassModel])
 async def get_cancelled_classes(username: str = Depends(verify_token)):
     cancelled = await db.cancelled_classes.find({}, {"_id": 0}).to_list(1000)
-    for item in cancelled:
-        if isinstance(item.get('created_at'), str):
-            item['created_at'] = datetime.fromisoformat(item['created_at'])
     return cancelled
 
 @api_router.delete("/admin/classes/cancel/{cancel_id}")
 async def uncancel_class(cancel_id: str, username: str = Depends(verify_token)):
-    result = await db.cancelled_classes.delete_one({"id": cancel_id})
-    if result.deleted_count == 0:
+    cancelled = await db.cancelled_classes.find_one_and_delete({"id": cancel_id}, {"_id": 0})
+    if cancelled is None:
         raise HTTPException(status_code=404, detail="Cancellation not found")
+    await invalidate_public_cache("cancelled_classes", then=lambda: publish_schedule_change({
+        "type": "uncancel",
+        "id": cancel_id,
+        "class_id": cancelled['class_id'],
+        "cancelled_date": cancelled['cancelled_date'],
+        "status": "scheduled"
+    }))
     return {"message": "Class uncancelled successfully"}
 
+
+# Classes page clients hold one SSE connection and receive compact `schedule`
+# events: cancellation (the new cancelled_classes entry), uncancel (its id), or
+# class (created/updated/deleted; clients refetch /api/classes, an ETag hit if
+# nothing else changed).
+SCHEDULE_TOPIC = "schedule"
+
+
+async def publish_schedule_change(change: dict):
+    await live_event_hub.publish(SCHEDULE_TOPIC, "schedule", change)
+
+
+@api_router.get("/classes/stream")
+async def stream_schedule_changes(request: StarletteRequest):
+    queue = live_event_hub.subscribe(SCHEDULE_TOPIC)
+    last_event_id = request.headers.get("last-event-id", "")
+
+    async def events():
+        try:
+            yield b"retry: 5000\n\n"
+            if last_event_id.isdigit():
+                # Replay what a reconnecting client missed. Anything also queued since
+                # subscribing arrives twice; the page applies changes idempotently.
+                missed = db.live_events.find(
+                    {"topic": SCHEDULE_TOPIC, "seq": {"$gt": int(last_event_id)}}, {"_id": 0, "message": 1}
+                ).sort("seq", ASCENDING)
+                async for doc in missed:
+                    yield doc['message']
+            while True:
+                message = await next_live_message(request, queue)
+                if message is None:
+                    return
+                yield message
+        finally:
+            live_event_hub.unsubscribe(SCHEDULE_TOPIC, queue)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
 @api_router.get("/classes/cancelled", response_model=List[CancelledClassModel])
-async def get_public_cancelled_classes():
-    cancelled = await db.cancelled_classes.find({}, {"_id": 0}).to_list(1000)
-    for item in cancelled:
-        if isinstance(item.get('created_at'), str):
-            item['created_at'] = datetime.fromisoformat(item['created_at'])
-    return cancelled
+async def get_public_cancelled_classes(request: StarletteRequest):
+    return await public_section_response(request, "cancelled-classes")
+
+# ==================== CLASS CALENDAR ====================
+
+# Classes describe their timing in one of three legacy shapes (schedule[{day, time}],
+# days + time, day + time) or as a one-time class on one_time_date. The engine below
+# normalizes them and expands dated occurrences with cancellations/reschedules applied.
+# Expanded weeks are cached per classes/cancelled_classes version.
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+CALENDAR_MAX_DAYS = int(os.environ.get('CALENDAR_MAX_DAYS', '370'))
+CALENDAR_WEEK_CACHE_SIZE = 260
+
+_calendar_source = (None, [], {})
+_calendar_weeks = {}
+
+
+def class_schedule_entries(cls: dict) -> list:
+    """(weekday index, time string) pairs for a recurring class, whatever its format."""
+    if cls.get('schedule'):
+        entries = [(entry.get('day', ''), entry.get('time', '')) for entry in cls['schedule']]
+    elif cls.get('days'):
+        entries = [(day, cls.get('time', '')) for day in cls['days']]
+    elif cls.get('day'):
+        entries = [(cls['day'], cls.get('time', ''))]
+    else:
+        entries = []
+    return [(WEEKDAYS.index(day), time_str or '') for day, time_str in entries if day in WEEKDAYS]
+
+
+def parse_clock(value: str) -> Optional[str]:
+    """'6:30 PM' -> '18:30'; None if unparseable."""
+    try:
+        return datetime.strptime(value.strip().upper().replace(" ", ""), "%I:%M%p").strftime("%H:%M")
+    except ValueError:
+        return None
+
+
+def parse_time_range(time_str: str) -> tuple:
+    """'6:00 PM - 8:00 PM' -> ('18:00', '20:00'). Either side may be None."""
+    parts = [part for part in (time_str or '').split('-')]
+    start = parse_clock(parts[0]) if parts and parts[0].strip() else None
+    end = parse_clock(parts[1]) if len(parts) > 1 and parts[1].strip() else None
+    return start, end
+
+
+def parse_calendar_date(value: str) -> Optional[datetime]:
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except (TypeError, ValueError):
+        return None
+
+
+async def calendar_source() -> tuple:
+    """(classes, {(class_id, date): cancellation}) for the current content version."""
+    global _calendar_source
+    version = content_version("classes", "cancelled_classes")
+    if _calendar_source[0] == version:
+        return _calendar_source[1], _calendar_source[2]
+    classes = await db.classes.find({}, {"_id": 0}).to_list(1000)
+    cancellations = {}
+    async for cancelled in db.cancelled_classes.find({}, {"_id": 0}):
+        cancellations[(cancelled['class_id'], cancelled['cancelled_date'])] = cancelled
+    _calendar_source = (version, classes, cancellations)
+    _calendar_weeks.clear()
+    return classes, cancellations
+
+
+def class_occurrence(cls: dict, date_str: str, weekday: int, time_str: str, cancellations: dict) -> dict:
+    start, end = parse_time_range(time_str)
+    occurrence = {
+        "class_id": cls['id'],
+        "date": date_str,
+        "day": WEEKDAYS[weekday],
+        "time": time_str,
+        "start": start,
+        "end": end,
+        "title": cls.get('title', ''),
+        "instructor": cls.get('instructor', ''),
+        "level": cls.get('level', ''),
+        "type": cls.get('type', ''),
+        "description": cls.get('description', ''),
+        "is_one_time": cls.get('is_one_time', False),
+        "status": "scheduled",
+        "rescheduled_time": "",
+        "reason": ""
+    }
+    cancelled = cancellations.get((cls['id'], date_str))
+    if cancelled:
+        occurrence["status"] = cancelled.get('status', 'cancelled')
+        occurrence["rescheduled_time"] = cancelled.get('rescheduled_time', '')
+        occurrence["reason"] = cancelled.get('reason', '')
+    return occurrence
+
+
+def expand_week(classes: list, cancellations: dict, monday: datetime) -> list:
+    week = [(monday + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(7)]
+    occurrences = []
+    for cls in classes:
+        if cls.get('is_one_time'):
+            if cls.get('one_time_date') in week:
+                weekday = week.index(cls['one_time_date'])
+                occurrences.append(class_occurrence(cls, cls['one_time_date'], weekday, cls.get('time', ''), cancellations))
+            continue
+        for weekday, time_str in class_schedule_entries(cls):
+            occurrences.append(class_occurrence(cls, week[weekday], weekday, time_str, cancellations))
+    occurrences.sort(key=lambda o: (o['date'], o['start'] or '99:99', o['title']))
+    return occurrences
+
+
+async def calendar_occurrences(start: datetime, end: datetime) -> list:
+    """Occurrences from start to end inclusive (both naive dates), built from cached weeks."""
+    classes, cancellations = await calendar_source()
+    version = _calendar_source[0]
+    start_str, end_str = start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+    occurrences = []
+    monday = start - timedelta(days=start.weekday())
+    while monday <= end:
+        key = (version, monday)
+        week = _calendar_weeks.get(key)
+        if week is None:
+            if len(_calendar_weeks) >= CALENDAR_WEEK_CACHE_SIZE:
+                del _calendar_weeks[next(iter(_calendar_weeks))]
+            week = expand_week(classes, cancellations, monday)
+            _calendar_weeks[key] = week
+        occurrences.extend(o for o in week if start_str <= o['date'] <= end_str)
+        monday += timedelta(days=7)
+    return occurrences
+
+
+@api_router.get("/calendar")
+async def get_class_calendar(
+    request: StarletteRequest,
+    from_date: Optional[str] = Query(None, alias="from"),
+    to_date: Optional[str] = Query(None, alias="to")
+):
+    """Dated class occurrences between from and to (YYYY-MM-DD, inclusive).
+
+    Defaults to the current week. Each occurrence carries status scheduled,
+    cancelled or rescheduled, with rescheduled_time/reason from the cancellation.
+    """
+    today = datetime.now(timezone.utc).replace(tzinfo=None, hour=0, minute=0, second=0, microsecond=0)
+    start = parse_calendar_date(from_date) if from_date else today - timedelta(days=today.weekday())
+    end = parse_calendar_date(to_date) if to_date else (start + timedelta(days=6) if start else None)
+    if start is None or end is None:
+        raise HTTPException(status_code=400, detail="from and to must be dates in YYYY-MM-DD format")
+    if end < start:
+        raise HTTPException(status_code=400, detail="to must not be before from")
+    if (end - start).days >= CALENDAR_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range is limited to {CALENDAR_MAX_DAYS} days")
+
+    key = f"calendar:{start:%Y%m%d}-{end:%Y%m%d}"
+    headers = {
+        "ETag": content_etag(key, content_version("classes", "cancelled_classes")),
+        "Cache-Control": PUBLIC_CACHE_CONTROL
+    }
+    if etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    occurrences = await calendar_occurrences(start, end)
+    return Response(content=json.dumps(occurrences).encode('utf-8'), media_type="application/json", headers=headers)
+
+
+# ==================== ICALENDAR FEED ====================
+
+# /api/classes.ics and /api/classes/{id}.ics. Recurring schedule entries become weekly
+# RRULE events; cancellations are EXDATEs and reschedules are RECURRENCE-ID overrides.
+# Each class's VEVENT block is cached under a fingerprint of the class and its
+# cancellations, so a change rebuilds only the classes it touched, and finished
+# feeds are cached as bytes per classes/cancelled_classes version.
+ICS_TZID = "America/Toronto"
+ICS_VTIMEZONE = [
+    "BEGIN:VTIMEZONE",
+    "TZID:America/Toronto",
+    "BEGIN:DAYLIGHT",
+    "TZOFFSETFROM:-0500",
+    "TZOFFSETTO:-0400",
+    "TZNAME:EDT",
+    "DTSTART:19700308T020000",
+    "RRULE:FREQ=YEARLY;BYMONTH=3;BYDAY=2SU",
+    "END:DAYLIGHT",
+    "BEGIN:STANDARD",
+    "TZOFFSETFROM:-0400",
+    "TZOFFSETTO:-0500",
+    "TZNAME:EST",
+    "DTSTART:19701101T020000",
+    "RRULE:FREQ=YEARLY;BYMONTH=11;BYDAY=1SU",
+    "END:STANDARD",
+    "END:VTIMEZONE",
+]
+ICS_BYDAY = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+ICS_DEFAULT_START = datetime(2024, 1, 1)
+
+_ics_event_blocks = {}
+_ics_feeds = {}
+
+
+def ics_text(value: str) -> str:
+    return (value or "").replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def ics_fold(line: str) -> str:
+    """Fold a content line to 75 octets as RFC 5545 requires."""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line
+    parts, chunk = [], b""
+    for char in line:
+        char_bytes = char.encode('utf-8')
+        if len(chunk) + len(char_bytes) > (75 if not parts else 74):
+            parts.append(chunk.decode('utf-8'))
+            chunk = b""
+        chunk += char_bytes
+    parts.append(chunk.decode('utf-8'))
+    return "\r\n ".join(parts)
+
+
+def ics_datetime_prop(name: str, date_str: str, clock: Optional[str]) -> str:
+    """DTSTART/DTEND/EXDATE/RECURRENCE-ID in the dojo's local time, or a DATE when untimed."""
+    day = date_str.replace("-", "")
+    if clock is None:
+        return f"{name};VALUE=DATE:{day}"
+    return f"{name};TZID={ICS_TZID}:{day}T{clock.replace(':', '')}00"
+
+
+def ics_event_lines(uid: str, dtstamp: str, cls: dict, date_str: str, time_str: str, extra: list) -> list:
+    start, end = parse_time_range(time_str)
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{uid}",
+        f"DTSTAMP:{dtstamp}",
+        ics_datetime_prop("DTSTART", date_str, start),
+    ]
+    if start and end:
+        lines.append(ics_datetime_prop("DTEND", date_str, end))
+    elif start:
+        lines.append("DURATION:PT1H")
+    lines.append(f"SUMMARY:{ics_text(cls.get('title', ''))}")
+    description = " - ".join(part for part in [cls.get('level', ''), cls.get('instructor', ''), cls.get('description', '')] if part)
+    if description:
+        lines.append(f"DESCRIPTION:{ics_text(description)}")
+    return lines + extra + ["END:VEVENT"]
+
+
+def class_ics_block(cls: dict, cancellations: list) -> bytes:
+    created = cls.get('created_at')
+    anchor = created.replace(tzinfo=None) if isinstance(created, datetime) else ICS_DEFAULT_START
+    dtstamp = (created.astimezone(timezone.utc) if isinstance(created, datetime) and created.tzinfo else anchor).strftime("%Y%m%dT%H%M%SZ")
+    by_date = {c['cancelled_date']: c for c in cancellations}
+    lines = []
+
+    if cls.get('is_one_time'):
+        if parse_calendar_date(cls.get('one_time_date')):
+            date_str, time_str, extra = cls['one_time_date'], cls.get('time', ''), []
+            cancelled = by_date.get(date_str)
+            if cancelled and cancelled.get('status') == "rescheduled" and cancelled.get('rescheduled_time'):
+                time_str = cancelled['rescheduled_time']
+            elif cancelled:
+                extra = ["STATUS:CANCELLED"]
+            lines += ics_event_lines(f"{cls['id']}@tcprodojo.com", dtstamp, cls, date_str, time_str, extra)
+    else:
+        for index, (weekday, time_str) in enumerate(class_schedule_entries(cls)):
+            first = anchor + timedelta(days=(weekday - anchor.weekday()) % 7)
+            start, _ = parse_time_range(time_str)
+            # The entry index keeps UIDs unique when a class meets twice on one weekday
+            uid = f"{cls['id']}-{index}-{ICS_BYDAY[weekday].lower()}@tcprodojo.com"
+            extra = [f"RRULE:FREQ=WEEKLY;BYDAY={ICS_BYDAY[weekday]}"]
+            overrides = []
+            for date_str, cancelled in sorted(by_date.items()):
+                date = parse_calendar_date(date_str)
+                if date is None or date.weekday() != weekday:
+                    continue
+                if cancelled.get('status') == "rescheduled" and cancelled.get('rescheduled_time'):
+                    overrides += ics_event_lines(uid, dtstamp, cls, date_str, cancelled['rescheduled_time'],
+                                                 [ics_datetime_prop("RECURRENCE-ID", date_str, start)])
+                else:
+                    extra.append(ics_datetime_prop("EXDATE", date_str, start))
+            lines += ics_event_lines(uid, dtstamp, cls, first.strftime("%Y-%m-%d"), time_str, extra)
+            lines += overrides
+
+    return "".join(ics_fold(line) + "\r\n" for line in lines).encode('utf-8')
+
+
+async def build_ics_feed(class_id: Optional[str] = None) -> Optional[bytes]:
+    classes, cancellations = await calendar_source()
+    if class_id is not None:
+        classes = [cls for cls in classes if cls['id'] == class_id]
+        if not classes:
+            return None
+    by_class = {}
+    for (cancelled_class_id, _), cancelled in cancellations.items():
+        by_class.setdefault(cancelled_class_id, []).append(cancelled)
+
+    blocks = []
+    for cls in classes:
+        class_cancellations = sorted(by_class.get(cls['id'], []), key=lambda c: c['cancelled_date'])
+        fingerprint = json.dumps([cls, class_cancellations], sort_keys=True, default=str)
+        cached = _ics_event_blocks.get(cls['id'])
+        if cached is None or cached[0] != fingerprint:
+            cached = (fingerprint, class_ics_block(cls, class_cancellations))
+            _ics_event_blocks[cls['id']] = cached
+        blocks.append(cached[1])
+    if class_id is None:
+        for stale_id in set(_ics_event_blocks) - {cls['id'] for cls in classes}:
+            del _ics_event_blocks[stale_id]
+
+    name = classes[0].get('title', '') if class_id else "TC Pro Dojo Classes"
+    header = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//TC Pro Dojo//Class Schedule//EN",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{ics_text(name)}",
+        f"X-WR-TIMEZONE:{ICS_TZID}",
+    ] + ICS_VTIMEZONE
+    head = "".join(ics_fold(line) + "\r\n" for line in header).encode('utf-8')
+    return head + b"".join(blocks) + b"END:VCALENDAR\r\n"
+
+
+async def ics_feed_response(request: StarletteRequest, class_id: Optional[str] = None):
+    key = f"ics:{class_id or 'all'}"
+    version = content_version("classes", "cancelled_classes")
+    headers = {"ETag": content_etag(key, version), "Cache-Control": PUBLIC_CACHE_CONTROL}
+    if etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    cached = _ics_feeds.get(key)
+    if cached is None or cached[0] != version:
+        body = await build_ics_feed(class_id)
+        if body is None:
+            raise HTTPException(status_code=404, detail="Class not found")
+        if len(_ics_feeds) >= 1000:
+            _ics_feeds.clear()
+        cached = (version, body)
+        _ics_feeds[key] = cached
+    return Response(content=cached[1], media_type="text/calendar; charset=utf-8", headers=headers)
+
+
+@api_router.get("/classes.ics")
+async def get_classes_ics(request: StarletteRequest):
+    return await ics_feed_response(request)
+
+
+@api_router.get("/classes/{class_id}.ics")
+async def get_class_ics(class_id: str, request: StarletteRequest):
+    return await ics_feed_response(request, class_id)
+
 
 # Public API endpoints (no authentication required)
 @api_router.get("/success-stories", response_model=List[SuccessStoryModel])
-async def get_public_success_stories():
-    stories = await db.success_stories.find({}, {"_id": 0}).sort("displayOrder", 1).to_list(1000)
-    for story in stories:
-        if isinstance(story.get('created_at'), str):
-            story['created_at'] = datetime.fromisoformat(story['created_at'])
-    return stories
+async def get_public_success_stories(request: StarletteRequest):
+    return await public_section_response(request, "success-stories")
 
 @api_router.get("/endorsements", response_model=List[EndorsementModel])
-async def get_public_endorsements():
-    endorsements = await db.endorsements.find({}, {"_id": 0}).sort("displayOrder", 1).to_list(1000)
-    for endorsement in endorsements:
-        if isinstance(endorsement.get('created_at'), str):
-            endorsement['created_at'] = datetime.fromisoformat(endorsement['created_at'])
-    return endorsements
+async def get_public_endorsements(request: StarletteRequest):
+    return await public_section_response(request, "endorsements")
 
 @api_router.get("/coaches", response_model=List[CoachModel])
-async def get_public_coaches():
-    coaches = await db.coaches.find({}, {"_id": 0}).sort("displayOrder", 1).to_list(1000)
-    for coach in coaches:
-        if isinstance(coach.get('created_at'), str):
-            coach['created_at'] = datetime.fromisoformat(coach['created_at'])
-    return coaches
+async def get_public_coaches(request: StarletteRequest):
+    return await public_section_response(request, "coaches")
 
 @api_router.get("/testimonials", response_model=List[TestimonialModel])
-async def get_public_testimonials():
-    testimonials = await db.testimonials.find({}, {"_id": 0}).sort("displayOrder", 1).to_list(1000)
-    for testimonial in testimonials:
-        if isinstance(testimonial.get('created_at'), str):
-            testimonial['created_at'] = datetime.fromisoformat(testimonial['created_at'])
-    return testimonials
+async def get_public_testimonials(request: StarletteRequest):
+    return await public_section_response(request, "testimonials")
 
 @api_router.get("/faqs", response_model=List[FAQModel])
-async def get_public_faqs():
-    faqs = await db.faqs.find({}, {"_id": 0}).sort("displayOrder", 1).to_list(1000)
-    for faq in faqs:
-        if isinstance(faq.get('created_at'), str):
-            faq['created_at'] = datetime.fromisoformat(faq['created_at'])
-    return faqs
+async def get_public_faqs(request: StarletteRequest):
+    return await public_section_response(request, "faqs")
 
 @api_router.get("/tips", response_model=List[TipModel])
-async def get_public_tips():
-    tips = await db.tips.find({}, {"_id": 0}).sort("displayOrder", 1).to_list(1000)
-    for tip in tips:
-        if isinstance(tip.get('created_at'), str):
-            tip['created_at'] = datetime.fromisoformat(tip['created_at'])
-    return tips
+async def get_public_tips(request: StarletteRequest):
+    return await public_section_response(request, "tips")
 
 @api_router.get("/classes", response_model=List[ClassScheduleModel])
-async def get_public_classes():
-    classes = await db.classes.find({}, {"_id": 0}).to_list(1000)
-    for class_item in classes:
-        if isinstance(class_item.get('created_at'), str):
-            class_item['created_at'] = datetime.fromisoformat(class_item['created_at'])
-    return classes
+async def get_public_classes(request: StarletteRequest):
+    return await public_section_response(request, "classes")
 
 @api_router.get("/events", response_model=List[EventModel])
-async def get_public_events():
-    events = await db.events.find({}, {"_id": 0}).sort("displayOrder", 1).to_list(1000)
-    for event in events:
-        if isinstance(event.get('created_at'), str):
-            event['created_at'] = datetime.fromisoformat(event['created_at'])
-    return events
+async def get_public_events(request: StarletteRequest):
+    return await public_section_response(request, "events")
 
 @api_router.get("/past-events", response_model=List[PastEventModel])
-async def get_public_past_events():
-    past_events = await db.past_events.find({}, {"_id": 0}).sort("displayOrder", 1).to_list(1000)
-    for event in past_events:
-        if isinstance(event.get('created_at'), str):
-            event['created_at'] = datetime.fromisoformat(event['created_at'])
-    return past_events
+async def get_public_past_events(request: StarletteRequest):
+    return await public_section_response(request, "past-events")
+
+@api_router.get("/bundle")
+async def get_public_bundle(request: StarletteRequest, sections: str = ""):
+    """Several public sections in one response, e.g. ?sections=site-settings,testimonials.
+
+    Returns {section: body} with each body identical to its standalone endpoint.
+    Omitting sections returns all of them.
+    """
+    names = [name.strip() for name in sections.split(",") if name.strip()] or list(PUBLIC_SECTIONS)
+    unknown = [name for name in names if name not in PUBLIC_SECTIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown bundle section(s): {', '.join(unknown)}")
+    names = sorted(set(names))
+    collections = tuple(sorted({c for name in names for c in PUBLIC_SECTIONS[name][0]}))
+
+    async def load_bundle():
+        bodies = await asyncio.gather(*(cached_public_body(name, *PUBLIC_SECTIONS[name]) for name in names))
+        # Splice the cached section bytes together rather than re-serializing them
+        parts = [json.dumps(name).encode('utf-8') + b":" + body for name, body in zip(names, bodies)]
+        return b"{" + b",".join(parts) + b"}"
+
+    return await cached_public_response(request, "bundle:" + "+".join(names), collections, load_bundle)
 
 # Newsletter Subscription Endpoints
 @api_router.post("/newsletter/subscribe")
@@ -1205,9 +2698,12 @@ async def subscribe_newsletter(email: str):
     subscription = {
         "id": str(uuid.uuid4()),
         "email": email,
-        "subscribed_at": datetime.now(timezone.utc).isoformat()
+        "subscribed_at": datetime.now(timezone.utc)
     }
-    await db.newsletter_subscriptions.insert_one(subscription)
+    try:
+        await db.newsletter_subscriptions.insert_one(subscription)
+    except DuplicateKeyError:
+        return {"message": "Email already subscribed", "success": True}
     
     # Get total subscriber count
     total_count = await db.newsletter_subscriptions.count_documents({})
@@ -1234,17 +2730,21 @@ async def subscribe_newsletter(email: str):
     """
     await send_notification_email(
         f"TC Pro Dojo: New Newsletter Subscriber",
-        email_html
+        email_html,
+        idempotency_key=f"newsletter-subscriber:{subscription['id']}"
     )
     
     return {"message": "Successfully subscribed", "success": True}
 
 @api_router.get("/admin/newsletter-subscriptions", response_model=List[NewsletterSubscriptionModel])
-async def get_newsletter_subscriptions(username: str = Depends(verify_token)):
-    subscriptions = await db.newsletter_subscriptions.find({}, {"_id": 0}).sort("subscribed_at", -1).to_list(10000)
-    for sub in subscriptions:
-        if isinstance(sub.get('subscribed_at'), str):
-            sub['subscribed_at'] = datetime.fromisoformat(sub['subscribed_at'])
+async def get_newsletter_subscriptions(
+    response: Response,
+    after: Optional[str] = None,
+    limit: int = Query(ADMIN_PAGE_SIZE, ge=1, le=10000),
+    username: str = Depends(verify_token)
+):
+    subscriptions, next_cursor = await keyset_page("newsletter_subscriptions", "subscribed_at", DESCENDING, after, limit)
+    set_next_cursor(response, next_cursor)
     return subscriptions
 
 @api_router.delete("/admin/newsletter-subscriptions/{subscription_id}")
@@ -1266,14 +2766,10 @@ async def send_newsletter(request: NewsletterSendRequest, username: str = Depend
     if not resend.api_key or resend.api_key == 're_your_api_key_here':
         raise HTTPException(status_code=500, detail="Email service not configured")
     
-    # Get all subscribers
-    subscriptions = await db.newsletter_subscriptions.find({}, {"_id": 0}).to_list(10000)
-    
-    if not subscriptions:
+    total = await db.newsletter_subscriptions.count_documents({})
+    if not total:
         raise HTTPException(status_code=400, detail="No subscribers to send to")
     
-    emails = [sub['email'] for sub in subscriptions]
-    
     # Build the email HTML with unsubscribe footer
     full_html = f"""
     <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; background-color: #111; color: #fff; padding: 20px;">
@@ -1293,60 +2789,221 @@ async def send_newsletter(request: NewsletterSendRequest, username: str = Depend
     </div>
     """
     
-    successful = 0
-    failed = 0
-    errors = []
-    
-    for email in emails:
-        try:
-            params = {
-                "from": SENDER_EMAIL,
-                "to": [email],
-                "subject": request.subject,
-                "html": full_html
-            }
-            await asyncio.to_thread(resend.Emails.send, params)
-            successful += 1
-        except Exception as e:
-            failed += 1
-            errors.append({"email": email, "error": str(e)})
-            logging.error(f"Failed to send newsletter to {email}: {str(e)}")
-    
-    # Log the newsletter send
+    # The send runs in the background; newsletter_logs tracks its progress
     newsletter_log = {
         "id": str(uuid.uuid4()),
         "subject": request.subject,
         "sent_by": username,
-        "total_recipients": len(emails),
-        "successful": successful,
-        "failed": failed,
-        "sent_at": datetime.now(timezone.utc).isoformat()
+        "total_recipients": total,
+        "successful": 0,
+        "failed": 0,
+        "errors": [],
+        "status": "sending",
+        "sent_at": datetime.now(timezone.utc),
+        "html": full_html,
+        "cursor": None,
+        "owner": WORKER_ID,
+        "locked_until": datetime.now(timezone.utc) + timedelta(seconds=NEWSLETTER_LEASE)
     }
     await db.newsletter_logs.insert_one(newsletter_log)
+    task = asyncio.create_task(run_newsletter_job(newsletter_log['id']))
+    background_tasks.append(task)
+    task.add_done_callback(background_tasks.remove)
     
     return {
-        "message": f"Newsletter sent to {successful} subscribers",
-        "successful": successful,
-        "failed": failed,
-        "total": len(emails),
-        "errors": errors[:5] if errors else []
+        "message": f"Newsletter queued for {total} subscribers",
+        "job_id": newsletter_log['id'],
+        "status": "sending",
+        "successful": 0,
+        "failed": 0,
+        "total": total
     }
 
+
+# Resend's batch endpoint accepts up to 100 emails per call
+NEWSLETTER_BATCH_SIZE = max(1, min(int(os.environ.get('NEWSLETTER_BATCH_SIZE', '100')), 100))
+NEWSLETTER_CONCURRENCY = max(1, int(os.environ.get('NEWSLETTER_CONCURRENCY', '2')))
+# A sending job is owned by one worker under a lease renewed as its batches land.
+# If that worker stops (crash, redeploy), another one resumes the job from its cursor.
+NEWSLETTER_LEASE = int(os.environ.get('NEWSLETTER_LEASE', '120'))
+
+
+async def send_newsletter_batch(subject: str, body_html: str, emails: list) -> Optional[dict]:
+    """Send one batch; returns an error entry for the log, or None on success."""
+    params = [{"from": SENDER_EMAIL, "to": [email], "subject": subject, "html": body_html} for email in emails]
+    try:
+        await resend_rate_limiter.wait()
+        with track_external_call("resend", "batch.send"):
+            await asyncio.to_thread(resend.Batch.send, params)
+        return None
+    except Exception as e:
+        logging.error(f"Failed to send newsletter batch of {len(emails)}: {str(e)}")
+        return {"emails": emails[:3], "error": str(e)}
+
+
+async def run_newsletter_job(job_id: str):
+    """Stream subscribers, in email order from the job's cursor, into Resend batch calls,
+    NEWSLETTER_CONCURRENCY at a time.
+
+    Counts and the cursor are committed together and only for a contiguous run of
+    finished batches, so a resumed job repeats at most the batches that were in flight.
+    """
+    job = await db.newsletter_logs.find_one({"id": job_id, "owner": WORKER_ID}, {"_id": 0})
+    if not job:
+        return
+    semaphore = asyncio.Semaphore(NEWSLETTER_CONCURRENCY)
+    commit_lock = asyncio.Lock()
+    batches = {}
+    pending = set()
+    next_batch = 0
+    next_commit = 0
+    lease_lost = False
+
+    async def commit():
+        nonlocal next_commit, lease_lost
+        async with commit_lock:
+            ready = []
+            while batches.get(next_commit, {}).get("done"):
+                ready.append(batches.pop(next_commit))
+                next_commit += 1
+            if not ready or lease_lost:
+                return
+            errors = [batch['error'] for batch in ready if batch['error']]
+            update = {
+                "$set": {
+                    "cursor": ready[-1]['emails'][-1],
+                    "locked_until": datetime.now(timezone.utc) + timedelta(seconds=NEWSLETTER_LEASE)
+                },
+                "$inc": {
+                    "successful": sum(len(batch['emails']) for batch in ready if not batch['error']),
+                    "failed": sum(len(batch['emails']) for batch in ready if batch['error'])
+                }
+            }
+            if errors:
+                update["$push"] = {"errors": {"$each": errors, "$slice": 5}}
+            result = await db.newsletter_logs.update_one({"id": job_id, "owner": WORKER_ID}, update)
+            if not result.matched_count:
+                lease_lost = True
+
+    async def send(index):
+        try:
+            batch = batches[index]
+            batch['error'] = await send_newsletter_batch(job['subject'], job['html'], batch['emails'])
+            batch['done'] = True
+            await commit()
+        finally:
+            semaphore.release()
+
+    def dispatch(emails):
+        nonlocal next_batch
+        batches[next_batch] = {"emails": emails, "error": None, "done": False}
+        task = asyncio.ensure_future(send(next_batch))
+        next_batch += 1
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    crashed = False
+    try:
+        query = {"email": {"$gt": job['cursor']}} if job.get('cursor') else {}
+        chunk = []
+        async for sub in db.newsletter_subscriptions.find(query, {"_id": 0, "email": 1}).sort("email", ASCENDING):
+            if lease_lost:
+                break
+            chunk.append(sub['email'])
+            if len(chunk) == NEWSLETTER_BATCH_SIZE:
+                # Waiting for a free slot before reading on keeps memory flat
+                await semaphore.acquire()
+                dispatch(chunk)
+                chunk = []
+        if chunk and not lease_lost:
+            await semaphore.acquire()
+            dispatch(chunk)
+        await asyncio.gather(*pending)
+    except asyncio.CancelledError:
+        for task in pending:
+            task.cancel()
+        raise
+    except Exception as e:
+        logging.error(f"Newsletter job {job_id} failed: {str(e)}")
+        crashed = True
+    finally:
+        # Batches already handed to Resend must land in the counts before the final status
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+    if lease_lost:
+        logging.warning(f"Newsletter job {job_id} lost its lease to another worker")
+        return
+    counts = await db.newsletter_logs.find_one({"id": job_id}, {"_id": 0, "successful": 1, "failed": 1})
+    if crashed or (counts['failed'] and not counts['successful']):
+        status = "failed"
+    elif counts['failed']:
+        status = "partial"
+    else:
+        status = "completed"
+    await db.newsletter_logs.update_one(
+        {"id": job_id, "owner": WORKER_ID},
+        {
+            "$set": {"status": status, "completed_at": datetime.now(timezone.utc)},
+            "$unset": {"html": "", "locked_until": ""}
+        }
+    )
+
+
+async def resume_newsletter_jobs():
+    """Background worker: take over sending jobs whose owner stopped renewing its lease."""
+    while True:
+        try:
+            now = datetime.now(timezone.utc)
+            job = await db.newsletter_logs.find_one_and_update(
+                {"status": "sending", "$or": [
+                    {"locked_until": {"$lt": now}},
+                    {"locked_until": {"$exists": False}}
+                ]},
+                {"$set": {"owner": WORKER_ID, "locked_until": now + timedelta(seconds=NEWSLETTER_LEASE)}},
+                projection={"_id": 0, "id": 1, "html": 1}
+            )
+            if job and job.get('html'):
+                logging.info(f"Resuming newsletter job {job['id']}")
+                await run_newsletter_job(job['id'])
+                continue
+            if job:
+                # Started before jobs were resumable; there is nothing to resume from
+                await db.newsletter_logs.update_one({"id": job['id']}, {"$set": {
+                    "status": "failed", "completed_at": now, "errors": [{"error": "Interrupted by a restart"}]
+                }})
+                continue
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Newsletter resume worker error: {str(e)}")
+        await asyncio.sleep(NEWSLETTER_LEASE / 2)
+
 @api_router.get("/admin/newsletter/logs")
 async def get_newsletter_logs(username: str = Depends(verify_token)):
     """Get history of sent newsletters"""
-    logs = await db.newsletter_logs.find({}, {"_id": 0}).sort("sent_at", -1).to_list(100)
+    logs = await db.newsletter_logs.find({}, {"_id": 0, "html": 0}).sort("sent_at", -1).to_list(100)
     return logs
 
+@api_router.get("/admin/newsletter/logs/{job_id}")
+async def get_newsletter_log(job_id: str, username: str = Depends(verify_token)):
+    """Progress of a single newsletter send"""
+    log = await db.newsletter_logs.find_one({"id": job_id}, {"_id": 0, "html": 0})
+    if not log:
+        raise HTTPException(status_code=404, detail="Newsletter job not found")
+    return log
+
 
 # ==================== STUDENTS MANAGEMENT ====================
 
 @api_router.get("/admin/students", response_model=List[StudentModel])
-async def get_students(username: str = Depends(verify_token)):
-    students = await db.students.find({}, {"_id": 0}).sort("name", 1).to_list(10000)
-    for student in students:
-        if isinstance(student.get('created_at'), str):
-            student['created_at'] = datetime.fromisoformat(student['created_at'])
+async def get_students(
+    response: Response,
+    after: Optional[str] = None,
+    limit: int = Query(ADMIN_PAGE_SIZE, ge=1, le=10000),
+    username: str = Depends(verify_token)
+):
+    students, next_cursor = await keyset_page("students", "name", ASCENDING, after, limit)
+    set_next_cursor(response, next_cursor)
     return students
 
 @api_router.post("/admin/students", response_model=StudentModel)
@@ -1357,16 +3014,20 @@ async def create_student(student: StudentModel, username: str = Depends(verify_t
         raise HTTPException(status_code=400, detail="A student with this email already exists")
     
     doc = student.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    await db.students.insert_one(doc)
+    try:
+        await db.students.insert_one(doc)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="A student with this email already exists")
     return student
 
 @api_router.put("/admin/students/{student_id}", response_model=StudentModel)
 async def update_student(student_id: str, student: StudentModel, username: str = Depends(verify_token)):
     doc = student.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    doc['updated_at'] = datetime.now(timezone.utc).isoformat()
-    result = await db.students.update_one({"id": student_id}, {"$set": doc})
+    doc['updated_at'] = datetime.now(timezone.utc)
+    try:
+        result = await db.students.update_one({"id": student_id}, {"$set": doc})
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="A student with this email already exists")
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Student not found")
     return student
@@ -1378,24 +3039,244 @@ async def delete_student(student_id: str, username: str = Depends(verify_token))
         raise HTTPException(status_code=404, detail="Student not found")
     return {"message": "Student deleted successfully"}
 
-@api_router.get("/admin/students/export")
-async def export_students_csv(username: str = Depends(verify_token)):
-    """Export all students with notify_class_changes=True as CSV for email notifications"""
-    students = await db.students.find(
-        {"active": True, "notify_class_changes": True}, 
-        {"_id": 0}
-    ).to_list(10000)
-    
+
+# Bulk import: rows are validated with StudentModel and written as unordered
+# upserts keyed on the unique email index, STUDENT_IMPORT_BATCH ops per bulk_write.
+# Existing students keep their id and created_at, get only the fields the row
+# actually provides, and have the row's classes added to theirs.
+STUDENT_IMPORT_MAX_ROWS = int(os.environ.get('STUDENT_IMPORT_MAX_ROWS', '10000'))
+STUDENT_IMPORT_BATCH = 1000
+STUDENT_IMPORT_FIELDS = {"name", "email", "phone", "classes", "notes", "active", "notify_class_changes"}
+
+
+def parse_student_import(body: bytes, content_type: str) -> list:
+    if "csv" in content_type:
+        reader = csv.DictReader(io.StringIO(body.decode('utf-8-sig')))
+        rows = []
+        for record in reader:
+            row = {}
+            for key, value in record.items():
+                if key is None or value is None or value.strip() == "":
+                    continue
+                key = key.strip().lower()
+                # classes may be given as "id1;id2" or "id1|id2" in a single cell
+                row[key] = [c.strip() for c in value.replace("|", ";").split(";") if c.strip()] if key == "classes" else value.strip()
+            rows.append(row)
+        return rows
+    try:
+        data = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON array of students or CSV")
+    if isinstance(data, dict):
+        data = data.get("students")
+    if not isinstance(data, list):
+        raise HTTPException(status_code=400, detail="Body must be a JSON array of students or CSV")
+    return data
+
+
+@api_router.post("/admin/students/import")
+async def import_students(request: StarletteRequest, username: str = Depends(verify_token)):
+    """Create or update many students at once from a JSON array or CSV
+    (Content-Type: text/csv, header row with name,email,...). Returns counts
+    and per-row errors; rows are numbered from 1, excluding any CSV header."""
+    rows = parse_student_import(await request.body(), request.headers.get("content-type", ""))
+    if len(rows) > STUDENT_IMPORT_MAX_ROWS:
+        raise HTTPException(status_code=400, detail=f"Import is limited to {STUDENT_IMPORT_MAX_ROWS} rows")
+
+    errors = []
+    operations = []
+    operation_rows = []
+    seen_emails = {}
+    now = datetime.now(timezone.utc)
+    for row_number, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            errors.append({"row": row_number, "email": None, "error": "Row must be an object"})
+            continue
+        row = {k: v for k, v in row.items() if k in STUDENT_IMPORT_FIELDS}
+        try:
+            student = StudentModel(**row)
+        except Exception as e:
+            errors.append({"row": row_number, "email": row.get("email"), "error": str(e)})
+            continue
+        email = student.email.strip()
+        if email in seen_emails:
+            errors.append({"row": row_number, "email": email, "error": f"Duplicate of row {seen_emails[email]}"})
+            continue
+        seen_emails[email] = row_number
+
+        provided = student.model_dump(include=student.model_fields_set - {"classes"})
+        provided["email"] = email
+        provided["updated_at"] = now
+        update = {
+            "$set": provided,
+            "$setOnInsert": {
+                **student.model_dump(exclude=student.model_fields_set | {"created_at"}),
+                "id": student.id,
+                "created_at": now
+            }
+        }
+        update["$setOnInsert"].pop("classes", None)
+        update["$addToSet"] = {"classes": {"$each": student.classes}}
+        operations.append(UpdateOne({"email": email}, update, upsert=True))
+        operation_rows.append((row_number, email))
+
+    inserted = updated = 0
+    for offset in range(0, len(operations), STUDENT_IMPORT_BATCH):
+        batch = operations[offset:offset + STUDENT_IMPORT_BATCH]
+        try:
+            result = await db.students.bulk_write(batch, ordered=False)
+            details = result.bulk_api_result
+        except BulkWriteError as e:
+            details = e.details
+            for error in details.get("writeErrors", []):
+                row_number, email = operation_rows[offset + error["index"]]
+                if error.get("code") == 11000:
+                    # Two concurrent upserts of a new email: the other one won
+                    message = "A student with this email already exists"
+                else:
+                    message = error.get("errmsg", "Write failed")
+                errors.append({"row": row_number, "email": email, "error": message})
+        inserted += details.get("nUpserted", 0)
+        updated += details.get("nMatched", 0)
+
+    errors.sort(key=lambda e: e["row"])
     return {
-        "count": len(students),
-        "emails": [s['email'] for s in students],
-        "students": [{"name": s['name'], "email": s['email']} for s in students]
+        "received": len(rows),
+        "inserted": inserted,
+        "updated": updated,
+        "failed": len(errors),
+        "errors": errors
     }
 
+# ==================== DATA EXPORTS ====================
+
+# Admin exports stream straight off a Mongo cursor as CSV or NDJSON, projecting only
+# the requested columns, so memory stays flat however many rows are exported.
+EXPORT_CHUNK_ROWS = 500
+
+EXPORT_DATASETS = {
+    "students": {
+        "collection": "students",
+        "columns": ["id", "name", "email", "phone", "classes", "notes", "active", "notify_class_changes", "created_at"],
+        "default_columns": ["name", "email"],
+        "sort": [("name", ASCENDING), ("id", ASCENDING)],
+    },
+    "subscribers": {
+        "collection": "newsletter_subscriptions",
+        "columns": ["id", "email", "subscribed_at"],
+        "default_columns": ["email", "subscribed_at"],
+        "sort": [("subscribed_at", DESCENDING), ("id", DESCENDING)],
+    },
+    "orders": {
+        "collection": "orders",
+        "columns": [
+            "id", "created_at", "customer_name", "customer_email", "customer_phone", "items",
+            "shipping_address", "shipping_zone", "shipping_cost", "subtotal", "total",
+            "payment_status", "stripe_session_id", "order_notes",
+        ],
+        "default_columns": [
+            "id", "created_at", "customer_name", "customer_email", "shipping_zone",
+            "subtotal", "shipping_cost", "total", "payment_status",
+        ],
+        "sort": [("created_at", DESCENDING), ("id", DESCENDING)],
+    },
+}
+
+
+def export_json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def export_csv_cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, default=export_json_default)
+    text = str(value)
+    # Keep spreadsheet apps from evaluating customer-supplied text as a formula
+    if text[:1] in ("=", "+", "-", "@") and not isinstance(value, (int, float)):
+        return "'" + text
+    return text
+
+
+async def export_rows(cursor, columns: list, fmt: str):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if fmt == "csv":
+        writer.writerow(columns)
+    rows = 0
+    async for doc in cursor:
+        if fmt == "csv":
+            writer.writerow([export_csv_cell(doc.get(column)) for column in columns])
+        else:
+            buffer.write(json.dumps({column: doc.get(column) for column in columns}, default=export_json_default))
+            buffer.write("\n")
+        rows += 1
+        if rows % EXPORT_CHUNK_ROWS == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+def export_response(dataset: str, fmt: str, columns: Optional[str], query: dict = None) -> StreamingResponse:
+    spec = EXPORT_DATASETS[dataset]
+    if fmt not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+    selected = [c.strip() for c in columns.split(",") if c.strip()] if columns else spec["default_columns"]
+    unknown = [c for c in selected if c not in spec["columns"]]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown column(s): {', '.join(unknown)}")
+
+    projection = {"_id": 0, **{column: 1 for column in selected}}
+    cursor = db[spec["collection"]].find(query or {}, projection).sort(spec["sort"]).batch_size(1000)
+    filename = f"{dataset}-{datetime.now(timezone.utc):%Y%m%d}.{fmt}"
+    return StreamingResponse(
+        export_rows(cursor, selected, fmt),
+        media_type="text/csv; charset=utf-8" if fmt == "csv" else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@api_router.get("/admin/students/export")
+async def export_students_csv(
+    format: str = "csv",
+    columns: Optional[str] = None,
+    notify_only: bool = True,
+    username: str = Depends(verify_token)
+):
+    """Export students as CSV or NDJSON. By default only active students with
+    notify_class_changes=True, i.e. the class-change mailing list."""
+    query = {"active": True, "notify_class_changes": True} if notify_only else {}
+    return export_response("students", format, columns, query)
+
+
+@api_router.get("/admin/newsletter-subscriptions/export")
+async def export_newsletter_subscriptions(
+    format: str = "csv",
+    columns: Optional[str] = None,
+    username: str = Depends(verify_token)
+):
+    return export_response("subscribers", format, columns)
+
+
+@api_router.get("/admin/orders/export")
+async def export_orders(
+    format: str = "csv",
+    columns: Optional[str] = None,
+    payment_status: Optional[str] = None,
+    username: str = Depends(verify_token)
+):
+    query = {"payment_status": payment_status} if payment_status else {}
+    return export_response("orders", format, columns, query)
+
 
 # ==================== CLOUDINARY UPLOAD SIGNATURE ====================
 
-import time
 import cloudinary.utils
 
 @api_router.get("/admin/cloudinary/signature")
@@ -1437,36 +3318,29 @@ async def generate_cloudinary_signature(
 # ==================== MEDIA MANAGEMENT ====================
 
 @api_router.get("/media", response_model=List[MediaModel])
-async def get_public_media():
-    media = await db.media.find({}, {"_id": 0}).sort("displayOrder", 1).to_list(1000)
-    for item in media:
-        if isinstance(item.get('created_at'), str):
-            item['created_at'] = datetime.fromisoformat(item['created_at'])
-    return media
+async def get_public_media(request: StarletteRequest):
+    return await public_section_response(request, "media")
 
 @api_router.get("/admin/media", response_model=List[MediaModel])
 async def get_admin_media(username: str = Depends(verify_token)):
     media = await db.media.find({}, {"_id": 0}).sort("displayOrder", 1).to_list(1000)
-    for item in media:
-        if isinstance(item.get('created_at'), str):
-            item['created_at'] = datetime.fromisoformat(item['created_at'])
     return media
 
 @api_router.post("/admin/media", response_model=MediaModel)
 async def create_media(media: MediaModel, username: str = Depends(verify_token)):
     doc = media.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
     await db.media.insert_one(doc)
+    await invalidate_public_cache("media")
     return media
 
 @api_router.put("/admin/media/{media_id}", response_model=MediaModel)
 async def update_media(media_id: str, media: MediaModel, username: str = Depends(verify_token)):
     doc = media.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    doc['updated_at'] = datetime.now(timezone.utc).isoformat()
+    doc['updated_at'] = datetime.now(timezone.utc)
     result = await db.media.update_one({"id": media_id}, {"$set": doc})
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Media not found")
+    await invalidate_public_cache("media")
     return media
 
 @api_router.delete("/admin/media/{media_id}")
@@ -1474,18 +3348,15 @@ async def delete_media(media_id: str, username: str = Depends(verify_token)):
     result = await db.media.delete_one({"id": media_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Media not found")
+    await invalidate_public_cache("media")
     return {"message": "Media deleted successfully"}
 
 
 # ==================== SITE SETTINGS MANAGEMENT ====================
 
 @api_router.get("/site-settings")
-async def get_public_site_settings():
-    settings = await db.site_settings.find({}, {"_id": 0}).to_list(1000)
-    settings_dict = {}
-    for setting in settings:
-        settings_dict[setting['settingKey']] = setting['settingValue']
-    return JSONResponse(content=settings_dict, headers={"Cache-Control": "no-cache, no-store, must-revalidate"})
+async def get_public_site_settings(request: StarletteRequest):
+    return await public_section_response(request, "site-settings")
 
 @api_router.get("/site-settings/{key}")
 async def get_site_setting_by_key(key: str):
@@ -1497,9 +3368,6 @@ async def get_site_setting_by_key(key: str):
 @api_router.get("/admin/site-settings", response_model=List[SiteSettingsModel])
 async def get_admin_site_settings(username: str = Depends(verify_token)):
     settings = await db.site_settings.find({}, {"_id": 0}).to_list(1000)
-    for setting in settings:
-        if isinstance(setting.get('updated_at'), str):
-            setting['updated_at'] = datetime.fromisoformat(setting['updated_at'])
     return settings
 
 @api_router.post("/admin/site-settings", response_model=SiteSettingsModel)
@@ -1509,17 +3377,24 @@ async def create_site_setting(setting: SiteSettingsModel, username: str = Depend
         raise HTTPException(status_code=400, detail="Setting with this key already exists. Use PUT to update.")
     
     doc = setting.model_dump()
-    doc['updated_at'] = doc['updated_at'].isoformat()
-    await db.site_settings.insert_one(doc)
+    try:
+        await db.site_settings.insert_one(doc)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Setting with this key already exists. Use PUT to update.")
+    await invalidate_public_cache("site_settings")
     return setting
 
 @api_router.put("/admin/site-settings/{setting_id}", response_model=SiteSettingsModel)
 async def update_site_setting(setting_id: str, setting: SiteSettingsModel, username: str = Depends(verify_token)):
     doc = setting.model_dump()
-    doc['updated_at'] = datetime.now(timezone.utc).isoformat()
-    result = await db.site_settings.update_one({"id": setting_id}, {"$set": doc})
+    doc['updated_at'] = datetime.now(timezone.utc)
+    try:
+        result = await db.site_settings.update_one({"id": setting_id}, {"$set": doc})
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Setting with this key already exists")
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Setting not found")
+    await invalidate_public_cache("site_settings")
     return setting
 
 @api_router.delete("/admin/site-settings/{setting_id}")
@@ -1527,15 +3402,36 @@ async def delete_site_setting(setting_id: str, username: str = Depends(verify_to
     result = await db.site_settings.delete_one({"id": setting_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Setting not found")
+    await invalidate_public_cache("site_settings")
     return {"message": "Setting deleted successfully"}
 
 
 # ==================== SHOP / PRODUCTS ====================
 
-@api_router.get("/products")
-async def get_public_products():
+# Active products by id, in displayOrder, tagged with the products content version.
+# Serves /api/products only; checkout prices from the database. Product writes bump the version.
+_product_catalog = (None, {})
+
+
+async def active_product_catalog() -> dict:
+    global _product_catalog
+    version = content_version("products")
+    if _product_catalog[0] == version:
+        return _product_catalog[1]
     products = await db.products.find({"active": True}, {"_id": 0}).sort("displayOrder", 1).to_list(1000)
-    return products
+    catalog = {product['id']: product for product in products}
+    _product_catalog = (version, catalog)
+    return catalog
+
+
+async def load_public_products() -> bytes:
+    catalog = await active_product_catalog()
+    return json.dumps(jsonable_encoder(list(catalog.values()))).encode('utf-8')
+
+
+@api_router.get("/products")
+async def get_public_products(request: StarletteRequest):
+    return await public_section_response(request, "products")
 
 @api_router.get("/admin/products")
 async def get_admin_products(username: str = Depends(verify_token)):
@@ -1545,18 +3441,18 @@ async def get_admin_products(username: str = Depends(verify_token)):
 @api_router.post("/admin/products")
 async def create_product(product: ProductModel, username: str = Depends(verify_token)):
     doc = product.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
     await db.products.insert_one(doc)
+    await invalidate_public_cache("products")
     return {k: v for k, v in doc.items() if k != '_id'}
 
 @api_router.put("/admin/products/{product_id}")
 async def update_product(product_id: str, product: ProductModel, username: str = Depends(verify_token)):
     doc = product.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    doc['updated_at'] = datetime.now(timezone.utc).isoformat()
+    doc['updated_at'] = datetime.now(timezone.utc)
     result = await db.products.update_one({"id": product_id}, {"$set": doc})
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Product not found")
+    await invalidate_public_cache("products")
     return {k: v for k, v in doc.items() if k != '_id'}
 
 @api_router.delete("/admin/products/{product_id}")
@@ -1564,9 +3460,204 @@ async def delete_product(product_id: str, username: str = Depends(verify_token))
     result = await db.products.delete_one({"id": product_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Product not found")
+    await invalidate_public_cache("products")
     return {"message": "Product deleted successfully"}
 
 
+# ==================== BULK REORDER ====================
+
+# Admin URL segment -> collection for everything the public site sorts by displayOrder
+REORDERABLE_COLLECTIONS = {
+    "events": "events",
+    "past-events": "past_events",
+    "testimonials": "testimonials",
+    "coaches": "coaches",
+    "success-stories": "success_stories",
+    "endorsements": "endorsements",
+    "faqs": "faqs",
+    "tips": "tips",
+    "media": "media",
+    "products": "products",
+}
+
+
+class DisplayOrderItem(BaseModel):
+    id: str
+    displayOrder: int
+
+
+@api_router.patch("/admin/{collection}/order")
+async def reorder_collection(collection: str, items: List[DisplayOrderItem], username: str = Depends(verify_token)):
+    """Set displayOrder for many items of one collection in a single bulk_write."""
+    collection_name = REORDERABLE_COLLECTIONS.get(collection)
+    if not collection_name:
+        raise HTTPException(status_code=404, detail=f"Collection '{collection}' cannot be reordered")
+    ids = [item.id for item in items]
+    if len(set(ids)) != len(ids):
+        raise HTTPException(status_code=400, detail="Each id may appear only once")
+    if not items:
+        return {"matched": 0, "modified": 0, "missing": []}
+
+    result = await db[collection_name].bulk_write(
+        [UpdateOne({"id": item.id}, {"$set": {"displayOrder": item.displayOrder}}) for item in items],
+        ordered=False
+    )
+    missing = []
+    if result.matched_count < len(items):
+        found = {doc['id'] async for doc in db[collection_name].find({"id": {"$in": ids}}, {"_id": 0, "id": 1})}
+        missing = [item_id for item_id in ids if item_id not in found]
+    if result.modified_count:
+        await invalidate_public_cache(collection_name)
+    return {"matched": result.matched_count, "modified": result.modified_count, "missing": missing}
+
+
+# ==================== PAYMENT GATEWAY ====================
+
+STRIPE_TIMEOUT = float(os.environ.get('STRIPE_TIMEOUT', '10'))
+STRIPE_MAX_CONCURRENCY = int(os.environ.get('STRIPE_MAX_CONCURRENCY', '10'))
+STRIPE_BREAKER_THRESHOLD = int(os.environ.get('STRIPE_BREAKER_THRESHOLD', '5'))
+STRIPE_BREAKER_RESET = float(os.environ.get('STRIPE_BREAKER_RESET', '30'))
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__("circuit open")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures and rejects calls for `reset_timeout`
+    seconds; then lets a single trial call through and closes again if it succeeds."""
+
+    def __init__(self, threshold: int, reset_timeout: float):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def before_call(self):
+        if self.opened_at is None:
+            return
+        remaining = self.opened_at + self.reset_timeout - time.monotonic()
+        if remaining > 0 or self._trial_in_flight:
+            raise CircuitOpenError(max(remaining, 1))
+        self._trial_in_flight = True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def release_trial(self):
+        """End a call that says nothing about the provider's health."""
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+
+class PaymentGateway:
+    """App-lifetime Stripe client shared by checkout, order status and the webhook.
+
+    The Stripe SDK uses one pooled keep-alive HTTP client with a request timeout;
+    every outbound call is also bounded by asyncio.wait_for, a concurrency cap and
+    a circuit breaker so a slow Stripe fails fast instead of piling up requests.
+    """
+
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+        self._clients = {}
+        self._slots = asyncio.Semaphore(STRIPE_MAX_CONCURRENCY)
+        self.breaker = CircuitBreaker(STRIPE_BREAKER_THRESHOLD, STRIPE_BREAKER_RESET)
+        self._http_client = stripe.RequestsClient(timeout=STRIPE_TIMEOUT)
+        stripe.default_http_client = self._http_client
+
+    def checkout(self, webhook_url: str = "") -> StripeCheckout:
+        stripe_checkout = self._clients.get(webhook_url)
+        if stripe_checkout is None:
+            stripe_checkout = StripeCheckout(api_key=self.api_key, webhook_url=webhook_url)
+            self._clients[webhook_url] = stripe_checkout
+        return stripe_checkout
+
+    async def call(self, operation, *args):
+        name = getattr(operation, '__name__', 'call')
+        # Waiting for a slot counts against the same deadline as the call itself,
+        # so a backlog behind a slow Stripe is shed instead of queueing unbounded
+        try:
+            await asyncio.wait_for(self._slots.acquire(), STRIPE_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise HTTPException(
+                status_code=503,
+                detail="Payment provider busy, please try again shortly",
+                headers={"Retry-After": "1"}
+            )
+        try:
+            try:
+                self.breaker.before_call()
+            except CircuitOpenError as e:
+                raise HTTPException(
+                    status_code=503,
+                    detail="Payment provider temporarily unavailable, please try again shortly",
+                    headers={"Retry-After": str(int(e.retry_after))}
+                )
+            try:
+                with track_external_call("stripe", name):
+                    result = await asyncio.wait_for(operation(*args), STRIPE_TIMEOUT)
+            except (asyncio.TimeoutError, stripe.APIConnectionError, stripe.APIError) as e:
+                # Only an unreachable, slow or failing (5xx) Stripe trips the breaker
+                self.breaker.record_failure()
+                logging.error(f"Stripe call {name} failed: {str(e)}")
+                raise HTTPException(status_code=502, detail="Payment provider error, please try again")
+            except stripe.InvalidRequestError as e:
+                # Stripe answered; the request itself was bad (e.g. unknown session id)
+                self.breaker.record_success()
+                raise HTTPException(status_code=400, detail=e.user_message or "Invalid payment request")
+            except stripe.CardError as e:
+                self.breaker.record_success()
+                raise HTTPException(status_code=402, detail=e.user_message or "Payment was declined")
+            except stripe.RateLimitError:
+                self.breaker.release_trial()
+                logging.warning(f"Stripe rate limited {name}")
+                raise HTTPException(
+                    status_code=503,
+                    detail="Payment provider busy, please try again shortly",
+                    headers={"Retry-After": "1"}
+                )
+            except (stripe.AuthenticationError, stripe.PermissionError) as e:
+                # A bad or restricted API key is a configuration problem, not an outage
+                self.breaker.release_trial()
+                logging.error(f"Stripe rejected the API key for {name}: {str(e)}")
+                raise HTTPException(status_code=503, detail="Payments are temporarily unavailable")
+            except Exception as e:
+                self.breaker.release_trial()
+                logging.error(f"Stripe call {name} failed: {str(e)}")
+                raise HTTPException(status_code=502, detail="Payment provider error, please try again")
+            self.breaker.record_success()
+            return result
+        finally:
+            self._slots.release()
+
+    async def create_checkout_session(self, webhook_url: str, checkout_req: CheckoutSessionRequest) -> CheckoutSessionResponse:
+        return await self.call(self.checkout(webhook_url).create_checkout_session, checkout_req)
+
+    async def get_checkout_status(self, session_id: str) -> CheckoutStatusResponse:
+        return await self.call(self.checkout().get_checkout_status, session_id)
+
+    async def handle_webhook(self, webhook_url: str, body: bytes, signature: str):
+        # Signature verification is local; it doesn't go through the breaker
+        return await self.checkout(webhook_url).handle_webhook(body, signature)
+
+    def close(self):
+        self._http_client.close()
+
+
+payment_gateway: Optional[PaymentGateway] = None
+
+
 # ==================== SHOP CHECKOUT ====================
 
 @api_router.get("/shop/shipping-rates")
@@ -1578,10 +3669,17 @@ async def get_shipping_rates():
 
 @api_router.post("/shop/checkout")
 async def shop_checkout(req: CheckoutRequest, http_request: StarletteRequest):
+    # Price from the database, not this worker's catalog snapshot, which can lag an
+    # admin change made on another worker; one $in query covers the whole cart
+    products = {}
+    cart_ids = list({item.product_id for item in req.items})
+    async for product in db.products.find({"id": {"$in": cart_ids}, "active": True}, {"_id": 0}):
+        products[product['id']] = product
+
     items_for_order = []
     subtotal = 0.0
     for item in req.items:
-        product = await db.products.find_one({"id": item.product_id, "active": True}, {"_id": 0})
+        product = products.get(item.product_id)
         if not product:
             raise HTTPException(status_code=400, detail=f"Product not found: {item.product_id}")
         line_total = product['price'] * item.quantity
@@ -1613,10 +3711,8 @@ async def shop_checkout(req: CheckoutRequest, http_request: StarletteRequest):
         order_notes=req.order_notes
     )
 
-    stripe_api_key = os.environ.get('STRIPE_API_KEY')
     host_url = str(http_request.base_url).rstrip('/')
     webhook_url = f"{host_url}/api/webhook/stripe"
-    stripe_checkout = StripeCheckout(api_key=stripe_api_key, webhook_url=webhook_url)
 
     origin = req.origin_url.rstrip('/')
     success_url = f"{origin}/shop?session_id={{CHECKOUT_SESSION_ID}}"
@@ -1637,11 +3733,10 @@ async def shop_checkout(req: CheckoutRequest, http_request: StarletteRequest):
         }
     )
 
-    session = await stripe_checkout.create_checkout_session(checkout_req)
+    session = await payment_gateway.create_checkout_session(webhook_url, checkout_req)
 
     order.stripe_session_id = session.session_id
     order_doc = order.model_dump()
-    order_doc['created_at'] = order_doc['created_at'].isoformat()
     await db.orders.insert_one(order_doc)
 
     await db.payment_transactions.insert_one({
@@ -1652,36 +3747,83 @@ async def shop_checkout(req: CheckoutRequest, http_request: StarletteRequest):
         "currency": "cad",
         "payment_status": "pending",
         "metadata": {"order_id": order.id, "customer_email": req.customer_email},
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     })
 
     return {"checkout_url": session.url, "session_id": session.session_id, "order_id": order.id}
 
 
+# Stripe checkout status for sessions that are still pending, cached briefly.
+# Concurrent polls for one session share a single in-flight Stripe call.
+ORDER_STATUS_TTL = float(os.environ.get('ORDER_STATUS_TTL', '3'))
+TERMINAL_PAYMENT_STATUSES = ("paid", "expired")
+_checkout_status_cache = {}
+_checkout_status_inflight = {}
+
+
+async def _fetch_checkout_status(session_id: str) -> CheckoutStatusResponse:
+    try:
+        checkout_status = await payment_gateway.get_checkout_status(session_id)
+        now = time.monotonic()
+        if len(_checkout_status_cache) > 1000:
+            for key in [k for k, (expires, _) in _checkout_status_cache.items() if expires <= now]:
+                del _checkout_status_cache[key]
+        _checkout_status_cache[session_id] = (now + ORDER_STATUS_TTL, checkout_status)
+        return checkout_status
+    finally:
+        _checkout_status_inflight.pop(session_id, None)
+
+
+async def cached_checkout_status(session_id: str) -> CheckoutStatusResponse:
+    cached = _checkout_status_cache.get(session_id)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+    task = _checkout_status_inflight.get(session_id)
+    if task is None:
+        task = asyncio.ensure_future(_fetch_checkout_status(session_id))
+        _checkout_status_inflight[session_id] = task
+    # shield: one poller disconnecting must not cancel the call the others wait on
+    return await asyncio.shield(task)
+
+
+def order_status_response(order: dict) -> dict:
+    paid = order['payment_status'] == "paid"
+    return {
+        "status": "complete" if paid else "expired",
+        "payment_status": "paid" if paid else "unpaid",
+        "amount_total": int(round(order.get('total', 0) * 100)),
+        "currency": "cad"
+    }
+
+
 @api_router.get("/shop/order-status/{session_id}")
 async def get_order_status(session_id: str):
-    stripe_api_key = os.environ.get('STRIPE_API_KEY')
-    stripe_checkout = StripeCheckout(api_key=stripe_api_key, webhook_url="")
+    order = await db.orders.find_one({"stripe_session_id": session_id}, {"_id": 0})
+    if order and order.get('payment_status') in TERMINAL_PAYMENT_STATUSES:
+        return order_status_response(order)
 
-    checkout_status = await stripe_checkout.get_checkout_status(session_id)
+    checkout_status = await cached_checkout_status(session_id)
 
     new_status = "paid" if checkout_status.payment_status == "paid" else (
         "expired" if checkout_status.status == "expired" else "pending"
     )
 
-    order = await db.orders.find_one({"stripe_session_id": session_id}, {"_id": 0})
-    if order and order.get('payment_status') != 'paid':
-        await db.orders.update_one(
-            {"stripe_session_id": session_id},
-            {"$set": {"payment_status": new_status}}
-        )
-        await db.payment_transactions.update_one(
-            {"session_id": session_id},
+    if order and new_status == "paid":
+        await mark_order_paid(session_id)
+    elif order and new_status != order.get('payment_status'):
+        result = await db.orders.update_one(
+            {"stripe_session_id": session_id, "payment_status": {"$nin": list(TERMINAL_PAYMENT_STATUSES)}},
             {"$set": {"payment_status": new_status}}
         )
-
-        if new_status == "paid" and order.get('payment_status') != 'paid':
-            asyncio.ensure_future(send_order_emails(order))
+        if result.modified_count:
+            await db.payment_transactions.update_one(
+                {"session_id": session_id},
+                {"$set": {"payment_status": new_status}}
+            )
+            if new_status == "expired":
+                await live_event_hub.publish(
+                    f"order:{session_id}", "status", order_status_response({**order, "payment_status": new_status})
+                )
 
     return {
         "status": checkout_status.status,
@@ -1691,45 +3833,185 @@ async def get_order_status(session_id: str):
     }
 
 
+ORDER_STREAM_TIMEOUT = float(os.environ.get('ORDER_STREAM_TIMEOUT', '120'))
+
+
+@api_router.get("/shop/order-status/{session_id}/stream")
+async def stream_order_status(session_id: str, request: StarletteRequest):
+    """Server-sent events for one checkout session: a `status` event now, and another
+    the moment the order is paid or expires (the stream then ends). Sends `timeout`
+    if nothing settles within ORDER_STREAM_TIMEOUT."""
+    order = await db.orders.find_one({"stripe_session_id": session_id}, {"_id": 0, "payment_status": 1})
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+
+    # Subscribe before reading the current status so a transition in between is not missed
+    topic = f"order:{session_id}"
+    queue = live_event_hub.subscribe(topic)
+    try:
+        current = await get_order_status(session_id)
+    except Exception:
+        live_event_hub.unsubscribe(topic, queue)
+        raise
+
+    async def events():
+        try:
+            yield sse_message("status", current)
+            if current['payment_status'] == "paid" or current['status'] == "expired":
+                return
+            deadline = asyncio.get_running_loop().time() + ORDER_STREAM_TIMEOUT
+            while asyncio.get_running_loop().time() < deadline:
+                message = await next_live_message(request, queue)
+                if message is None:
+                    return
+                yield message
+                if not message.startswith(b":"):
+                    return
+                # Idle: a cheap local check covers a lost cross-worker relay event
+                order = await db.orders.find_one({"stripe_session_id": session_id}, {"_id": 0})
+                if order and order.get('payment_status') in TERMINAL_PAYMENT_STATUSES:
+                    yield sse_message("status", order_status_response(order))
+                    return
+            yield sse_message("timeout", {})
+        finally:
+            live_event_hub.unsubscribe(topic, queue)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+async def mark_order_paid(session_id: str) -> Optional[dict]:
+    """Move an order to paid exactly once. Returns the order only for the caller that
+    made the transition, so order emails are queued by a single writer."""
+    order = await db.orders.find_one_and_update(
+        {"stripe_session_id": session_id, "payment_status": {"$ne": "paid"}},
+        {"$set": {"payment_status": "paid", "paid_at": datetime.now(timezone.utc)}},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    if order is None:
+        return None
+    await db.payment_transactions.update_one(
+        {"session_id": session_id},
+        {"$set": {"payment_status": "paid"}}
+    )
+    await send_order_emails(order)
+    await live_event_hub.publish(f"order:{session_id}", "status", order_status_response(order))
+    return order
+
+
+# ==================== STRIPE WEBHOOK EVENTS ====================
+
+# The webhook only verifies the signature and stores the event in stripe_events
+# (event_id is unique, so Stripe's duplicate deliveries are dropped there), then
+# acknowledges. run_stripe_events() applies the state transitions afterwards.
+STRIPE_EVENT_MAX_ATTEMPTS = int(os.environ.get('STRIPE_EVENT_MAX_ATTEMPTS', '8'))
+STRIPE_EVENT_POLL_INTERVAL = float(os.environ.get('STRIPE_EVENT_POLL_INTERVAL', '5'))
+STRIPE_EVENT_LEASE = timedelta(seconds=60)
+
+_stripe_events_wakeup = asyncio.Event()
+
+
 @api_router.post("/webhook/stripe")
 async def stripe_webhook(request: StarletteRequest):
     body = await request.body()
     signature = request.headers.get("Stripe-Signature", "")
-    stripe_api_key = os.environ.get('STRIPE_API_KEY')
     host_url = str(request.base_url).rstrip('/')
     webhook_url = f"{host_url}/api/webhook/stripe"
-    stripe_checkout = StripeCheckout(api_key=stripe_api_key, webhook_url=webhook_url)
 
     try:
-        webhook_response = await stripe_checkout.handle_webhook(body, signature)
-        if webhook_response.payment_status == "paid":
-            order = await db.orders.find_one(
-                {"stripe_session_id": webhook_response.session_id}, {"_id": 0}
-            )
-            if order and order.get('payment_status') != 'paid':
-                await db.orders.update_one(
-                    {"stripe_session_id": webhook_response.session_id},
-                    {"$set": {"payment_status": "paid"}}
-                )
-                await db.payment_transactions.update_one(
-                    {"session_id": webhook_response.session_id},
-                    {"$set": {"payment_status": "paid"}}
-                )
-                asyncio.ensure_future(send_order_emails(order))
-        return {"status": "ok"}
+        webhook_response = await payment_gateway.handle_webhook(webhook_url, body, signature)
     except Exception as e:
         logging.error(f"Webhook error: {str(e)}")
-        return {"status": "error", "detail": str(e)}
+        raise HTTPException(status_code=400, detail="Invalid webhook payload or signature")
+
+    now = datetime.now(timezone.utc)
+    event_id = webhook_response.event_id or f"{webhook_response.event_type}:{webhook_response.session_id}"
+    try:
+        await db.stripe_events.insert_one({
+            "event_id": event_id,
+            "event_type": webhook_response.event_type,
+            "session_id": webhook_response.session_id,
+            "payment_status": webhook_response.payment_status,
+            "metadata": webhook_response.metadata,
+            "payload": body.decode('utf-8', errors='replace'),
+            "status": "pending",
+            "attempts": 0,
+            "next_attempt_at": now,
+            "received_at": now
+        })
+    except DuplicateKeyError:
+        return {"status": "ok", "duplicate": True}
+    _stripe_events_wakeup.set()
+    return {"status": "ok"}
+
+
+async def apply_stripe_event(event: dict):
+    session_id = event.get('session_id')
+    if event.get('payment_status') != "paid" or not session_id:
+        return
+    if await mark_order_paid(session_id) is None and event['attempts'] > 1:
+        # A previous attempt may have flipped the order and died before queueing
+        # the emails; the outbox idempotency keys make re-queueing them safe.
+        order = await db.orders.find_one({"stripe_session_id": session_id, "payment_status": "paid"}, {"_id": 0})
+        if order:
+            await send_order_emails(order)
+
+
+async def run_stripe_events():
+    while True:
+        try:
+            now = datetime.now(timezone.utc)
+            event = await db.stripe_events.find_one_and_update(
+                {"$or": [
+                    {"status": "pending", "next_attempt_at": {"$lte": now}},
+                    {"status": "processing", "locked_until": {"$lt": now}}
+                ]},
+                {"$set": {"status": "processing", "locked_until": now + STRIPE_EVENT_LEASE}, "$inc": {"attempts": 1}},
+                sort=[("next_attempt_at", ASCENDING)],
+                return_document=ReturnDocument.AFTER
+            )
+            if event is None:
+                _stripe_events_wakeup.clear()
+                try:
+                    await asyncio.wait_for(_stripe_events_wakeup.wait(), timeout=STRIPE_EVENT_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await apply_stripe_event(event)
+                update = {"status": "processed", "processed_at": datetime.now(timezone.utc)}
+            except Exception as e:
+                attempts = event['attempts']
+                if attempts < STRIPE_EVENT_MAX_ATTEMPTS:
+                    delay = min(2 ** attempts, EMAIL_OUTBOX_MAX_BACKOFF) * random.uniform(0.8, 1.2)
+                    update = {"status": "pending", "next_attempt_at": datetime.now(timezone.utc) + timedelta(seconds=delay)}
+                    logging.warning(f"Stripe event {event['event_id']} attempt {attempts} failed, retrying in {delay:.0f}s: {str(e)}")
+                else:
+                    update = {"status": "failed"}
+                    logging.error(f"Stripe event {event['event_id']} failed permanently: {str(e)}")
+                update["last_error"] = str(e)
+            await db.stripe_events.update_one({"_id": event['_id']}, {"$set": update, "$unset": {"locked_until": ""}})
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Stripe event worker error: {str(e)}")
+            await asyncio.sleep(STRIPE_EVENT_POLL_INTERVAL)
 
 
 @api_router.get("/admin/orders")
-async def get_admin_orders(username: str = Depends(verify_token)):
-    orders = await db.orders.find({}, {"_id": 0}).sort("created_at", -1).to_list(1000)
+async def get_admin_orders(
+    response: Response,
+    after: Optional[str] = None,
+    limit: int = Query(ADMIN_PAGE_SIZE, ge=1, le=10000),
+    username: str = Depends(verify_token)
+):
+    orders, next_cursor = await keyset_page("orders", "created_at", DESCENDING, after, limit)
+    set_next_cursor(response, next_cursor)
     return orders
 
 
 async def send_order_emails(order: dict):
-    """Send private notification to admin and confirmation to customer."""
+    """Queue private notification to admin and confirmation to customer."""
     try:
         items_html = ""
         for item in order.get('items', []):
@@ -1784,12 +4066,12 @@ async def send_order_emails(order: dict):
         </div>
         """
 
-        await asyncio.to_thread(resend.Emails.send, {
+        await enqueue_email({
             "from": SHOP_SENDER_EMAIL,
             "to": [NOTIFICATION_EMAIL],
             "subject": f"New Order: {order['customer_name']} - ${order['total']:.2f} CAD",
             "html": admin_html
-        })
+        }, f"order:{order['id']}:admin")
 
         customer_html = f"""
         <div style="font-family:Arial,sans-serif;max-width:600px;margin:0 auto;background:#111827;color:#fff;">
@@ -1842,17 +4124,271 @@ async def send_order_emails(order: dict):
         </div>
         """
 
-        await asyncio.to_thread(resend.Emails.send, {
+        await enqueue_email({
             "from": SHOP_SENDER_EMAIL,
             "to": [order['customer_email']],
             "subject": f"Order Confirmation - TC Pro Dojo #{order['id'][:8]}",
             "html": customer_html
-        })
+        }, f"order:{order['id']}:customer")
+
+        logging.info(f"Order emails queued for order {order['id']}")
+
+    except Exception as e:
+        logging.error(f"Failed to queue order emails: {str(e)}")
+
+
+# ==================== DATABASE INDEXES ====================
+
+def _index(keys, **options):
+    if isinstance(keys, str):
+        keys = [(keys, ASCENDING)]
+    return IndexModel(keys, **options)
+
+
+# Every index the query paths above rely on. Declared idempotently on startup;
+# unique only where the handlers already assume one document per key.
+REQUIRED_INDEXES = {
+    "events": [_index("id"), _index("displayOrder")],
+    "past_events": [_index("id"), _index("displayOrder")],
+    "testimonials": [_index("id"), _index("displayOrder")],
+    "coaches": [_index("id"), _index("displayOrder")],
+    "success_stories": [_index("id"), _index("displayOrder")],
+    "endorsements": [_index("id"), _index("displayOrder")],
+    "faqs": [_index("id"), _index("displayOrder")],
+    "tips": [_index("id"), _index("displayOrder")],
+    "media": [_index("id"), _index("displayOrder")],
+    "classes": [_index("id")],
+    "cancelled_classes": [_index("id")],
+    "site_settings": [_index("id"), _index("settingKey", unique=True)],
+    "products": [_index("id"), _index([("active", ASCENDING), ("displayOrder", ASCENDING)])],
+    "orders": [_index("id"), _index("stripe_session_id"), _index([("created_at", DESCENDING), ("id", DESCENDING)])],
+    "payment_transactions": [_index("session_id")],
+    "newsletter_subscriptions": [
+        _index("id"),
+        _index("email", unique=True),
+        _index([("subscribed_at", DESCENDING), ("id", DESCENDING)]),
+    ],
+    "newsletter_logs": [
+        _index("id"),
+        _index([("sent_at", DESCENDING)]),
+        _index([("status", ASCENDING), ("locked_until", ASCENDING)]),
+    ],
+    "students": [
+        _index("id"),
+        _index("email", unique=True),
+        _index([("name", ASCENDING), ("id", ASCENDING)]),
+        _index(STUDENT_NOTIFY_INDEX),
+    ],
+    "admins": [_index("username")],
+    "login_failures": [_index("expires_at", expireAfterSeconds=0)],
+    "email_outbox": [
+        _index("idempotency_key", unique=True),
+        _index([("status", ASCENDING), ("next_attempt_at", ASCENDING)]),
+        _index([("status", ASCENDING), ("locked_until", ASCENDING)]),
+        _index([("group", ASCENDING), ("status", ASCENDING)], sparse=True),
+        # Sent messages are kept this long for idempotency and delivery stats, then expire
+        _index("sent_at", expireAfterSeconds=EMAIL_OUTBOX_RETENTION_DAYS * 86400),
+    ],
+    "class_notifications": [
+        _index("id", unique=True),
+        _index([("state", ASCENDING), ("locked_until", ASCENDING)]),
+    ],
+    "stripe_events": [
+        _index("event_id", unique=True),
+        _index([("status", ASCENDING), ("next_attempt_at", ASCENDING)]),
+        _index([("status", ASCENDING), ("locked_until", ASCENDING)]),
+    ],
+    "contacts": [_index("id"), _index([("created_at", DESCENDING), ("id", DESCENDING)])],
+    "bookings": [_index("id"), _index([("created_at", DESCENDING), ("id", DESCENDING)])],
+}
+
+
+async def ensure_indexes():
+    """Create any missing REQUIRED_INDEXES, collections in parallel. Failures (e.g.
+    duplicate keys blocking a unique index) are logged rather than raised."""
+    async def ensure_collection_indexes(collection, indexes):
+        for index in indexes:
+            try:
+                await db[collection].create_indexes([index])
+            except Exception as e:
+                logging.error(f"Failed to create index {index.document['name']} on {collection}: {str(e)}")
+
+    await asyncio.gather(*(
+        ensure_collection_indexes(collection, indexes) for collection, indexes in REQUIRED_INDEXES.items()
+    ))
+
+
+async def build_indexes():
+    """Background startup task: builds on large collections must not hold up boot."""
+    await ensure_indexes()
+    try:
+        for collection, problems in (await index_report()).items():
+            logging.warning(f"Index mismatch on {collection}: missing={problems['missing']} extra={problems['extra']}")
+    except Exception as e:
+        logging.error(f"Failed to check indexes: {str(e)}")
+
+
+async def index_report() -> dict:
+    """Declared indexes missing from the database, and indexes nobody declared."""
+    report = {}
+    for collection, indexes in REQUIRED_INDEXES.items():
+        declared = {index.document['name'] for index in indexes}
+        existing = set(await db[collection].index_information()) - {"_id_"}
+        missing = sorted(declared - existing)
+        extra = sorted(existing - declared)
+        if missing or extra:
+            report[collection] = {"missing": missing, "extra": extra}
+    return report
+
+
+@api_router.get("/admin/indexes")
+async def get_index_report(username: str = Depends(verify_token)):
+    return await index_report()
 
-        logging.info(f"Order emails sent for order {order['id']}")
 
+@api_router.get("/admin/perf/slow-queries")
+async def get_slow_queries(
+    hours: float = Query(24, gt=0),
+    limit: int = Query(20, ge=1, le=200),
+    username: str = Depends(verify_token)
+):
+    """Slowest command shapes recorded in the last `hours`, worst total time first."""
+    since = datetime.now(timezone.utc) - timedelta(hours=hours)
+    return await db.perf_slow_queries.aggregate([
+        {"$match": {"at": {"$gte": since}}},
+        {"$sort": {"at": 1}},
+        {"$group": {
+            "_id": "$fingerprint",
+            "collection": {"$last": "$collection"},
+            "command": {"$last": "$command"},
+            "shape": {"$last": "$shape"},
+            "count": {"$sum": 1},
+            "total_ms": {"$sum": "$duration_ms"},
+            "avg_ms": {"$avg": "$duration_ms"},
+            "max_ms": {"$max": "$duration_ms"},
+            "last_seen": {"$last": "$at"},
+            "plans": {"$addToSet": "$plan"}
+        }},
+        {"$sort": {"total_ms": -1}},
+        {"$limit": limit},
+        {"$project": {"_id": 0, "fingerprint": "$_id", "collection": 1, "command": 1, "shape": 1, "count": 1,
+                      "total_ms": 1, "avg_ms": 1, "max_ms": 1, "last_seen": 1, "plans": 1}}
+    ]).to_list(limit)
+
+
+# ==================== DATETIME MIGRATION ====================
+
+# Timestamp fields that older code wrote as ISO strings. New writes store BSON
+# dates, which sort correctly and come back as aware datetimes (tz_aware=True).
+DATETIME_FIELDS = {
+    "status_checks": ["timestamp"],
+    "bookings": ["created_at"],
+    "contacts": ["created_at"],
+    "admins": ["created_at"],
+    "events": ["created_at"],
+    "past_events": ["created_at", "updated_at"],
+    "testimonials": ["created_at"],
+    "coaches": ["created_at", "updated_at"],
+    "success_stories": ["created_at", "updated_at"],
+    "endorsements": ["created_at", "updated_at"],
+    "faqs": ["created_at"],
+    "tips": ["created_at"],
+    "classes": ["created_at"],
+    "cancelled_classes": ["created_at"],
+    "media": ["created_at", "updated_at"],
+    "site_settings": ["updated_at"],
+    "newsletter_subscriptions": ["subscribed_at"],
+    "newsletter_logs": ["sent_at"],
+    "students": ["created_at", "updated_at"],
+    "products": ["created_at", "updated_at"],
+    "orders": ["created_at"],
+    "payment_transactions": ["created_at"],
+}
+
+
+# Only one worker runs a migration at a time: it holds a lease on the migration's
+# document, renewed as it makes progress. Other workers skip it; if the holder dies,
+# the next worker to start picks it up once the lease has lapsed.
+MIGRATION_LEASE = int(os.environ.get('MIGRATION_LEASE', '300'))
+
+
+async def claim_migration(name: str) -> bool:
+    """Take the lease on an unfinished migration. False if it is done or held elsewhere."""
+    now = datetime.now(timezone.utc)
+    try:
+        await db.migrations.find_one_and_update(
+            {"_id": name, "completed_at": {"$exists": False}, "$or": [
+                {"locked_until": {"$lt": now}},
+                {"locked_until": {"$exists": False}}
+            ]},
+            {"$set": {"owner": WORKER_ID, "locked_until": now + timedelta(seconds=MIGRATION_LEASE)}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # The document exists but didn't match: completed, or leased by another worker
+        return False
+    return True
+
+
+async def renew_migration(name: str):
+    result = await db.migrations.update_one(
+        {"_id": name, "owner": WORKER_ID},
+        {"$set": {"locked_until": datetime.now(timezone.utc) + timedelta(seconds=MIGRATION_LEASE)}}
+    )
+    if not result.matched_count:
+        raise RuntimeError(f"Lost the lease on migration {name}")
+
+
+async def migrate_datetime_fields(batch_size: int = 500):
+    """Convert ISO-string timestamps to BSON dates in place, once.
+
+    Each update is conditioned on the original string, so it is safe to run while
+    the app serves traffic; completion is recorded in the migrations collection.
+    """
+    name = "bson_datetimes"
+    try:
+        if not await claim_migration(name):
+            return
+        for collection, fields in DATETIME_FIELDS.items():
+            for field in fields:
+                converted = 0
+                batch = []
+                async for doc in db[collection].find({field: {"$type": "string"}}, {field: 1}):
+                    try:
+                        value = datetime.fromisoformat(doc[field])
+                    except ValueError:
+                        logging.warning(f"Unparseable {collection}.{field} on {doc['_id']}: {doc[field]!r}")
+                        continue
+                    if value.tzinfo is None:
+                        value = value.replace(tzinfo=timezone.utc)
+                    batch.append(UpdateOne({"_id": doc["_id"], field: doc[field]}, {"$set": {field: value}}))
+                    if len(batch) >= batch_size:
+                        converted += (await db[collection].bulk_write(batch, ordered=False)).modified_count
+                        batch = []
+                        await renew_migration(name)
+                if batch:
+                    converted += (await db[collection].bulk_write(batch, ordered=False)).modified_count
+                if converted:
+                    logging.info(f"Converted {converted} {collection}.{field} values to BSON dates")
+                    if collection in PUBLIC_COLLECTIONS:
+                        await invalidate_public_cache(collection)
+                await renew_migration(name)
+        await db.migrations.update_one(
+            {"_id": name, "owner": WORKER_ID},
+            {"$set": {"completed_at": datetime.now(timezone.utc)}, "$unset": {"locked_until": ""}}
+        )
     except Exception as e:
-        logging.error(f"Failed to send order emails: {str(e)}")
+        logging.error(f"Migration {name} failed: {str(e)}")
+
+
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: StarletteRequest):
+    if METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return Response(content=render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 # Include the router in the main app
@@ -1863,7 +4399,8 @@ from starlette.middleware.base import BaseHTTPMiddleware
 class NoCacheMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request, call_next):
         response = await call_next(request)
-        if request.url.path.startswith("/api"):
+        # Public content responses carry an ETag and revalidate instead of being no-store
+        if request.url.path.startswith("/api") and "etag" not in response.headers:
             response.headers["Cache-Control"] = "no-store, no-cache, must-revalidate, max-age=0"
             response.headers["Pragma"] = "no-cache"
             response.headers["Expires"] = "0"
@@ -1877,8 +4414,13 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, CACHE_REFRESH_HEADER],
 )
 
+app.add_middleware(CacheRefreshMiddleware)
+
+app.add_middleware(MetricsMiddleware)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -1886,6 +4428,34 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+background_tasks = []
+
+@app.on_event("startup")
+async def start_background_tasks():
+    global payment_gateway
+    payment_gateway = PaymentGateway(os.environ.get('STRIPE_API_KEY'))
+    background_tasks.append(asyncio.create_task(build_indexes()))
+    try:
+        await ensure_live_events_collection()
+    except Exception as e:
+        logging.critical(f"Failed to set up the capped live_events collection: {str(e)}")
+    background_tasks.append(asyncio.create_task(watch_content_versions()))
+    background_tasks.append(asyncio.create_task(migrate_datetime_fields()))
+    for _ in range(EMAIL_OUTBOX_CONCURRENCY):
+        background_tasks.append(asyncio.create_task(run_email_outbox()))
+    background_tasks.append(asyncio.create_task(run_stripe_events()))
+    background_tasks.append(asyncio.create_task(resume_newsletter_jobs()))
+    background_tasks.append(asyncio.create_task(run_class_notification_jobs()))
+    background_tasks.append(asyncio.create_task(relay_live_events()))
+    slow_query_log.attach(asyncio.get_running_loop())
+    background_tasks.append(asyncio.create_task(slow_query_log.run()))
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    password_executor.shutdown(wait=False)
+    if payment_gateway:
+        payment_gateway.close()
     client.close()
@@ -0,0 +1,81 @@
+"""
+TC Pro Dojo Admin Login Throttle Tests
+Failed logins lock out the (username, client) pair without locking the real admin out
+"""
+import pytest
+import requests
+import os
+import uuid
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+LOGIN_FAILURE_LIMIT = int(os.environ.get('LOGIN_FAILURE_LIMIT', '5'))
+
+
+@pytest.fixture
+def api_client():
+    """Unauthenticated session"""
+    session = requests.Session()
+    session.headers.update({"Content-Type": "application/json"})
+    return session
+
+
+class TestLoginThrottle:
+    """POST /api/admin/login refuses a username after repeated failures from one client"""
+
+    def test_repeated_failures_lock_out_username(self, api_client):
+        """The attempt after LOGIN_FAILURE_LIMIT failures gets 429 with Retry-After"""
+        username = f"TEST_nobody_{uuid.uuid4().hex[:8]}"
+        for _ in range(LOGIN_FAILURE_LIMIT):
+            response = api_client.post(f"{BASE_URL}/api/admin/login", json={
+                "username": username,
+                "password": "wrong-password"
+            })
+            assert response.status_code == 401, f"Expected 401, got {response.status_code}"
+
+        response = api_client.post(f"{BASE_URL}/api/admin/login", json={
+            "username": username,
+            "password": "wrong-password"
+        })
+        assert response.status_code == 429, f"Expected 429, got {response.status_code}"
+        assert int(response.headers.get("Retry-After", "0")) > 0
+        print(f"✓ {username} locked out after {LOGIN_FAILURE_LIMIT} failures")
+
+    def test_lockout_does_not_block_other_usernames(self, api_client):
+        """A locked-out username doesn't stop the admin logging in from the same client"""
+        username = f"TEST_nobody_{uuid.uuid4().hex[:8]}"
+        for _ in range(LOGIN_FAILURE_LIMIT + 1):
+            api_client.post(f"{BASE_URL}/api/admin/login", json={
+                "username": username,
+                "password": "wrong-password"
+            })
+
+        response = api_client.post(f"{BASE_URL}/api/admin/login", json={
+            "username": "admin",
+            "password": "tcprodojo2025"
+        })
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        assert "access_token" in response.json()
+        print("✓ Admin login unaffected by another username's lockout")
+
+    def test_spoofed_forwarded_for_does_not_reset_lockout(self, api_client):
+        """Client-supplied X-Forwarded-For entries can't be used to dodge the lockout"""
+        username = f"TEST_nobody_{uuid.uuid4().hex[:8]}"
+        for i in range(LOGIN_FAILURE_LIMIT):
+            api_client.post(f"{BASE_URL}/api/admin/login", json={
+                "username": username,
+                "password": "wrong-password"
+            }, headers={"X-Forwarded-For": f"203.0.113.{i + 1}"})
+
+        response = api_client.post(f"{BASE_URL}/api/admin/login", json={
+            "username": username,
+            "password": "wrong-password"
+        }, headers={"X-Forwarded-For": "203.0.113.200"})
+        assert response.status_code == 429, f"Expected 429, got {response.status_code}"
+        print("✓ Spoofed X-Forwarded-For still throttled")
+
+        # Successful login clears this client's counters so later tests start clean
+        response = api_client.post(f"{BASE_URL}/api/admin/login", json={
+            "username": "admin",
+            "password": "tcprodojo2025"
+        })
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
@@ -0,0 +1,107 @@
+"""
+TC Pro Dojo Admin List Pagination Tests
+Keyset pagination (?after=&limit=) with the next cursor in the X-Next-Cursor header
+"""
+import pytest
+import requests
+import os
+import uuid
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+@pytest.fixture(scope="module")
+def api_client():
+    """Authenticated admin session"""
+    response = requests.post(f"{BASE_URL}/api/admin/login", json={
+        "username": "admin",
+        "password": "tcprodojo2025"
+    })
+    assert response.status_code == 200, f"Admin login failed: {response.text}"
+    session = requests.Session()
+    session.headers.update({
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {response.json()['access_token']}"
+    })
+    return session
+
+
+@pytest.fixture(scope="module")
+def test_students(api_client):
+    """Three students so there is always more than one page at limit=2"""
+    created = []
+    for i in range(3):
+        response = api_client.post(f"{BASE_URL}/api/admin/students", json={
+            "name": f"TEST_Page Student {i}",
+            "email": f"test_page_{uuid.uuid4().hex[:8]}@example.com"
+        })
+        assert response.status_code == 200
+        created.append(response.json()['id'])
+    yield created
+    for student_id in created:
+        api_client.delete(f"{BASE_URL}/api/admin/students/{student_id}")
+
+
+class TestKeysetPagination:
+    """Walking every page returns each document exactly once, in order"""
+
+    def walk(self, api_client, path, limit):
+        items, cursor = [], None
+        while True:
+            params = {"limit": limit}
+            if cursor:
+                params["after"] = cursor
+            response = api_client.get(f"{BASE_URL}{path}", params=params)
+            assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+            page = response.json()
+            assert len(page) <= limit
+            items.extend(page)
+            cursor = response.headers.get('X-Next-Cursor')
+            if not cursor:
+                return items
+
+    def test_students_pages_cover_full_list(self, api_client, test_students):
+        """Paged students equal the unpaged list"""
+        full = api_client.get(f"{BASE_URL}/api/admin/students", params={"limit": 10000}).json()
+        paged = self.walk(api_client, "/api/admin/students", limit=2)
+        assert [s['id'] for s in paged] == [s['id'] for s in full]
+        assert len({s['id'] for s in paged}) == len(paged), "Duplicate student across pages"
+        print(f"✓ Walked {len(paged)} students in pages of 2")
+
+    def test_orders_pages_cover_full_list(self, api_client):
+        """Paged orders equal the unpaged list"""
+        full = api_client.get(f"{BASE_URL}/api/admin/orders", params={"limit": 10000}).json()
+        paged = self.walk(api_client, "/api/admin/orders", limit=5)
+        assert [o['id'] for o in paged] == [o['id'] for o in full]
+        print(f"✓ Walked {len(paged)} orders in pages of 5")
+
+    def test_last_page_has_no_cursor(self, api_client, test_students):
+        """A page that reaches the end omits X-Next-Cursor"""
+        response = api_client.get(f"{BASE_URL}/api/admin/students", params={"limit": 10000})
+        assert response.status_code == 200
+        assert 'X-Next-Cursor' not in response.headers
+        print("✓ No cursor on the final page")
+
+    def test_default_page_size(self, api_client):
+        """Without ?limit= the admin lists return one page of at most 100 rows"""
+        for path in ("/api/admin/students", "/api/admin/newsletter-subscriptions", "/api/admin/orders"):
+            response = api_client.get(f"{BASE_URL}{path}")
+            assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+            assert len(response.json()) <= 100
+        print("✓ Admin lists default to pages of 100")
+
+    def test_counts_cover_all_pages(self, api_client, test_students):
+        """/api/admin/counts totals match the fully walked lists"""
+        counts = api_client.get(f"{BASE_URL}/api/admin/counts").json()
+        students = self.walk(api_client, "/api/admin/students", limit=100)
+        subscriptions = self.walk(api_client, "/api/admin/newsletter-subscriptions", limit=100)
+        assert counts['students']['total'] == len(students)
+        assert counts['students']['active'] == len([s for s in students if s['active']])
+        assert counts['newsletter']['total'] == len(subscriptions)
+        print(f"✓ Counts match: {len(students)} students, {len(subscriptions)} subscribers")
+
+    def test_invalid_cursor(self, api_client):
+        """A malformed cursor is rejected"""
+        response = api_client.get(f"{BASE_URL}/api/admin/newsletter-subscriptions", params={"after": "not-a-cursor"})
+        assert response.status_code == 400
+        print("✓ Invalid cursor rejected with 400")
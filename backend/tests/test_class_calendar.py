@@ -0,0 +1,251 @@
+"""
+TC Pro Dojo Class Calendar Tests
+Calendar expansion, iCalendar feeds and live schedule pushes built from classes and cancellations
+"""
+import json
+import threading
+import time
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+# A fixed Monday-to-Sunday week
+WEEK_FROM = "2030-03-04"
+WEEK_TO = "2030-03-10"
+
+
+@pytest.fixture(scope="module")
+def api_client():
+    """Authenticated admin session"""
+    response = requests.post(f"{BASE_URL}/api/admin/login", json={
+        "username": "admin",
+        "password": "tcprodojo2025"
+    })
+    assert response.status_code == 200, f"Admin login failed: {response.text}"
+    session = requests.Session()
+    session.headers.update({
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {response.json()['access_token']}"
+    })
+    return session
+
+
+@pytest.fixture(scope="module")
+def test_classes(api_client):
+    """One class per legacy timing format, plus a one-time class"""
+    payloads = [
+        {"title": "TEST_Calendar schedule", "instructor": "Test", "level": "All",
+         "schedule": [{"day": "Monday", "time": "6:00 PM - 8:00 PM"}, {"day": "Wednesday", "time": "7:00 PM - 9:00 PM"}]},
+        {"title": "TEST_Calendar days", "instructor": "Test", "level": "All",
+         "days": ["Tuesday", "Thursday"], "time": "5:00 PM - 6:00 PM"},
+        {"title": "TEST_Calendar day", "instructor": "Test", "level": "All",
+         "day": "Saturday", "time": "10:00 AM - 12:00 PM"},
+        {"title": "TEST_Calendar one-time", "instructor": "Test", "level": "All",
+         "is_one_time": True, "one_time_date": "2030-03-08", "time": "6:00 PM - 7:00 PM"},
+    ]
+    created = []
+    for payload in payloads:
+        response = api_client.post(f"{BASE_URL}/api/admin/classes", json=payload)
+        assert response.status_code == 200, f"Create class failed: {response.text}"
+        created.append(response.json())
+    yield {c['title']: c for c in created}
+    for cls in created:
+        api_client.delete(f"{BASE_URL}/api/admin/classes/{cls['id']}")
+
+
+class TestCalendarExpansion:
+    """Occurrences for every legacy class format"""
+
+    def test_expands_all_formats(self, test_classes):
+        """Each format yields the expected dates in the requested week"""
+        response = requests.get(f"{BASE_URL}/api/calendar", params={"from": WEEK_FROM, "to": WEEK_TO})
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        occurrences = response.json()
+
+        def dates(title):
+            class_id = test_classes[title]['id']
+            return sorted(o['date'] for o in occurrences if o['class_id'] == class_id)
+
+        assert dates("TEST_Calendar schedule") == ["2030-03-04", "2030-03-06"]
+        assert dates("TEST_Calendar days") == ["2030-03-05", "2030-03-07"]
+        assert dates("TEST_Calendar day") == ["2030-03-09"]
+        assert dates("TEST_Calendar one-time") == ["2030-03-08"]
+
+        wednesday = next(o for o in occurrences
+                         if o['class_id'] == test_classes["TEST_Calendar schedule"]['id'] and o['date'] == "2030-03-06")
+        assert wednesday['start'] == "19:00" and wednesday['end'] == "21:00"
+        assert occurrences == sorted(occurrences, key=lambda o: (o['date'], o['start'] or '99:99', o['title']))
+        print(f"✓ Calendar expanded {len(occurrences)} occurrences for the week")
+
+    def test_cancellation_and_reschedule_applied(self, api_client, test_classes):
+        """Cancelled and rescheduled dates are flagged on their occurrence only"""
+        class_id = test_classes["TEST_Calendar days"]['id']
+        cancel = api_client.post(f"{BASE_URL}/api/admin/classes/cancel", json={
+            "class_id": class_id, "cancelled_date": "2030-03-05", "status": "cancelled", "reason": "TEST"
+        }).json()
+        reschedule = api_client.post(f"{BASE_URL}/api/admin/classes/cancel", json={
+            "class_id": class_id, "cancelled_date": "2030-03-07", "status": "rescheduled",
+            "rescheduled_time": "8:00 PM - 9:00 PM", "reason": "TEST"
+        }).json()
+        try:
+            occurrences = requests.get(f"{BASE_URL}/api/calendar", params={"from": WEEK_FROM, "to": WEEK_TO}).json()
+            by_date = {o['date']: o for o in occurrences if o['class_id'] == class_id}
+            assert by_date["2030-03-05"]['status'] == "cancelled"
+            assert by_date["2030-03-07"]['status'] == "rescheduled"
+            assert by_date["2030-03-07"]['rescheduled_time'] == "8:00 PM - 9:00 PM"
+        finally:
+            api_client.delete(f"{BASE_URL}/api/admin/classes/cancel/{cancel['id']}")
+            api_client.delete(f"{BASE_URL}/api/admin/classes/cancel/{reschedule['id']}")
+
+        occurrences = requests.get(f"{BASE_URL}/api/calendar", params={"from": WEEK_FROM, "to": WEEK_TO}).json()
+        assert all(o['status'] == "scheduled" for o in occurrences if o['class_id'] == class_id)
+        print("✓ Cancellations and reschedules applied, and cleared when removed")
+
+
+class TestCalendarValidation:
+    """Range validation and conditional requests"""
+
+    def test_default_range_is_current_week(self):
+        """No parameters returns at most one week of occurrences"""
+        response = requests.get(f"{BASE_URL}/api/calendar")
+        assert response.status_code == 200
+        assert len({o['date'] for o in response.json()}) <= 7
+        print("✓ Default calendar range is the current week")
+
+    @pytest.mark.parametrize("params", [
+        {"from": "2030-03-10", "to": "2030-03-04"},
+        {"from": "not-a-date"},
+        {"from": "2030-01-01", "to": "2032-01-01"},
+    ])
+    def test_invalid_ranges_rejected(self, params):
+        """Bad dates, inverted and oversized ranges get 400"""
+        response = requests.get(f"{BASE_URL}/api/calendar", params=params)
+        assert response.status_code == 400, f"Expected 400 for {params}, got {response.status_code}"
+        print(f"✓ Rejected {params}")
+
+    def test_calendar_etag(self):
+        """Matching If-None-Match gets 304"""
+        response = requests.get(f"{BASE_URL}/api/calendar", params={"from": WEEK_FROM, "to": WEEK_TO})
+        etag = response.headers.get('ETag')
+        assert etag
+        response = requests.get(f"{BASE_URL}/api/calendar", params={"from": WEEK_FROM, "to": WEEK_TO},
+                                headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        print("✓ Calendar answered 304 for matching ETag")
+
+
+class TestICalendarFeed:
+    """GET /api/classes.ics and /api/classes/{id}.ics"""
+
+    def test_full_feed(self, test_classes):
+        """The feed is a VCALENDAR with a weekly event per schedule entry"""
+        response = requests.get(f"{BASE_URL}/api/classes.ics")
+        assert response.status_code == 200
+        assert response.headers['Content-Type'].startswith("text/calendar")
+        body = response.text
+        assert body.startswith("BEGIN:VCALENDAR\r\n") and body.endswith("END:VCALENDAR\r\n")
+        class_id = test_classes["TEST_Calendar schedule"]['id']
+        assert f"UID:{class_id}-0-mo@tcprodojo.com" in body
+        assert f"UID:{class_id}-1-we@tcprodojo.com" in body
+        assert "RRULE:FREQ=WEEKLY;BYDAY=MO" in body
+        print("✓ Full iCalendar feed generated")
+
+    def test_same_weekday_entries_have_distinct_uids(self, api_client):
+        """Two sessions on the same weekday are separate events"""
+        cls = api_client.post(f"{BASE_URL}/api/admin/classes", json={
+            "title": "TEST_Calendar twice", "instructor": "Test", "level": "All",
+            "schedule": [{"day": "Monday", "time": "10:00 AM - 11:00 AM"}, {"day": "Monday", "time": "6:00 PM - 8:00 PM"}]
+        }).json()
+        try:
+            body = requests.get(f"{BASE_URL}/api/classes/{cls['id']}.ics").text
+            uids = [line for line in body.split("\r\n") if line.startswith("UID:")]
+            assert len(uids) == 2 and len(set(uids)) == 2, f"Expected two distinct UIDs, got {uids}"
+            print("✓ Same-weekday sessions get distinct UIDs")
+        finally:
+            api_client.delete(f"{BASE_URL}/api/admin/classes/{cls['id']}")
+
+    def test_class_feed_with_cancellation(self, api_client, test_classes):
+        """Cancellations become EXDATE and reschedules RECURRENCE-ID overrides"""
+        class_id = test_classes["TEST_Calendar day"]['id']
+        etag = requests.get(f"{BASE_URL}/api/classes/{class_id}.ics").headers.get('ETag')
+        cancel = api_client.post(f"{BASE_URL}/api/admin/classes/cancel", json={
+            "class_id": class_id, "cancelled_date": "2030-03-09", "status": "cancelled"
+        }).json()
+        reschedule = api_client.post(f"{BASE_URL}/api/admin/classes/cancel", json={
+            "class_id": class_id, "cancelled_date": "2030-03-16", "status": "rescheduled",
+            "rescheduled_time": "1:00 PM - 3:00 PM"
+        }).json()
+        try:
+            response = requests.get(f"{BASE_URL}/api/classes/{class_id}.ics", headers={"If-None-Match": etag})
+            assert response.status_code == 200, "Cancellation should change the feed ETag"
+            body = response.text
+            assert "EXDATE;TZID=America/Toronto:20300309T100000" in body
+            assert "RECURRENCE-ID;TZID=America/Toronto:20300316T100000" in body
+            assert "DTSTART;TZID=America/Toronto:20300316T130000" in body
+        finally:
+            api_client.delete(f"{BASE_URL}/api/admin/classes/cancel/{cancel['id']}")
+            api_client.delete(f"{BASE_URL}/api/admin/classes/cancel/{reschedule['id']}")
+        print("✓ Class feed carries EXDATE and RECURRENCE-ID")
+
+    def test_feed_etag_and_unknown_class(self):
+        """Feeds revalidate with 304; unknown classes are 404"""
+        etag = requests.get(f"{BASE_URL}/api/classes.ics").headers.get('ETag')
+        response = requests.get(f"{BASE_URL}/api/classes.ics", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert requests.get(f"{BASE_URL}/api/classes/does-not-exist.ics").status_code == 404
+        print("✓ Feed ETag and unknown class handled")
+
+
+class TestScheduleStream:
+    """GET /api/classes/stream pushes schedule changes to open Classes pages"""
+
+    def test_cancellation_pushed(self, api_client, test_classes):
+        """A cancellation made while connected arrives as a schedule event"""
+        class_id = test_classes["TEST_Calendar day"]['id']
+        received = []
+
+        def listen():
+            with requests.get(f"{BASE_URL}/api/classes/stream", stream=True, timeout=20) as response:
+                assert response.headers['Content-Type'].startswith("text/event-stream")
+                for line in response.iter_lines(decode_unicode=True):
+                    if line and line.startswith("data:"):
+                        received.append(json.loads(line[len("data:"):]))
+                        return
+
+        listener = threading.Thread(target=listen)
+        listener.start()
+        time.sleep(1)
+        cancel = api_client.post(f"{BASE_URL}/api/admin/classes/cancel", json={
+            "class_id": class_id, "cancelled_date": "2030-03-23", "status": "cancelled"
+        }).json()
+        listener.join(timeout=20)
+        api_client.delete(f"{BASE_URL}/api/admin/classes/cancel/{cancel['id']}")
+
+        assert received, "No schedule event received"
+        assert received[0]['type'] == "cancellation"
+        assert received[0]['cancellation']['class_id'] == class_id
+        assert received[0]['cancellation']['cancelled_date'] == "2030-03-23"
+        print("✓ Cancellation pushed to schedule stream")
+
+    def test_last_event_id_replay(self, api_client, test_classes):
+        """A reconnect with Last-Event-ID replays the changes it missed"""
+        class_id = test_classes["TEST_Calendar day"]['id']
+        cancel = api_client.post(f"{BASE_URL}/api/admin/classes/cancel", json={
+            "class_id": class_id, "cancelled_date": "2030-03-30", "status": "cancelled"
+        }).json()
+        try:
+            replayed = []
+            with requests.get(f"{BASE_URL}/api/classes/stream", headers={"Last-Event-ID": "0"},
+                              stream=True, timeout=20) as response:
+                for line in response.iter_lines(decode_unicode=True):
+                    if line and line.startswith("data:"):
+                        change = json.loads(line[len("data:"):])
+                        if change.get('cancellation', {}).get('id') == cancel['id']:
+                            replayed.append(change)
+                            break
+            assert replayed, "Missed cancellation was not replayed"
+            print("✓ Last-Event-ID replays missed schedule changes")
+        finally:
+            api_client.delete(f"{BASE_URL}/api/admin/classes/cancel/{cancel['id']}")
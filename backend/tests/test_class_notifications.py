@@ -0,0 +1,76 @@
+"""
+TC Pro Dojo Class Change Notification Tests
+Cancelling a class instance fans out notices to enrolled students and records delivery stats
+"""
+import pytest
+import requests
+import os
+import time
+import uuid
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+@pytest.fixture(scope="module")
+def api_client():
+    """Authenticated admin session"""
+    response = requests.post(f"{BASE_URL}/api/admin/login", json={
+        "username": "admin",
+        "password": "tcprodojo2025"
+    })
+    assert response.status_code == 200, f"Admin login failed: {response.text}"
+    session = requests.Session()
+    session.headers.update({
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {response.json()['access_token']}"
+    })
+    return session
+
+
+class TestClassChangeFanOut:
+    """POST /api/admin/classes/cancel -> GET /api/admin/classes/notifications/{id}"""
+
+    def test_notification_stats_recorded(self, api_client):
+        """Only enrolled, active, opted-in students are queued"""
+        cls = api_client.post(f"{BASE_URL}/api/admin/classes", json={
+            "title": "TEST_Notify class", "instructor": "Test", "level": "All",
+            "day": "Monday", "time": "6:00 PM - 8:00 PM"
+        }).json()
+        students = []
+        for notify in (True, True, False):
+            response = api_client.post(f"{BASE_URL}/api/admin/students", json={
+                "name": "TEST <Student>",
+                "email": f"test_notify_{uuid.uuid4().hex[:8]}@example.com",
+                "classes": [cls['id']],
+                "notify_class_changes": notify
+            })
+            assert response.status_code == 200, f"Create student failed: {response.text}"
+            students.append(response.json())
+
+        cancel = api_client.post(f"{BASE_URL}/api/admin/classes/cancel", json={
+            "class_id": cls['id'], "cancelled_date": "2030-03-04", "status": "cancelled", "reason": "TEST"
+        }).json()
+        try:
+            stats = None
+            for _ in range(20):
+                response = api_client.get(f"{BASE_URL}/api/admin/classes/notifications/{cancel['id']}")
+                if response.status_code == 200 and response.json()['state'] == "queued":
+                    stats = response.json()
+                    break
+                time.sleep(0.5)
+            assert stats, "Notification fan-out did not finish"
+            assert stats['recipients'] == 2
+            assert stats['queued'] == 2
+            assert sum(stats['delivery'].values()) == 2
+            print(f"✓ Fan-out queued {stats['queued']} notices, delivery: {stats['delivery']}")
+        finally:
+            api_client.delete(f"{BASE_URL}/api/admin/classes/cancel/{cancel['id']}")
+            for student in students:
+                api_client.delete(f"{BASE_URL}/api/admin/students/{student['id']}")
+            api_client.delete(f"{BASE_URL}/api/admin/classes/{cls['id']}")
+
+    def test_unknown_notification(self, api_client):
+        """Unknown cancellation ids are 404"""
+        response = api_client.get(f"{BASE_URL}/api/admin/classes/notifications/does-not-exist")
+        assert response.status_code == 404
+        print("✓ Unknown notification returns 404")
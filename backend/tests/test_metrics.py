@@ -0,0 +1,71 @@
+"""
+TC Pro Dojo Metrics Tests
+/metrics exposes per-route request, MongoDB command and third-party call metrics; slow commands are logged
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+
+def fetch_metrics():
+    headers = {"Authorization": f"Bearer {METRICS_TOKEN}"} if METRICS_TOKEN else {}
+    response = requests.get(f"{BASE_URL}/metrics", headers=headers)
+    if response.status_code == 404 or not response.headers.get('Content-Type', '').startswith("text/plain"):
+        pytest.skip("/metrics is not routed to the backend at this URL")
+    assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+    return response.text
+
+
+class TestMetricsEndpoint:
+    """Prometheus text exposition"""
+
+    def test_route_template_labels(self):
+        """Requests are labeled by route template, not raw path"""
+        requests.get(f"{BASE_URL}/api/faqs")
+        requests.get(f"{BASE_URL}/api/classes/does-not-exist.ics")
+        body = fetch_metrics()
+        assert 'http_requests_total{method="GET",route="/api/faqs",status="200"}' in body
+        assert 'route="/api/classes/{class_id}.ics"' in body
+        assert "does-not-exist" not in body
+        print("✓ Request metrics labeled by route template")
+
+    def test_histograms_and_mongo_metrics(self):
+        """Latency histograms and MongoDB command timings are exported"""
+        requests.get(f"{BASE_URL}/api/coaches")
+        body = fetch_metrics()
+        assert "# TYPE http_request_duration_seconds histogram" in body
+        assert 'http_request_duration_seconds_bucket{method="GET",route="/api/coaches",le="+Inf"}' in body
+        assert "mongodb_command_duration_seconds_count{" in body
+        print("✓ Latency histograms and Mongo command timings exported")
+
+
+class TestSlowQueryLog:
+    """GET /api/admin/perf/slow-queries lists the slowest command shapes"""
+
+    def test_slow_queries_report(self):
+        """Report entries carry shape and timing aggregates, never raw values"""
+        login = requests.post(f"{BASE_URL}/api/admin/login", json={
+            "username": "admin",
+            "password": "tcprodojo2025"
+        })
+        assert login.status_code == 200
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+        response = requests.get(f"{BASE_URL}/api/admin/perf/slow-queries", params={"hours": 24, "limit": 10},
+                                headers=headers)
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        entries = response.json()
+        assert isinstance(entries, list) and len(entries) <= 10
+        for entry in entries:
+            for key in ("fingerprint", "collection", "command", "shape", "count", "avg_ms", "max_ms"):
+                assert key in entry
+        assert entries == sorted(entries, key=lambda e: e['total_ms'], reverse=True)
+        print(f"✓ Slow query report returned {len(entries)} shapes")
+
+    def test_slow_queries_requires_auth(self):
+        """The report is admin-only"""
+        response = requests.get(f"{BASE_URL}/api/admin/perf/slow-queries")
+        assert response.status_code in [401, 403]
+        print("✓ Slow query report requires admin auth")
@@ -0,0 +1,262 @@
+"""
+TC Pro Dojo Public Content Cache Tests
+Public read endpoints are served from an in-process cache that admin writes invalidate
+"""
+import pytest
+import requests
+import os
+import uuid
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+@pytest.fixture(scope="module")
+def api_client():
+    """Authenticated admin session"""
+    response = requests.post(f"{BASE_URL}/api/admin/login", json={
+        "username": "admin",
+        "password": "tcprodojo2025"
+    })
+    assert response.status_code == 200, f"Admin login failed: {response.text}"
+    session = requests.Session()
+    session.headers.update({
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {response.json()['access_token']}"
+    })
+    return session
+
+
+class TestPublicCacheInvalidation:
+    """Admin writes must be visible on the very next public read"""
+
+    def test_repeated_reads_are_identical(self):
+        """Two back-to-back reads return the same body"""
+        first = requests.get(f"{BASE_URL}/api/faqs")
+        second = requests.get(f"{BASE_URL}/api/faqs")
+        assert first.status_code == 200
+        assert second.status_code == 200
+        assert first.json() == second.json()
+        print(f"✓ GET /api/faqs stable across reads ({len(first.json())} items)")
+
+    def test_create_update_delete_faq_invalidates(self, api_client):
+        """FAQ create/update/delete show up immediately on /api/faqs"""
+        faq_id = str(uuid.uuid4())
+        requests.get(f"{BASE_URL}/api/faqs")  # warm the cache
+
+        response = api_client.post(f"{BASE_URL}/api/admin/faqs", json={
+            "id": faq_id,
+            "question": "TEST_Cache question?",
+            "answer": "Original answer",
+            "displayOrder": 999
+        })
+        assert response.status_code == 200
+        faqs = requests.get(f"{BASE_URL}/api/faqs").json()
+        assert any(f['id'] == faq_id for f in faqs), "New FAQ not visible after create"
+
+        response = api_client.put(f"{BASE_URL}/api/admin/faqs/{faq_id}", json={
+            "id": faq_id,
+            "question": "TEST_Cache question?",
+            "answer": "Updated answer",
+            "displayOrder": 999
+        })
+        assert response.status_code == 200
+        faqs = requests.get(f"{BASE_URL}/api/faqs").json()
+        faq = next(f for f in faqs if f['id'] == faq_id)
+        assert faq['answer'] == "Updated answer", "Stale FAQ served after update"
+
+        response = api_client.delete(f"{BASE_URL}/api/admin/faqs/{faq_id}")
+        assert response.status_code == 200
+        faqs = requests.get(f"{BASE_URL}/api/faqs").json()
+        assert not any(f['id'] == faq_id for f in faqs), "Deleted FAQ still served"
+        print("✓ FAQ writes invalidate the public cache")
+
+    def test_site_setting_update_invalidates(self, api_client):
+        """Site setting changes show up immediately on /api/site-settings"""
+        key = f"test_cache_{uuid.uuid4().hex[:8]}"
+        response = api_client.post(f"{BASE_URL}/api/admin/site-settings", json={
+            "settingKey": key,
+            "settingValue": "first",
+            "settingType": "text"
+        })
+        assert response.status_code == 200
+        setting_id = response.json()['id']
+        assert requests.get(f"{BASE_URL}/api/site-settings").json().get(key) == "first"
+
+        response = api_client.put(f"{BASE_URL}/api/admin/site-settings/{setting_id}", json={
+            "id": setting_id,
+            "settingKey": key,
+            "settingValue": "second",
+            "settingType": "text"
+        })
+        assert response.status_code == 200
+        assert requests.get(f"{BASE_URL}/api/site-settings").json().get(key) == "second"
+
+        api_client.delete(f"{BASE_URL}/api/admin/site-settings/{setting_id}")
+        assert key not in requests.get(f"{BASE_URL}/api/site-settings").json()
+        print("✓ Site setting writes invalidate the public cache")
+
+
+class TestConditionalRequests:
+    """Public content endpoints revalidate with ETag / If-None-Match"""
+
+    @pytest.mark.parametrize("path", ["/api/coaches", "/api/events", "/api/faqs", "/api/site-settings"])
+    def test_etag_returns_304(self, path):
+        """A matching If-None-Match gets an empty 304"""
+        response = requests.get(f"{BASE_URL}{path}")
+        assert response.status_code == 200
+        etag = response.headers.get('ETag')
+        assert etag, f"{path} should return an ETag"
+        assert 'no-store' not in response.headers.get('Cache-Control', '')
+
+        response = requests.get(f"{BASE_URL}{path}", headers={"If-None-Match": etag})
+        assert response.status_code == 304, f"Expected 304, got {response.status_code}"
+        assert response.content == b""
+        assert response.headers.get('ETag') == etag
+        print(f"✓ {path} answered 304 for ETag {etag}")
+
+    def test_etag_changes_after_admin_write(self, api_client):
+        """An admin write changes the ETag so clients refetch"""
+        etag = requests.get(f"{BASE_URL}/api/tips").headers.get('ETag')
+        tip_id = str(uuid.uuid4())
+        response = api_client.post(f"{BASE_URL}/api/admin/tips", json={
+            "id": tip_id,
+            "title": "TEST_ETag tip",
+            "videoUrl": "https://www.youtube.com/embed/test"
+        })
+        assert response.status_code == 200
+
+        response = requests.get(f"{BASE_URL}/api/tips", headers={"If-None-Match": etag})
+        assert response.status_code == 200, "Stale ETag must not match after a write"
+        assert response.headers.get('ETag') != etag
+
+        api_client.delete(f"{BASE_URL}/api/admin/tips/{tip_id}")
+        print("✓ ETag rotates after admin write")
+
+    def test_admin_routes_stay_no_store(self, api_client):
+        """Admin responses keep Cache-Control: no-store"""
+        response = api_client.get(f"{BASE_URL}/api/admin/faqs")
+        assert response.status_code == 200
+        assert 'no-store' in response.headers.get('Cache-Control', '')
+        assert 'ETag' not in response.headers
+        print("✓ Admin routes remain no-store")
+
+
+class TestBundleEndpoint:
+    """GET /api/bundle composes several public sections into one payload"""
+
+    def test_bundle_matches_individual_endpoints(self):
+        """Each bundle section equals the standalone endpoint body"""
+        response = requests.get(f"{BASE_URL}/api/bundle", params={"sections": "coaches,testimonials,site-settings"})
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        data = response.json()
+        assert set(data.keys()) == {"coaches", "testimonials", "site-settings"}
+        assert data["coaches"] == requests.get(f"{BASE_URL}/api/coaches").json()
+        assert data["testimonials"] == requests.get(f"{BASE_URL}/api/testimonials").json()
+        assert data["site-settings"] == requests.get(f"{BASE_URL}/api/site-settings").json()
+        print("✓ Bundle sections match their standalone endpoints")
+
+    def test_bundle_without_sections_returns_all(self):
+        """Omitting sections returns every public section"""
+        response = requests.get(f"{BASE_URL}/api/bundle")
+        assert response.status_code == 200
+        data = response.json()
+        for section in ["events", "past-events", "classes", "cancelled-classes", "faqs", "media"]:
+            assert section in data, f"Missing section {section}"
+        print(f"✓ Full bundle returned {len(data)} sections")
+
+    def test_bundle_unknown_section(self):
+        """Unknown section names are rejected"""
+        response = requests.get(f"{BASE_URL}/api/bundle", params={"sections": "coaches,students"})
+        assert response.status_code == 400
+        print("✓ Unknown bundle section rejected with 400")
+
+    def test_bundle_etag(self):
+        """Bundle responses revalidate like the individual endpoints"""
+        response = requests.get(f"{BASE_URL}/api/bundle", params={"sections": "faqs,tips"})
+        etag = response.headers.get('ETag')
+        assert etag
+        response = requests.get(f"{BASE_URL}/api/bundle", params={"sections": "tips,faqs"},
+                                headers={"If-None-Match": etag})
+        assert response.status_code == 304, "Section order should not change the bundle ETag"
+        print("✓ Bundle answered 304 for matching ETag")
+
+
+def checkout_payload(product_id, quantity):
+    return {
+        "customer_name": "TEST Catalog",
+        "customer_email": "test@example.com",
+        "items": [{"product_id": product_id, "name": "TEST", "price": 0.01, "quantity": quantity}],
+        "shipping_address": {"street": "1 Test St", "city": "Montreal", "province": "QC",
+                             "country": "Canada", "postal_code": "H2X 1Y4"},
+        "origin_url": BASE_URL
+    }
+
+
+class TestProductCatalog:
+    """Product writes refresh the cached catalog behind /api/products; checkout charges current prices"""
+
+    def test_price_update_reaches_checkout(self, api_client):
+        """Checkout charges the updated price, not a stale snapshot"""
+        response = api_client.post(f"{BASE_URL}/api/admin/products", json={
+            "name": f"TEST_Catalog_{uuid.uuid4().hex[:8]}",
+            "price": 10.0,
+            "active": True,
+            "displayOrder": 999
+        })
+        assert response.status_code == 200
+        product = response.json()
+        requests.get(f"{BASE_URL}/api/products")  # warm the catalog
+
+        response = api_client.put(f"{BASE_URL}/api/admin/products/{product['id']}", json={**product, "price": 12.5})
+        assert response.status_code == 200
+        listed = next(p for p in requests.get(f"{BASE_URL}/api/products").json() if p['id'] == product['id'])
+        assert listed['price'] == 12.5, "Stale price served after update"
+
+        response = requests.post(f"{BASE_URL}/api/shop/checkout", json=checkout_payload(product['id'], 2))
+        if response.status_code == 200:
+            order_id = response.json()['order_id']
+            order = next(o for o in api_client.get(f"{BASE_URL}/api/admin/orders").json() if o['id'] == order_id)
+            assert order['subtotal'] == 25.0
+
+        api_client.delete(f"{BASE_URL}/api/admin/products/{product['id']}")
+        response = requests.post(f"{BASE_URL}/api/shop/checkout", json=checkout_payload(product['id'], 1))
+        assert response.status_code == 400, "Deleted product must not be purchasable"
+        print("✓ Product writes reach /api/products and checkout")
+
+
+class TestBulkReorder:
+    """PATCH /api/admin/{collection}/order sets displayOrder in one request"""
+
+    def test_reorder_faqs(self, api_client):
+        """New order is visible on the public endpoint right away"""
+        ids = []
+        for i in range(3):
+            faq_id = str(uuid.uuid4())
+            api_client.post(f"{BASE_URL}/api/admin/faqs", json={
+                "id": faq_id, "question": f"TEST_Reorder {i}?", "answer": "A", "displayOrder": 900 + i
+            })
+            ids.append(faq_id)
+        requests.get(f"{BASE_URL}/api/faqs")  # warm the cache
+
+        response = api_client.patch(f"{BASE_URL}/api/admin/faqs/order", json=[
+            {"id": ids[0], "displayOrder": 902},
+            {"id": ids[1], "displayOrder": 901},
+            {"id": ids[2], "displayOrder": 900},
+            {"id": "does-not-exist", "displayOrder": 1},
+        ])
+        assert response.status_code == 200, f"Reorder failed: {response.text}"
+        result = response.json()
+        assert result['matched'] == 3
+        assert result['missing'] == ["does-not-exist"]
+
+        faqs = [f['id'] for f in requests.get(f"{BASE_URL}/api/faqs").json() if f['id'] in ids]
+        assert faqs == list(reversed(ids)), "Public FAQs not in the new order"
+        for faq_id in ids:
+            api_client.delete(f"{BASE_URL}/api/admin/faqs/{faq_id}")
+        print("✓ Bulk reorder applied and invalidated the public cache")
+
+    def test_reorder_rejects_unknown_collection(self, api_client):
+        """Only displayOrder collections can be reordered"""
+        response = api_client.patch(f"{BASE_URL}/api/admin/students/order", json=[])
+        assert response.status_code == 404
+        print("✓ Unknown collection rejected")
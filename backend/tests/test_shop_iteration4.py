@@ -448,5 +448,29 @@ class TestAdminProductsRequiresAuth:
         print(f"✓ DELETE /api/admin/products requires auth")
 
 
+class TestStripeWebhook:
+    """POST /api/webhook/stripe - verified events are queued, never applied inline"""
+
+    def test_webhook_rejects_bad_signature(self):
+        """Unsigned payloads are rejected before anything is stored"""
+        response = requests.post(
+            f"{BASE_URL}/api/webhook/stripe",
+            data=b'{"id": "evt_test", "type": "checkout.session.completed"}',
+            headers={"Stripe-Signature": "t=0,v1=invalid", "Content-Type": "application/json"}
+        )
+        assert response.status_code == 400, f"Expected 400, got {response.status_code}"
+        print("✓ Webhook with invalid signature rejected with 400")
+
+
+class TestOrderStatusStream:
+    """GET /api/shop/order-status/{session_id}/stream - server-sent status events"""
+
+    def test_stream_unknown_session(self):
+        """Sessions without an order are refused before a stream is opened"""
+        response = requests.get(f"{BASE_URL}/api/shop/order-status/invalid_session_id_12345/stream", timeout=10)
+        assert response.status_code == 404, f"Expected 404, got {response.status_code}"
+        print("✓ Unknown session stream rejected with 404")
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,110 @@
+"""
+TC Pro Dojo Bulk Student Import Tests
+POST /api/admin/students/import upserts many students by email from JSON or CSV
+"""
+import pytest
+import requests
+import os
+import uuid
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+@pytest.fixture(scope="module")
+def api_client():
+    """Authenticated admin session"""
+    response = requests.post(f"{BASE_URL}/api/admin/login", json={
+        "username": "admin",
+        "password": "tcprodojo2025"
+    })
+    assert response.status_code == 200, f"Admin login failed: {response.text}"
+    session = requests.Session()
+    session.headers.update({"Authorization": f"Bearer {response.json()['access_token']}"})
+    return session
+
+
+def find_student(api_client, email):
+    students = api_client.get(f"{BASE_URL}/api/admin/students", params={"limit": 10000}).json()
+    return next((s for s in students if s['email'] == email), None)
+
+
+class TestStudentImport:
+    """Bulk upserts with per-row error reporting"""
+
+    def test_json_import_inserts_and_updates(self, api_client):
+        """New emails are inserted, known emails updated in place"""
+        tag = uuid.uuid4().hex[:8]
+        emails = [f"test_import_{tag}_{i}@example.com" for i in range(3)]
+        response = api_client.post(f"{BASE_URL}/api/admin/students/import", json=[
+            {"name": f"TEST Import {i}", "email": email, "classes": ["class-a"]} for i, email in enumerate(emails)
+        ])
+        assert response.status_code == 200, f"Import failed: {response.text}"
+        result = response.json()
+        assert result['inserted'] == 3 and result['failed'] == 0
+        original = find_student(api_client, emails[0])
+
+        response = api_client.post(f"{BASE_URL}/api/admin/students/import", json=[
+            {"name": "TEST Import renamed", "email": emails[0], "classes": ["class-b"]}
+        ])
+        result = response.json()
+        assert result['inserted'] == 0 and result['updated'] == 1
+        student = find_student(api_client, emails[0])
+        assert student['id'] == original['id'], "Upsert must keep the existing student id"
+        assert student['name'] == "TEST Import renamed"
+        assert set(student['classes']) == {"class-a", "class-b"}
+
+        for email in emails:
+            api_client.delete(f"{BASE_URL}/api/admin/students/{find_student(api_client, email)['id']}")
+        print("✓ JSON import inserted 3 students and updated 1 by email")
+
+    def test_csv_import_with_row_errors(self, api_client):
+        """Invalid and duplicate rows are reported without blocking the rest"""
+        tag = uuid.uuid4().hex[:8]
+        email = f"test_import_csv_{tag}@example.com"
+        body = (
+            "name,email,classes,notify_class_changes\n"
+            f"TEST Csv,{email},class-a;class-b,no\n"
+            ",missing_name@example.com,,\n"
+            f"TEST Csv again,{email},,\n"
+        )
+        response = api_client.post(f"{BASE_URL}/api/admin/students/import", data=body.encode(),
+                                   headers={"Content-Type": "text/csv"})
+        assert response.status_code == 200, f"Import failed: {response.text}"
+        result = response.json()
+        assert result['received'] == 3
+        assert result['inserted'] == 1
+        assert [e['row'] for e in result['errors']] == [2, 3]
+
+        student = find_student(api_client, email)
+        assert student['classes'] == ["class-a", "class-b"]
+        assert student['notify_class_changes'] is False
+        api_client.delete(f"{BASE_URL}/api/admin/students/{student['id']}")
+        print("✓ CSV import reported per-row errors")
+
+    def test_invalid_body(self, api_client):
+        """Bodies that are neither a JSON array nor CSV are rejected"""
+        response = api_client.post(f"{BASE_URL}/api/admin/students/import", json={"name": "not a list"})
+        assert response.status_code == 400
+        print("✓ Invalid import body rejected")
+
+
+class TestStudentEmailUniqueness:
+    """The unique students.email index surfaces as 400, not 500"""
+
+    def test_update_to_taken_email(self, api_client):
+        """Renaming a student onto another student's email is rejected"""
+        tag = uuid.uuid4().hex[:8]
+        first = api_client.post(f"{BASE_URL}/api/admin/students", json={
+            "name": "TEST Unique A", "email": f"test_unique_a_{tag}@example.com"
+        }).json()
+        second = api_client.post(f"{BASE_URL}/api/admin/students", json={
+            "name": "TEST Unique B", "email": f"test_unique_b_{tag}@example.com"
+        }).json()
+        try:
+            response = api_client.put(f"{BASE_URL}/api/admin/students/{second['id']}",
+                                      json={**second, "email": first['email']})
+            assert response.status_code == 400, f"Expected 400, got {response.status_code}"
+            print("✓ Duplicate email on update rejected with 400")
+        finally:
+            api_client.delete(f"{BASE_URL}/api/admin/students/{first['id']}")
+            api_client.delete(f"{BASE_URL}/api/admin/students/{second['id']}")
@@ -1,18 +1,9 @@
 import React from "react";
 import ReactDOM from "react-dom/client";
-import axios from "axios";
 import "@/index.css";
 import App from "@/App";
 import "./i18n";
 
-// Bust browser/CDN cache on all API GET requests
-axios.interceptors.request.use((config) => {
-  if (config.method === 'get') {
-    config.params = { ...config.params, _t: Date.now() };
-  }
-  return config;
-});
-
 const root = ReactDOM.createRoot(document.getElementById("root"));
 root.render(
   <React.StrictMode>
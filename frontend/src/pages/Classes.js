@@ -39,6 +39,29 @@ const Classes = () => {
     fetchSiteSettings();
   }, []);
 
+  // Live schedule changes pushed by the server while the page is open. Every
+  // reconnect refetches the schedule, so changes missed while disconnected or
+  // dropped by the relay never leave the page stale.
+  useEffect(() => {
+    const source = new EventSource(`${API}/classes/stream`);
+    let connected = false;
+    source.addEventListener('open', () => {
+      if (connected) fetchClasses();
+      connected = true;
+    });
+    source.addEventListener('schedule', (e) => {
+      const change = JSON.parse(e.data);
+      if (change.type === 'cancellation') {
+        setCancelledClasses(prev => [...prev.filter(c => c.id !== change.cancellation.id), change.cancellation]);
+      } else if (change.type === 'uncancel') {
+        setCancelledClasses(prev => prev.filter(c => c.id !== change.id));
+      } else if (change.type === 'class') {
+        fetchClasses();
+      }
+    });
+    return () => source.close();
+  }, []);
+
   const fetchSiteSettings = async () => {
     try {
       const response = await axios.get(`${API}/site-settings`);
@@ -260,6 +283,12 @@ const Classes = () => {
     }
   };
 
+  // The change is saved, but other visitors may see the old schedule for a little while
+  const refreshPendingNote = (response) =>
+    response.headers['x-cache-refresh'] === 'pending'
+      ? ' The public schedule may take a minute to show the change.'
+      : '';
+
   const handleCancelInstance = async () => {
     if (!editingClass || !selectedDate) return;
     const reason = prompt('Reason for cancellation (optional):');
@@ -268,7 +297,7 @@ const Classes = () => {
     try {
       const token = localStorage.getItem('adminToken');
       const dateStr = selectedDate.toISOString().split('T')[0];
-      await axios.post(
+      const response = await axios.post(
         `${API}/admin/classes/cancel`,
         {
           class_id: editingClass.id,
@@ -281,7 +310,7 @@ const Classes = () => {
       await fetchClasses();
       setShowEditModal(false);
       setEditingClass(null);
-      alert('Class instance cancelled. Enrolled students will be notified via email.');
+      alert('Class instance cancelled. Enrolled students will be notified via email.' + refreshPendingNote(response));
     } catch (error) {
       console.error('Error cancelling class:', error);
       alert('Failed to cancel class instance');
@@ -298,7 +327,7 @@ const Classes = () => {
     try {
       const token = localStorage.getItem('adminToken');
       const dateStr = selectedDate.toISOString().split('T')[0];
-      await axios.post(
+      const response = await axios.post(
         `${API}/admin/classes/cancel`,
         {
           class_id: editingClass.id,
@@ -312,7 +341,7 @@ const Classes = () => {
       await fetchClasses();
       setShowEditModal(false);
       setEditingClass(null);
-      alert('Class instance rescheduled. Enrolled students will be notified via email.');
+      alert('Class instance rescheduled. Enrolled students will be notified via email.' + refreshPendingNote(response));
     } catch (error) {
       console.error('Error rescheduling class:', error);
       alert('Failed to reschedule class instance');
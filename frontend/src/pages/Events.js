@@ -30,26 +30,16 @@ const Events = () => {
   useEffect(() => {
     window.scrollTo(0, 0);
     loadEvents();
-    loadSiteSettings();
   }, []);
 
-  const loadSiteSettings = async () => {
-    try {
-      const response = await axios.get(`${API}/api/site-settings`);
-      setSiteSettings(response.data || {});
-    } catch (error) {
-      console.error('Error loading site settings:', error);
-    }
-  };
-
   const loadEvents = async () => {
     try {
-      const [upcomingRes, pastRes] = await Promise.all([
-        axios.get(`${API}/api/events`),
-        axios.get(`${API}/api/past-events`)
-      ]);
-      setUpcomingEvents(upcomingRes.data);
-      setPastEvents(pastRes.data);
+      const { data } = await axios.get(`${API}/api/bundle`, {
+        params: { sections: 'events,past-events,site-settings' }
+      });
+      setUpcomingEvents(data.events);
+      setPastEvents(data['past-events']);
+      setSiteSettings(data['site-settings'] || {});
     } catch (error) {
       console.error('Error loading events:', error);
       setUpcomingEvents([]);
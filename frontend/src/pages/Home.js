@@ -22,12 +22,11 @@ const Home = () => {
 
   const loadData = async () => {
     try {
-      const [testimonialsRes, settingsRes] = await Promise.all([
-        axios.get(`${API}/api/testimonials`),
-        axios.get(`${API}/api/site-settings`)
-      ]);
-      setTestimonials(testimonialsRes.data);
-      setSiteSettings(settingsRes.data);
+      const { data } = await axios.get(`${API}/api/bundle`, {
+        params: { sections: 'testimonials,site-settings' }
+      });
+      setTestimonials(data.testimonials);
+      setSiteSettings(data['site-settings']);
     } catch (error) {
       console.error('Error loading data:', error);
       setTestimonials([]);
@@ -32,16 +32,13 @@ const Pros = () => {
 
   const loadData = async () => {
     try {
-      const [storiesRes, endorsementsRes, coachesRes, settingsRes] = await Promise.all([
-        axios.get(`${API}/api/success-stories`),
-        axios.get(`${API}/api/endorsements`),
-        axios.get(`${API}/api/coaches`),
-        axios.get(`${API}/api/site-settings`)
-      ]);
-      setSuccessStories(storiesRes.data);
-      setEndorsements(endorsementsRes.data);
-      setCoaches(coachesRes.data);
-      setSiteSettings(settingsRes.data);
+      const { data } = await axios.get(`${API}/api/bundle`, {
+        params: { sections: 'success-stories,endorsements,coaches,site-settings' }
+      });
+      setSuccessStories(data['success-stories']);
+      setEndorsements(data.endorsements);
+      setCoaches(data.coaches);
+      setSiteSettings(data['site-settings']);
     } catch (error) {
       console.error('Error loading data:', error);
     } finally {
@@ -72,32 +72,36 @@ const Shop = () => {
     const sessionId = params.get('session_id');
     if (sessionId) {
       setPollingStatus('checking');
-      pollPaymentStatus(sessionId, 0);
+      watchPaymentStatus(sessionId);
     }
   }, []);
 
-  const pollPaymentStatus = async (sessionId, attempt) => {
-    if (attempt >= 8) {
-      setPollingStatus('timeout');
-      return;
-    }
-    try {
-      const res = await axios.get(`${API}/api/shop/order-status/${sessionId}`);
-      if (res.data.payment_status === 'paid') {
+  // The server pushes the current status, then again as soon as Stripe confirms payment
+  const watchPaymentStatus = (sessionId) => {
+    const source = new EventSource(`${API}/api/shop/order-status/${sessionId}/stream`);
+    source.addEventListener('status', (e) => {
+      const data = JSON.parse(e.data);
+      if (data.payment_status === 'paid') {
+        source.close();
         setOrderSuccess(true);
         setPollingStatus('paid');
         setCart([]);
         window.history.replaceState({}, '', window.location.pathname);
-        return;
-      } else if (res.data.status === 'expired') {
+      } else if (data.status === 'expired') {
+        source.close();
         setPollingStatus('expired');
-        return;
       }
-      setTimeout(() => pollPaymentStatus(sessionId, attempt + 1), 2500);
-    } catch (e) {
-      console.error('Error polling:', e);
-      setTimeout(() => pollPaymentStatus(sessionId, attempt + 1), 3000);
-    }
+    });
+    source.addEventListener('timeout', () => {
+      source.close();
+      setPollingStatus('timeout');
+    });
+    source.onerror = () => {
+      // EventSource reconnects on its own unless the server refused the stream
+      if (source.readyState === EventSource.CLOSED) {
+        setPollingStatus('timeout');
+      }
+    };
   };
 
   const addToCart = (product, size) => {
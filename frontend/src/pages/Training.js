@@ -23,12 +23,11 @@ const Training = () => {
 
   const loadData = async () => {
     try {
-      const [tipsRes, settingsRes] = await Promise.all([
-        axios.get(`${API}/api/tips`),
-        axios.get(`${API}/api/site-settings`)
-      ]);
-      setTips(tipsRes.data);
-      setSiteSettings(settingsRes.data || {});
+      const { data } = await axios.get(`${API}/api/bundle`, {
+        params: { sections: 'tips,site-settings' }
+      });
+      setTips(data.tips);
+      setSiteSettings(data['site-settings'] || {});
     } catch (error) {
       console.error('Error loading data:', error);
       setTips([]);
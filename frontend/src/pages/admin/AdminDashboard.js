@@ -46,20 +46,19 @@ const AdminDashboard = () => {
   const loadStats = async () => {
     const token = localStorage.getItem('adminToken');
     try {
-      const [events, testimonials, contacts, coaches, successStories, endorsements, tips, classes, newsletter, pastEventsArchive, media, siteSettings, students, products, faqs] = await Promise.all([
+      // Contacts, subscribers and students are paged lists; their totals come from /admin/counts
+      const [events, testimonials, counts, coaches, successStories, endorsements, tips, classes, pastEventsArchive, media, siteSettings, products, faqs] = await Promise.all([
         axios.get(`${API}/admin/events`, { headers: { Authorization: `Bearer ${token}` } }),
         axios.get(`${API}/admin/testimonials`, { headers: { Authorization: `Bearer ${token}` } }),
-        axios.get(`${API}/contacts`, { headers: { Authorization: `Bearer ${token}` } }),
+        axios.get(`${API}/admin/counts`, { headers: { Authorization: `Bearer ${token}` } }),
         axios.get(`${API}/admin/coaches`, { headers: { Authorization: `Bearer ${token}` } }),
         axios.get(`${API}/admin/success-stories`, { headers: { Authorization: `Bearer ${token}` } }),
         axios.get(`${API}/admin/endorsements`, { headers: { Authorization: `Bearer ${token}` } }),
         axios.get(`${API}/admin/tips`, { headers: { Authorization: `Bearer ${token}` } }),
         axios.get(`${API}/admin/classes`, { headers: { Authorization: `Bearer ${token}` } }),
-        axios.get(`${API}/admin/newsletter-subscriptions`, { headers: { Authorization: `Bearer ${token}` } }),
         axios.get(`${API}/admin/past-events`, { headers: { Authorization: `Bearer ${token}` } }),
         axios.get(`${API}/admin/media`, { headers: { Authorization: `Bearer ${token}` } }),
         axios.get(`${API}/admin/site-settings`, { headers: { Authorization: `Bearer ${token}` } }),
-        axios.get(`${API}/admin/students`, { headers: { Authorization: `Bearer ${token}` } }),
         axios.get(`${API}/admin/products`, { headers: { Authorization: `Bearer ${token}` } }),
         axios.get(`${API}/admin/faqs`, { headers: { Authorization: `Bearer ${token}` } })
       ]);
@@ -85,16 +84,16 @@ const AdminDashboard = () => {
         pastEvents: pastEvents.length,
         pastEventsArchive: pastEventsArchive.data.length,
         testimonials: testimonials.data.length,
-        contacts: contacts.data.length,
+        contacts: counts.data.contacts,
         coaches: coaches.data.length,
         success_stories: successStories.data.length,
         endorsements: endorsements.data.length,
         tips: tips.data.length,
         classes: classes.data.length,
-        newsletter: newsletter.data.length,
+        newsletter: counts.data.newsletter.total,
         media: media.data.length,
         siteSettings: siteSettings.data.length,
-        students: students.data.length,
+        students: counts.data.students.total,
         products: products.data.length,
         faqs: faqs.data.length
       });
@@ -1,13 +1,23 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import axios from 'axios';
 import { useNavigate } from 'react-router-dom';
 import { ArrowLeft, Download, Trash2, Mail, Send, History, Loader2, CheckCircle, AlertCircle } from 'lucide-react';
 
+// Progress polling gives up after this long, or after this many failed checks in a row;
+// the send itself keeps going server-side and shows up in the History tab
+const JOB_POLL_INTERVAL_MS = 2000;
+const JOB_POLL_TIMEOUT_MS = 30 * 60 * 1000;
+const JOB_POLL_MAX_ERRORS = 5;
+
 const AdminNewsletterSubscriptions = () => {
   const navigate = useNavigate();
   const [subscriptions, setSubscriptions] = useState([]);
   const [newsletterLogs, setNewsletterLogs] = useState([]);
   const [loading, setLoading] = useState(true);
+  // The list is paged; counts come from /api/admin/counts and cover every subscriber
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [counts, setCounts] = useState({ total: 0, last_7_days: 0, last_30_days: 0 });
   const [activeTab, setActiveTab] = useState('subscribers'); // 'subscribers', 'compose', 'history'
   const [sending, setSending] = useState(false);
   const [sendResult, setSendResult] = useState(null);
@@ -17,11 +27,16 @@ const AdminNewsletterSubscriptions = () => {
   const [content, setContent] = useState('');
 
   const API = process.env.REACT_APP_BACKEND_URL || '';
+  const mounted = useRef(true);
 
   useEffect(() => {
+    mounted.current = true;
     verifyAuth();
     loadSubscriptions();
     loadNewsletterLogs();
+    return () => {
+      mounted.current = false;
+    };
   }, []);
 
   const verifyAuth = () => {
@@ -34,10 +49,17 @@ const AdminNewsletterSubscriptions = () => {
   const loadSubscriptions = async () => {
     try {
       const token = localStorage.getItem('adminToken');
-      const response = await axios.get(`${API}/api/admin/newsletter-subscriptions`, {
-        headers: { Authorization: `Bearer ${token}` }
-      });
+      const [response, countsRes] = await Promise.all([
+        axios.get(`${API}/api/admin/newsletter-subscriptions`, {
+          headers: { Authorization: `Bearer ${token}` }
+        }),
+        axios.get(`${API}/api/admin/counts`, {
+          headers: { Authorization: `Bearer ${token}` }
+        })
+      ]);
       setSubscriptions(response.data);
+      setNextCursor(response.headers['x-next-cursor'] || null);
+      setCounts(countsRes.data.newsletter);
     } catch (error) {
       console.error('Error loading subscriptions:', error);
     } finally {
@@ -45,6 +67,24 @@ const AdminNewsletterSubscriptions = () => {
     }
   };
 
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const token = localStorage.getItem('adminToken');
+      const response = await axios.get(`${API}/api/admin/newsletter-subscriptions`, {
+        params: { after: nextCursor },
+        headers: { Authorization: `Bearer ${token}` }
+      });
+      setSubscriptions(prev => [...prev, ...response.data]);
+      setNextCursor(response.headers['x-next-cursor'] || null);
+    } catch (error) {
+      console.error('Error loading more subscriptions:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const loadNewsletterLogs = async () => {
     try {
       const token = localStorage.getItem('adminToken');
@@ -57,6 +97,51 @@ const AdminNewsletterSubscriptions = () => {
     }
   };
 
+  const pollNewsletterJob = async (jobId, token) => {
+    const deadline = Date.now() + JOB_POLL_TIMEOUT_MS;
+    let errors = 0;
+    while (mounted.current) {
+      await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+      if (!mounted.current) return;
+      if (Date.now() > deadline || errors >= JOB_POLL_MAX_ERRORS) {
+        setSendResult((previous) => ({
+          ...previous,
+          message: 'Still sending in the background. Check the History tab for the final result.'
+        }));
+        return;
+      }
+      let job;
+      try {
+        const response = await axios.get(`${API}/api/admin/newsletter/logs/${jobId}`, {
+          headers: { Authorization: `Bearer ${token}` }
+        });
+        job = response.data;
+        errors = 0;
+      } catch (error) {
+        console.error('Error checking newsletter progress:', error);
+        errors += 1;
+        continue;
+      }
+      if (!mounted.current) return;
+      const done = job.status !== 'sending';
+      const messages = {
+        completed: `Newsletter sent to ${job.successful} subscribers`,
+        partial: `Newsletter sent to ${job.successful} subscribers; ${job.failed} could not be sent`,
+        failed: `Newsletter failed to send (${job.failed} failed, ${job.successful} sent)`
+      };
+      setSendResult({
+        success: job.status === 'completed' || job.status === 'sending',
+        message: done
+          ? messages[job.status] || `Newsletter ${job.status}`
+          : `Sending... ${job.successful + job.failed} of ${job.total_recipients}`,
+        successful: job.successful,
+        failed: job.failed,
+        total: job.total_recipients
+      });
+      if (done) return;
+    }
+  };
+
   const handleDelete = async (subscriptionId) => {
     if (!window.confirm('Are you sure you want to remove this subscriber?')) return;
     
@@ -80,7 +165,7 @@ const AdminNewsletterSubscriptions = () => {
       return;
     }
 
-    if (!window.confirm(`Are you sure you want to send this newsletter to ${subscriptions.length} subscribers?`)) {
+    if (!window.confirm(`Are you sure you want to send this newsletter to ${counts.total} subscribers?`)) {
       return;
     }
 
@@ -106,8 +191,9 @@ const AdminNewsletterSubscriptions = () => {
       setSubject('');
       setContent('');
       
-      // Reload logs
-      loadNewsletterLogs();
+      // The send runs in the background; follow its progress until it finishes
+      await pollNewsletterJob(response.data.job_id, token);
+      if (mounted.current) loadNewsletterLogs();
       
     } catch (error) {
       console.error('Error sending newsletter:', error);
@@ -116,37 +202,51 @@ const AdminNewsletterSubscriptions = () => {
         message: error.response?.data?.detail || 'Failed to send newsletter. Please try again.'
       });
     } finally {
-      setSending(false);
+      if (mounted.current) setSending(false);
     }
   };
 
-  const downloadCSV = () => {
-    const headers = ['Email', 'Subscribed Date'];
-    const rows = subscriptions.map(sub => [
-      sub.email,
-      new Date(sub.subscribed_at).toLocaleDateString()
-    ]);
-    
-    const csvContent = [
-      headers.join(','),
-      ...rows.map(row => row.join(','))
-    ].join('\n');
-
-    const blob = new Blob([csvContent], { type: 'text/csv' });
-    const url = window.URL.createObjectURL(blob);
-    const a = document.createElement('a');
-    a.href = url;
-    a.download = `newsletter-subscribers-${new Date().toISOString().split('T')[0]}.csv`;
-    document.body.appendChild(a);
-    a.click();
-    document.body.removeChild(a);
-    window.URL.revokeObjectURL(url);
+  // Both go through the export endpoint so they include subscribers beyond the loaded pages
+  const downloadCSV = async () => {
+    try {
+      const token = localStorage.getItem('adminToken');
+      const response = await axios.get(`${API}/api/admin/newsletter-subscriptions/export`, {
+        headers: { Authorization: `Bearer ${token}` },
+        responseType: 'blob'
+      });
+      const url = window.URL.createObjectURL(response.data);
+      const a = document.createElement('a');
+      a.href = url;
+      a.download = `newsletter-subscribers-${new Date().toISOString().split('T')[0]}.csv`;
+      document.body.appendChild(a);
+      a.click();
+      document.body.removeChild(a);
+      window.URL.revokeObjectURL(url);
+    } catch (error) {
+      console.error('Error exporting subscribers:', error);
+      alert('Error downloading CSV. Please try again.');
+    }
   };
 
-  const copyAllEmails = () => {
-    const emails = subscriptions.map(sub => sub.email).join(', ');
-    navigator.clipboard.writeText(emails);
-    alert('All email addresses copied to clipboard!');
+  const copyAllEmails = async () => {
+    try {
+      const token = localStorage.getItem('adminToken');
+      const response = await axios.get(`${API}/api/admin/newsletter-subscriptions/export`, {
+        params: { format: 'ndjson', columns: 'email' },
+        headers: { Authorization: `Bearer ${token}` },
+        // Raw NDJSON; axios would otherwise JSON-parse a single-line body
+        transformResponse: [(data) => data]
+      });
+      const emails = response.data
+        .split('\n')
+        .filter(line => line.trim())
+        .map(line => JSON.parse(line).email);
+      navigator.clipboard.writeText(emails.join(', '));
+      alert('All email addresses copied to clipboard!');
+    } catch (error) {
+      console.error('Error copying emails:', error);
+      alert('Error copying emails. Please try again.');
+    }
   };
 
   return (
@@ -181,7 +281,7 @@ const AdminNewsletterSubscriptions = () => {
             data-testid="tab-subscribers"
           >
             <Mail size={20} className="mr-2" />
-            Subscribers ({subscriptions.length})
+            Subscribers ({counts.total})
           </button>
           <button
             onClick={() => setActiveTab('compose')}
@@ -216,30 +316,20 @@ const AdminNewsletterSubscriptions = () => {
             <div className="bg-black border border-blue-500/20 rounded-lg p-6 mb-8">
               <div className="grid grid-cols-1 md:grid-cols-3 gap-6">
                 <div className="text-center">
-                  <div className="text-4xl font-bold text-blue-400">{subscriptions.length}</div>
+                  <div className="text-4xl font-bold text-blue-400">{counts.total}</div>
                   <div className="text-gray-400 text-sm mt-1">Total Subscribers</div>
                 </div>
                 <div className="text-center">
                   <div className="text-4xl font-bold text-green-400">
-                    {subscriptions.filter(s => {
-                      const date = new Date(s.subscribed_at);
-                      const weekAgo = new Date();
-                      weekAgo.setDate(weekAgo.getDate() - 7);
-                      return date > weekAgo;
-                    }).length}
+                    {counts.last_7_days}
                   </div>
                   <div className="text-gray-400 text-sm mt-1">New This Week</div>
                 </div>
                 <div className="text-center">
                   <div className="text-4xl font-bold text-purple-400">
-                    {subscriptions.filter(s => {
-                      const date = new Date(s.subscribed_at);
-                      const monthAgo = new Date();
-                      monthAgo.setMonth(monthAgo.getMonth() - 1);
-                      return date > monthAgo;
-                    }).length}
+                    {counts.last_30_days}
                   </div>
-                  <div className="text-gray-400 text-sm mt-1">New This Month</div>
+                  <div className="text-gray-400 text-sm mt-1">New in the Last 30 Days</div>
                 </div>
               </div>
             </div>
@@ -249,7 +339,7 @@ const AdminNewsletterSubscriptions = () => {
               <button
                 onClick={copyAllEmails}
                 className="flex items-center px-4 py-2 bg-gray-700 hover:bg-gray-600 text-white font-semibold rounded transition-colors"
-                disabled={subscriptions.length === 0}
+                disabled={counts.total === 0}
               >
                 <Mail size={20} className="mr-2" />
                 Copy All Emails
@@ -257,7 +347,7 @@ const AdminNewsletterSubscriptions = () => {
               <button
                 onClick={downloadCSV}
                 className="flex items-center px-4 py-2 bg-blue-600 hover:bg-blue-700 text-white font-semibold rounded transition-colors"
-                disabled={subscriptions.length === 0}
+                disabled={counts.total === 0}
               >
                 <Download size={20} className="mr-2" />
                 Download CSV
@@ -309,6 +399,18 @@ const AdminNewsletterSubscriptions = () => {
                       ))}
                     </tbody>
                   </table>
+                  {nextCursor && (
+                    <div className="text-center mt-6">
+                      <button
+                        onClick={loadMore}
+                        disabled={loadingMore}
+                        className="px-6 py-2 bg-gray-700 hover:bg-gray-600 text-white font-semibold rounded transition-colors disabled:opacity-50"
+                        data-testid="load-more-subscriptions"
+                      >
+                        {loadingMore ? 'Loading...' : `Load More (${subscriptions.length} of ${counts.total})`}
+                      </button>
+                    </div>
+                  )}
                 </div>
               )}
             </div>
@@ -323,7 +425,7 @@ const AdminNewsletterSubscriptions = () => {
               Compose Newsletter
             </h2>
             <p className="text-gray-400 mb-6">
-              This will send an email to all {subscriptions.length} subscribers
+              This will send an email to all {counts.total} subscribers
             </p>
 
             {/* Send Result Message */}
@@ -406,7 +508,7 @@ const AdminNewsletterSubscriptions = () => {
               <div className="flex gap-4">
                 <button
                   type="submit"
-                  disabled={sending || subscriptions.length === 0}
+                  disabled={sending || counts.total === 0}
                   className="flex items-center px-8 py-3 bg-green-600 hover:bg-green-700 disabled:bg-gray-600 disabled:cursor-not-allowed text-white font-semibold rounded-lg transition-colors"
                   data-testid="send-newsletter-button"
                 >
@@ -418,13 +520,13 @@ const AdminNewsletterSubscriptions = () => {
                   ) : (
                     <>
                       <Send size={20} className="mr-2" />
-                      Send to {subscriptions.length} Subscribers
+                      Send to {counts.total} Subscribers
                     </>
                   )}
                 </button>
               </div>
 
-              {subscriptions.length === 0 && (
+              {counts.total === 0 && (
                 <p className="text-yellow-500 text-sm">
                   You need at least one subscriber before you can send a newsletter.
                 </p>
@@ -8,6 +8,10 @@ const AdminStudents = () => {
   const [students, setStudents] = useState([]);
   const [classes, setClasses] = useState([]);
   const [loading, setLoading] = useState(true);
+  // The list is paged; counts come from /api/admin/counts and cover every student
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [counts, setCounts] = useState({ total: 0, active: 0, notify: 0 });
   const [showForm, setShowForm] = useState(false);
   const [editingStudent, setEditingStudent] = useState(null);
   const [formData, setFormData] = useState({
@@ -37,16 +41,21 @@ const AdminStudents = () => {
   const loadData = async () => {
     try {
       const token = localStorage.getItem('adminToken');
-      const [studentsRes, classesRes] = await Promise.all([
+      const [studentsRes, classesRes, countsRes] = await Promise.all([
         axios.get(`${API}/api/admin/students`, {
           headers: { Authorization: `Bearer ${token}` }
         }),
         axios.get(`${API}/api/admin/classes`, {
           headers: { Authorization: `Bearer ${token}` }
+        }),
+        axios.get(`${API}/api/admin/counts`, {
+          headers: { Authorization: `Bearer ${token}` }
         })
       ]);
       setStudents(studentsRes.data);
+      setNextCursor(studentsRes.headers['x-next-cursor'] || null);
       setClasses(classesRes.data);
+      setCounts(countsRes.data.students);
     } catch (error) {
       console.error('Error loading data:', error);
       if (error.response?.status === 401) {
@@ -57,6 +66,24 @@ const AdminStudents = () => {
     }
   };
 
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const token = localStorage.getItem('adminToken');
+      const response = await axios.get(`${API}/api/admin/students`, {
+        params: { after: nextCursor },
+        headers: { Authorization: `Bearer ${token}` }
+      });
+      setStudents(prev => [...prev, ...response.data]);
+      setNextCursor(response.headers['x-next-cursor'] || null);
+    } catch (error) {
+      console.error('Error loading more students:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleSubmit = async (e) => {
     e.preventDefault();
     const token = localStorage.getItem('adminToken');
@@ -132,40 +159,48 @@ const AdminStudents = () => {
     }));
   };
 
-  const downloadCSV = () => {
-    const headers = ['Name', 'Email', 'Phone', 'Active', 'Notify Class Changes', 'Notes'];
-    const rows = students.map(s => [
-      s.name,
-      s.email,
-      s.phone || '',
-      s.active ? 'Yes' : 'No',
-      s.notify_class_changes ? 'Yes' : 'No',
-      (s.notes || '').replace(/,/g, ';')
-    ]);
-    
-    const csvContent = [
-      headers.join(','),
-      ...rows.map(row => row.map(cell => `"${cell}"`).join(','))
-    ].join('\n');
-
-    const blob = new Blob([csvContent], { type: 'text/csv' });
-    const url = window.URL.createObjectURL(blob);
-    const a = document.createElement('a');
-    a.href = url;
-    a.download = `students-${new Date().toISOString().split('T')[0]}.csv`;
-    document.body.appendChild(a);
-    a.click();
-    document.body.removeChild(a);
-    window.URL.revokeObjectURL(url);
+  // Both go through the export endpoint so they include students beyond the loaded pages
+  const downloadCSV = async () => {
+    try {
+      const token = localStorage.getItem('adminToken');
+      const response = await axios.get(`${API}/api/admin/students/export`, {
+        params: { notify_only: false, columns: 'name,email,phone,active,notify_class_changes,notes' },
+        headers: { Authorization: `Bearer ${token}` },
+        responseType: 'blob'
+      });
+      const url = window.URL.createObjectURL(response.data);
+      const a = document.createElement('a');
+      a.href = url;
+      a.download = `students-${new Date().toISOString().split('T')[0]}.csv`;
+      document.body.appendChild(a);
+      a.click();
+      document.body.removeChild(a);
+      window.URL.revokeObjectURL(url);
+    } catch (error) {
+      console.error('Error exporting students:', error);
+      alert('Error downloading CSV. Please try again.');
+    }
   };
 
-  const copyNotifyEmails = () => {
-    const emails = students
-      .filter(s => s.active && s.notify_class_changes)
-      .map(s => s.email)
-      .join(', ');
-    navigator.clipboard.writeText(emails);
-    alert(`Copied ${emails.split(',').length} email addresses for class change notifications!`);
+  const copyNotifyEmails = async () => {
+    try {
+      const token = localStorage.getItem('adminToken');
+      const response = await axios.get(`${API}/api/admin/students/export`, {
+        params: { format: 'ndjson', columns: 'email' },
+        headers: { Authorization: `Bearer ${token}` },
+        // Raw NDJSON; axios would otherwise JSON-parse a single-line body
+        transformResponse: [(data) => data]
+      });
+      const emails = response.data
+        .split('\n')
+        .filter(line => line.trim())
+        .map(line => JSON.parse(line).email);
+      navigator.clipboard.writeText(emails.join(', '));
+      alert(`Copied ${emails.length} email addresses for class change notifications!`);
+    } catch (error) {
+      console.error('Error copying notify emails:', error);
+      alert('Error copying emails. Please try again.');
+    }
   };
 
   const getClassName = (classId) => {
@@ -173,9 +208,6 @@ const AdminStudents = () => {
     return cls ? `${cls.day} - ${cls.title}` : classId;
   };
 
-  const activeStudents = students.filter(s => s.active);
-  const notifyStudents = students.filter(s => s.active && s.notify_class_changes);
-
   return (
     <div className="min-h-screen bg-gradient-to-b from-gray-900 to-black py-12 px-4" data-testid="admin-students-page">
       <div className="container mx-auto max-w-7xl">
@@ -200,7 +232,7 @@ const AdminStudents = () => {
                 <button
                   onClick={copyNotifyEmails}
                   className="flex items-center px-4 py-2 bg-green-600 hover:bg-green-700 text-white font-semibold rounded transition-colors"
-                  disabled={notifyStudents.length === 0}
+                  disabled={counts.notify === 0}
                   data-testid="copy-notify-emails"
                 >
                   <Copy size={18} className="mr-2" />
@@ -209,7 +241,7 @@ const AdminStudents = () => {
                 <button
                   onClick={downloadCSV}
                   className="flex items-center px-4 py-2 bg-gray-700 hover:bg-gray-600 text-white font-semibold rounded transition-colors"
-                  disabled={students.length === 0}
+                  disabled={counts.total === 0}
                   data-testid="download-csv"
                 >
                   <Download size={18} className="mr-2" />
@@ -232,15 +264,15 @@ const AdminStudents = () => {
         <div className="bg-black border border-blue-500/20 rounded-lg p-6 mb-8">
           <div className="grid grid-cols-1 md:grid-cols-3 gap-6">
             <div className="text-center">
-              <div className="text-4xl font-bold text-blue-400">{students.length}</div>
+              <div className="text-4xl font-bold text-blue-400">{counts.total}</div>
               <div className="text-gray-400 text-sm mt-1">Total Students</div>
             </div>
             <div className="text-center">
-              <div className="text-4xl font-bold text-green-400">{activeStudents.length}</div>
+              <div className="text-4xl font-bold text-green-400">{counts.active}</div>
               <div className="text-gray-400 text-sm mt-1">Active Students</div>
             </div>
             <div className="text-center">
-              <div className="text-4xl font-bold text-purple-400">{notifyStudents.length}</div>
+              <div className="text-4xl font-bold text-purple-400">{counts.notify}</div>
               <div className="text-gray-400 text-sm mt-1">Receive Class Notifications</div>
             </div>
           </div>
@@ -455,6 +487,18 @@ const AdminStudents = () => {
                   ))}
                 </tbody>
               </table>
+              {nextCursor && (
+                <div className="text-center mt-6">
+                  <button
+                    onClick={loadMore}
+                    disabled={loadingMore}
+                    className="px-6 py-2 bg-gray-700 hover:bg-gray-600 text-white font-semibold rounded transition-colors disabled:opacity-50"
+                    data-testid="load-more-students"
+                  >
+                    {loadingMore ? 'Loading...' : `Load More (${students.length} of ${counts.total})`}
+                  </button>
+                </div>
+              )}
             </div>
           )}
         </div>